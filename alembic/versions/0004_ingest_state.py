@@ -0,0 +1,34 @@
+"""Add per-ticker ingest state for resumable runs.
+
+Revision ID: 0004_ingest_state
+Revises: 0003_ai_overviews
+Create Date: 2026-10-16
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004_ingest_state"
+down_revision = "0003_ai_overviews"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ingest_state",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("ticker_id", sa.Integer(), sa.ForeignKey("tickers.id"), nullable=False),
+        sa.Column("source", sa.String(length=32), nullable=False),
+        sa.Column("run_id", sa.String(length=64), nullable=False),
+        sa.Column("last_bar_date", sa.Date(), nullable=True),
+        sa.Column("fetched_through", sa.Date(), nullable=False),
+        sa.Column("last_success_at", sa.DateTime(timezone=True), nullable=False),
+        sa.UniqueConstraint("ticker_id", "source", name="uq_ingest_state_ticker_source"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("ingest_state")
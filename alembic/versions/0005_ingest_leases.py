@@ -0,0 +1,39 @@
+"""Add ingest lease table for sharded ingest workers.
+
+Revision ID: 0005_ingest_leases
+Revises: 0004_ingest_state
+Create Date: 2026-10-16
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005_ingest_leases"
+down_revision = "0004_ingest_state"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ingest_leases",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("run_id", sa.String(length=64), nullable=False),
+        sa.Column("ticker_id", sa.Integer(), sa.ForeignKey("tickers.id"), nullable=False),
+        sa.Column("source", sa.String(length=32), nullable=False),
+        sa.Column("status", sa.String(length=16), nullable=False, server_default="pending"),
+        sa.Column("owner", sa.String(length=128), nullable=True),
+        sa.Column("lease_expires_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.UniqueConstraint(
+            "run_id", "ticker_id", "source", name="uq_ingest_leases_run_ticker_source"
+        ),
+    )
+    op.create_index("ix_ingest_leases_run_status", "ingest_leases", ["run_id", "status"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_ingest_leases_run_status", table_name="ingest_leases")
+    op.drop_table("ingest_leases")
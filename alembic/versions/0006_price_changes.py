@@ -0,0 +1,34 @@
+"""Add price change log for incremental analysis.
+
+Revision ID: 0006_price_changes
+Revises: 0005_ingest_leases
+Create Date: 2026-10-16
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006_price_changes"
+down_revision = "0005_ingest_leases"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "price_changes",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("ticker_id", sa.Integer(), sa.ForeignKey("tickers.id"), nullable=False),
+        sa.Column("source", sa.String(length=32), nullable=False),
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("recorded_at", sa.DateTime(timezone=True), nullable=False),
+        sa.UniqueConstraint(
+            "ticker_id", "source", "date", name="uq_price_changes_ticker_source_date"
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("price_changes")
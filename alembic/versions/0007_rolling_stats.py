@@ -0,0 +1,46 @@
+"""Add rolling statistics maintained by ingest.
+
+Revision ID: 0007_rolling_stats
+Revises: 0006_price_changes
+Create Date: 2026-10-16
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007_rolling_stats"
+down_revision = "0006_price_changes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "rolling_stats",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("ticker_id", sa.Integer(), sa.ForeignKey("tickers.id"), nullable=False),
+        sa.Column("source", sa.String(length=32), nullable=False),
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("close", sa.Numeric(12, 4), nullable=False),
+        sa.Column("prev_date", sa.Date(), nullable=True),
+        sa.Column("prev_close", sa.Numeric(12, 4), nullable=True),
+        sa.Column("change_1d", sa.Float(), nullable=True),
+        sa.Column("maxima", sa.JSON(), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.func.now(),
+        ),
+        sa.UniqueConstraint(
+            "ticker_id", "source", "date", name="uq_rolling_stats_ticker_source_date"
+        ),
+    )
+    op.create_index("ix_rolling_stats_date", "rolling_stats", ["date"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_rolling_stats_date", table_name="rolling_stats")
+    op.drop_table("rolling_stats")
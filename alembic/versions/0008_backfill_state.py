@@ -0,0 +1,32 @@
+"""Add per-ticker backfill completion markers.
+
+Revision ID: 0008_backfill_state
+Revises: 0007_rolling_stats
+Create Date: 2026-10-16
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008_backfill_state"
+down_revision = "0007_rolling_stats"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "backfill_state",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("ticker_id", sa.Integer(), sa.ForeignKey("tickers.id"), nullable=False),
+        sa.Column("source", sa.String(length=32), nullable=False),
+        sa.Column("backfilled_from", sa.Date(), nullable=False),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=False),
+        sa.UniqueConstraint("ticker_id", "source", name="uq_backfill_state_ticker_source"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("backfill_state")
@@ -11,7 +11,9 @@ from sqlalchemy.orm import Session
 from dipdetector import config
 from dipdetector.ai.lambda_client import invoke_overview
 from dipdetector.db.models import AIOverview, DailyPrice, Ticker
+from dipdetector.providers.cache import get_response_cache
 from dipdetector.providers.massive_news import fetch_ticker_news
+from dipdetector.providers.rate_limit import get_rate_limiter
 
 
 def get_overview(session: Session, symbol: str, asof: date | None) -> dict[str, Any]:
@@ -123,6 +125,8 @@ def _fetch_news_items(symbol: str) -> list[dict[str, Any]]:
             limit=limit,
             base_url=config.get_massive_base_url(),
             api_key=config.get_massive_api_key(),
+            cache=get_response_cache(),
+            limiter=get_rate_limiter(),
         )
     except Exception:
         return []
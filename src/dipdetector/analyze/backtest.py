@@ -0,0 +1,372 @@
+"""Backtest dip thresholds over the whole universe with NumPy.
+
+Replays each rule and threshold of a grid over years of `daily_prices` (or the
+Arrow archive) and reports the forward returns of the alerts it would have
+raised. Each ticker's bars are packed into a left-aligned tickers-by-bars close
+matrix, so windows and horizons count trading bars per ticker exactly as
+`analyze.rules` does. A metric is computed once for the whole matrix and its
+in-range values are sorted, which makes every threshold a prefix of that order:
+a grid point costs a binary search and a few lookups in cumulative sums rather
+than another pass over the prices.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import logging
+import sys
+import time
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from datetime import date
+from typing import Hashable, NamedTuple
+
+import numpy as np
+
+from dipdetector import config
+from dipdetector.analyze import registry
+from dipdetector.analyze import run as analyze_run
+from dipdetector.db.session import get_session
+from dipdetector.market.bars import EPOCH, MS_PER_DAY, BarSeries
+from dipdetector.utils.logging import configure_logging
+
+logger = logging.getLogger(__name__)
+
+# Forward returns are measured this many trading bars after the alert.
+HORIZONS = (5, 20, 60)
+DEFAULT_1D_THRESHOLDS = (-3.0, -5.0, -7.0, -10.0)
+DEFAULT_DRAWDOWN_THRESHOLDS = (-5.0, -8.0, -10.0, -15.0, -20.0, -25.0)
+
+
+class HorizonStats(NamedTuple):
+    count: int
+    mean: float
+    median: float
+    # Percent of alerts followed by a positive return.
+    hit_rate: float
+
+
+@dataclass(frozen=True)
+class BacktestRow:
+    """Forward returns after every alert of one rule and threshold.
+
+    The baseline row (``threshold`` None) covers every bar in the range.
+    """
+
+    rule: str
+    threshold: float | None
+    alerts: int
+    tickers: int
+    returns: dict[int, HorizonStats]
+
+
+def _pack(series: Sequence[BarSeries]) -> tuple[np.ndarray, np.ndarray]:
+    """Left-align each series' closes; padding is NaN (closes) and -1 (days)."""
+    width = max((len(bars) for bars in series), default=0)
+    closes = np.full((len(series), width), np.nan)
+    days = np.full((len(series), width), -1, dtype=np.int64)
+    for row, bars in enumerate(series):
+        closes[row, : len(bars)] = bars.close
+        days[row, : len(bars)] = bars.t // MS_PER_DAY
+    return closes, days
+
+
+def _shift(values: np.ndarray, by: int) -> np.ndarray:
+    """Move each row `by` bars later, filling the start with NaN."""
+    shifted = np.full_like(values, np.nan)
+    if by < values.shape[1]:
+        shifted[:, by:] = values[:, : values.shape[1] - by]
+    return shifted
+
+
+def rolling_max(closes: np.ndarray, window: int) -> np.ndarray:
+    """Max close over each row's trailing `window` bars, NaN until a full window.
+
+    Built from power-of-two maxima by doubling, so the cost grows with
+    ``log2(window)`` instead of `window`.
+    """
+    if window <= 0:
+        raise ValueError("window must be a positive integer")
+    result: np.ndarray | None = None
+    covered = 0
+    block, size = closes, 1
+    while size <= window:
+        if window & size:
+            result = block if result is None else np.maximum(result, _shift(block, covered))
+            covered += size
+        block = np.maximum(block, _shift(block, size))
+        size *= 2
+    return result
+
+
+def metric_values(closes: np.ndarray, kind: str, window: int | None = None) -> np.ndarray:
+    """The rule metric at every bar, NaN where `analyze.rules` gives no value."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if kind == registry.DROP_1D:
+            base = _shift(closes, 1)
+        elif kind == registry.DRAWDOWN:
+            base = rolling_max(closes, window)
+        else:
+            raise ValueError(f"Unknown rule kind: {kind!r}")
+        values = (closes - base) / base * 100.0
+    values[~np.isfinite(values)] = np.nan
+    return values
+
+
+def forward_returns(closes: np.ndarray, horizon: int) -> np.ndarray:
+    """Percent change from each close to the close `horizon` bars later."""
+    ahead = np.full_like(closes, np.nan)
+    if horizon < closes.shape[1]:
+        ahead[:, : closes.shape[1] - horizon] = closes[:, horizon:]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = (ahead / closes - 1.0) * 100.0
+    returns[~np.isfinite(returns)] = np.nan
+    return returns
+
+
+class _SortedReturns:
+    """Forward returns of one metric's cells ordered by metric value, with prefix sums."""
+
+    def __init__(self, returns: np.ndarray) -> None:
+        self.returns = returns
+        known = ~np.isnan(returns)
+        self.count = np.cumsum(known)
+        self.total = np.cumsum(np.where(known, returns, 0.0))
+        self.positive = np.cumsum(returns > 0)
+
+    def stats(self, size: int) -> HorizonStats:
+        count = int(self.count[size - 1]) if size else 0
+        if not count:
+            return HorizonStats(0, float("nan"), float("nan"), float("nan"))
+        return HorizonStats(
+            count,
+            float(self.total[size - 1] / count),
+            float(np.nanmedian(self.returns[:size])),
+            float(self.positive[size - 1] / count * 100.0),
+        )
+
+
+def _rows_for(
+    rule: str,
+    thresholds: Sequence[float | None],
+    values: np.ndarray,
+    tickers: np.ndarray,
+    returns: Mapping[int, np.ndarray],
+) -> list[BacktestRow]:
+    # Ties fall in the same prefix, so their order does not matter.
+    order = np.argsort(values)
+    values, tickers = values[order], tickers[order]
+    sorted_returns = {horizon: _SortedReturns(fwd[order]) for horizon, fwd in returns.items()}
+    # A ticker is in a prefix once the prefix reaches its first cell.
+    first_cells = np.sort(np.unique(tickers, return_index=True)[1])
+    rows = []
+    for threshold in thresholds:
+        if threshold is None:
+            size = len(values)
+        else:
+            size = int(np.searchsorted(values, threshold, side="right"))
+        rows.append(
+            BacktestRow(
+                rule=rule,
+                threshold=threshold,
+                alerts=size,
+                tickers=int(np.searchsorted(first_cells, size)),
+                returns={horizon: table.stats(size) for horizon, table in sorted_returns.items()},
+            )
+        )
+    return rows
+
+
+def run_backtest(
+    prices: Mapping[Hashable, BarSeries],
+    start_date: date,
+    end_date: date,
+    rules: Sequence[registry.RuleSpec],
+    horizons: Sequence[int] = HORIZONS,
+) -> list[BacktestRow]:
+    """Alert counts and forward-return stats for every rule and threshold.
+
+    Alerts are the bars dated `start_date`..`end_date` whose metric is at or
+    below a threshold, as `analyze` would raise them for each date; each
+    threshold of a rule is tested on its own. `prices` must include the bars
+    the windows reach back to and the bars the horizons look ahead to.
+    """
+    closes, days = _pack(list(prices.values()))
+    in_range = (days >= (start_date - EPOCH).days) & (days <= (end_date - EPOCH).days)
+    ticker_index = np.broadcast_to(np.arange(len(closes))[:, None], closes.shape)
+    returns = {horizon: forward_returns(closes, horizon) for horizon in horizons}
+
+    def cells(mask: np.ndarray) -> tuple[np.ndarray, dict[int, np.ndarray]]:
+        return ticker_index[mask], {horizon: fwd[mask] for horizon, fwd in returns.items()}
+
+    tickers, baseline = cells(in_range)
+    rows = _rows_for("baseline", [None], np.zeros(len(tickers)), tickers, baseline)
+    for rule in rules:
+        if not rule.thresholds:
+            continue
+        values = metric_values(closes, rule.kind, rule.window)
+        # Only cells that can alert are kept (NaN compares false), so the sort
+        # covers the dips rather than every bar.
+        mask = in_range & (values <= max(rule.thresholds))
+        tickers, rule_returns = cells(mask)
+        rows.extend(_rows_for(rule.name, rule.thresholds, values[mask], tickers, rule_returns))
+    return rows
+
+
+def default_grid(
+    thresholds_1d: Sequence[float] = DEFAULT_1D_THRESHOLDS,
+    windows: Sequence[int] | None = None,
+    drawdown_thresholds: Sequence[float] = DEFAULT_DRAWDOWN_THRESHOLDS,
+) -> list[registry.RuleSpec]:
+    """The 1-day drop and a drawdown per window (default: the configured rule windows).
+
+    A rule with no thresholds is left out of the grid.
+    """
+    grid = []
+    if thresholds_1d:
+        grid.append(registry.RuleSpec(registry.DROP_1D, registry.DROP_1D, tuple(thresholds_1d)))
+    if not drawdown_thresholds:
+        return grid
+    if windows is None:
+        windows = registry.load_registry().windows
+    for window in windows:
+        grid.append(
+            registry.RuleSpec(
+                registry.metric_name(registry.DRAWDOWN, window),
+                registry.DRAWDOWN,
+                tuple(drawdown_thresholds),
+                window,
+            )
+        )
+    return grid
+
+
+def backtest(
+    start_date: date,
+    end_date: date,
+    rules: Sequence[registry.RuleSpec] | None = None,
+    session_factory=get_session,
+    price_source: str | None = None,
+    archive_dir: str | None = None,
+    horizons: Sequence[int] = HORIZONS,
+) -> list[BacktestRow]:
+    """Load the active universe once and run `run_backtest` over it."""
+    if start_date > end_date:
+        raise ValueError("start_date must not be after end_date")
+    if any(horizon <= 0 for horizon in horizons):
+        raise ValueError("horizons must be positive integers")
+    rules = default_grid() if rules is None else rules
+    source = price_source or config.get_price_source()
+    lookback = max([1, *(rule.window or 1 for rule in rules)]) + 1
+    started = time.perf_counter()
+
+    tickers = analyze_run.active_tickers(session_factory)
+    # Load through the newest bar so alerts near `end_date` still get their horizons.
+    prices = dict(
+        analyze_run.load_universe(
+            session_factory,
+            source,
+            {ticker.id: ticker.symbol for ticker in tickers},
+            date.max,
+            lookback,
+            archive_dir,
+            start_date,
+        )
+    )
+    loaded = time.perf_counter()
+    rows = run_backtest(prices, start_date, end_date, rules, horizons)
+    logger.info(
+        "Backtested %d configurations over %d tickers (load %.2fs, compute %.2fs)",
+        sum(len(rule.thresholds) for rule in rules),
+        len(prices),
+        loaded - started,
+        time.perf_counter() - loaded,
+    )
+    return rows
+
+
+def write_csv(rows: Sequence[BacktestRow], horizons: Sequence[int], out) -> None:
+    writer = csv.writer(out)
+    header = ["rule", "threshold", "alerts", "tickers"]
+    for horizon in horizons:
+        header += [f"fwd_{horizon}d_{field}" for field in HorizonStats._fields]
+    writer.writerow(header)
+    for row in rows:
+        values: list[object] = [
+            row.rule,
+            "" if row.threshold is None else row.threshold,
+            row.alerts,
+            row.tickers,
+        ]
+        for horizon in horizons:
+            stats = row.returns[horizon]
+            values += [stats.count] + [
+                "" if value != value else round(value, 4) for value in stats[1:]
+            ]
+        writer.writerow(values)
+
+
+def _parse_list(value: str, cast, flag: str) -> list:
+    try:
+        return [cast(part) for part in value.split(",") if part.strip()]
+    except ValueError as exc:
+        raise ValueError(f"{flag} must be a comma-separated list of numbers") from exc
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Backtest dip thresholds; writes forward-return stats as CSV to stdout."
+    )
+    parser.add_argument("--from", dest="from_date", required=True, help="First alert date")
+    parser.add_argument("--to", dest="to_date", help="Last alert date (default today)")
+    parser.add_argument(
+        "--1d-thresholds",
+        dest="thresholds_1d",
+        default=",".join(str(value) for value in DEFAULT_1D_THRESHOLDS),
+        help="1-day drop thresholds in percent (empty to skip the rule)",
+    )
+    parser.add_argument(
+        "--windows",
+        help="Drawdown windows in trading bars (default: the configured rule windows)",
+    )
+    parser.add_argument(
+        "--drawdown-thresholds",
+        default=",".join(str(value) for value in DEFAULT_DRAWDOWN_THRESHOLDS),
+        help="Drawdown thresholds in percent (empty to skip the drawdown rules)",
+    )
+    parser.add_argument(
+        "--horizons",
+        default=",".join(str(value) for value in HORIZONS),
+        help="Forward-return horizons in trading bars",
+    )
+    parser.add_argument(
+        "--archive",
+        action="store_true",
+        help="Read prices from the Arrow archive at PRICE_ARCHIVE_DIR instead of the database",
+    )
+    args = parser.parse_args()
+
+    configure_logging(config.get_log_level())
+    archive_dir = None
+    if args.archive:
+        archive_dir = config.get_price_archive_dir()
+        if archive_dir is None:
+            parser.error("--archive requires PRICE_ARCHIVE_DIR to be set")
+    start_date = analyze_run.parse_date(args.from_date, "--from")
+    end_date = analyze_run.parse_date(args.to_date, "--to") if args.to_date else date.today()
+    windows = _parse_list(args.windows, int, "--windows") if args.windows else None
+    if windows is not None and any(window <= 0 for window in windows):
+        parser.error("--windows must be positive integers")
+    rules = default_grid(
+        _parse_list(args.thresholds_1d, float, "--1d-thresholds"),
+        windows,
+        _parse_list(args.drawdown_thresholds, float, "--drawdown-thresholds"),
+    )
+    horizons = _parse_list(args.horizons, int, "--horizons")
+    rows = backtest(start_date, end_date, rules, archive_dir=archive_dir, horizons=horizons)
+    write_csv(rows, horizons, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,25 +6,24 @@ from datetime import date
 from typing import Iterable
 
 from dipdetector.analyze import rules
+from dipdetector.analyze.price_series import PricePoint, PriceSeries
+from dipdetector.market.bars import BarSeries
 
-PricePoint = tuple[date, float]
+# Windows `/dips/current` compares when the request does not name any.
+DEFAULT_WINDOWS = [1, 2, 3, 5, 7, 10, 14]
 
 
 def compute_best_recent_drawdown(
-    prices: Iterable[PricePoint],
+    prices: Iterable[PricePoint] | BarSeries | PriceSeries,
     asof_date: date,
     windows: list[int],
 ) -> tuple[float, int] | None:
     if not windows:
         return None
 
-    sorted_prices = sorted(prices, key=lambda item: item[0])
-    filtered = [(day, float(close)) for day, close in sorted_prices if day <= asof_date]
-    if not filtered:
-        return None
-
-    dates = {day for day, _ in filtered}
-    if asof_date not in dates:
+    series = PriceSeries.coerce(prices)
+    index = series.index_of(asof_date)
+    if index is None:
         return None
 
     best: tuple[float, int] | None = None
@@ -35,16 +34,15 @@ def compute_best_recent_drawdown(
 
         if window == 1:
             # Treat 1d as previous close -> asof close to capture single-day drops.
-            value = rules.compute_1d_drop(filtered, asof_date)
+            value = rules.compute_1d_drop(series, asof_date)
         else:
-            if len(filtered) < window:
+            peak = series.rolling_max_index(index, window)
+            if peak is None:
                 continue
-            window_prices = filtered[-window:]
-            asof_close = window_prices[-1][1]
-            max_close = max(close for _, close in window_prices)
+            max_close = series.closes[peak]
             if max_close == 0:
                 continue
-            value = (asof_close / max_close - 1.0) * 100.0
+            value = (series.closes[index] / max_close - 1.0) * 100.0
 
         if value is None:
             continue
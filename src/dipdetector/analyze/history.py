@@ -0,0 +1,84 @@
+"""Dip rules evaluated for every date of a range in one pass per ticker.
+
+`rules` answers one as-of date at a time and rescans the window each time, so
+a year of history costs O(days * window) per ticker. Here the rolling maxima
+for the whole series come from a monotonic deque in O(n), and every date in
+the range is read off them. Results match `rules` applied to each date.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Sequence
+from datetime import date
+
+from dipdetector.analyze.vectorized import RuleResults
+from dipdetector.market.bars import BarSeries
+
+
+def rolling_max_indices(values: Sequence[float], window: int) -> list[int | None]:
+    """Index of the maximum of each trailing `window`, None until a full window.
+
+    Ties resolve to the latest index, matching `rules.compute_drawdown`.
+    """
+    if window <= 0:
+        raise ValueError("window must be a positive integer")
+    result: list[int | None] = []
+    candidates: deque[int] = deque()
+    for index, value in enumerate(values):
+        # Popping equal values too keeps the latest of tied maxima at the front.
+        while candidates and values[candidates[-1]] <= value:
+            candidates.pop()
+        candidates.append(index)
+        if candidates[0] <= index - window:
+            candidates.popleft()
+        result.append(candidates[0] if index + 1 >= window else None)
+    return result
+
+
+def evaluate_history(
+    prices: BarSeries,
+    start_date: date,
+    end_date: date,
+    windows: Sequence[int],
+) -> dict[date, RuleResults]:
+    """Rule results for each bar dated `start_date`..`end_date`, keyed by date.
+
+    `prices` must include the bars before `start_date` that the windows reach
+    back to; dates without a bar get no results, as in `rules`.
+    """
+    points = prices.price_points()
+    days = [day for day, _ in points]
+    closes = [close for _, close in points]
+    maxima = {window: rolling_max_indices(closes, window) for window in windows if window > 0}
+
+    history: dict[date, RuleResults] = {}
+    for index, (day, close) in enumerate(points):
+        if day < start_date or day > end_date:
+            continue
+        results: RuleResults = {}
+        if index > 0 and closes[index - 1] != 0:
+            prev_close = closes[index - 1]
+            results["drop_1d"] = (
+                (close - prev_close) / prev_close * 100.0,
+                {
+                    "prev_date": days[index - 1].isoformat(),
+                    "prev_close": float(prev_close),
+                    "asof_close": float(close),
+                },
+            )
+        for window, indices in maxima.items():
+            peak = indices[index]
+            if peak is None or closes[peak] == 0:
+                continue
+            results[f"drawdown_{window}d"] = (
+                (close - closes[peak]) / closes[peak] * 100.0,
+                {
+                    "window": window,
+                    "rolling_max_date": days[peak].isoformat(),
+                    "rolling_max_close": float(closes[peak]),
+                    "asof_close": float(close),
+                },
+            )
+        history[day] = results
+    return history
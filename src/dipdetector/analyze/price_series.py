@@ -0,0 +1,97 @@
+"""Sorted, validated closes with O(log n) as-of lookup for the dip rules."""
+
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable
+from datetime import date
+
+from dipdetector.market.bars import BarSeries
+
+PricePoint = tuple[date, float]
+
+
+class PriceSeries:
+    """One ticker's ``(date, close)`` points, sorted and checked once.
+
+    Dates must be unique. Lookups by date bisect the sorted dates, and
+    rolling maxima come from a sparse table built on first use, so each
+    window query after that is O(1) however many rules share the series.
+    """
+
+    __slots__ = ("dates", "closes", "_levels")
+
+    def __init__(self, points: Iterable[PricePoint], presorted: bool = False) -> None:
+        pairs = list(points)
+        if not presorted:
+            pairs.sort(key=lambda item: item[0])
+        self.dates: list[date] = [day for day, _ in pairs]
+        self.closes: list[float] = [float(close) for _, close in pairs]
+        for index in range(1, len(self.dates)):
+            if self.dates[index] <= self.dates[index - 1]:
+                if self.dates[index] == self.dates[index - 1]:
+                    raise ValueError(f"Duplicate price date: {self.dates[index].isoformat()}")
+                raise ValueError("Presorted prices are out of date order")
+        self._levels: list[list[int]] | None = None
+
+    @classmethod
+    def coerce(cls, prices: Iterable[PricePoint] | BarSeries | PriceSeries) -> PriceSeries:
+        """Return `prices` as a `PriceSeries`, sorting only when it is not one already."""
+        if isinstance(prices, PriceSeries):
+            return prices
+        if isinstance(prices, BarSeries):
+            # A BarSeries is kept in timestamp order already.
+            return cls(prices.price_points(), presorted=True)
+        return cls(prices)
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def points(self) -> list[PricePoint]:
+        return list(zip(self.dates, self.closes))
+
+    def index_of(self, day: date) -> int | None:
+        """Position of the bar dated `day`, or None when there is none."""
+        index = bisect_left(self.dates, day)
+        if index < len(self.dates) and self.dates[index] == day:
+            return index
+        return None
+
+    def asof_index(self, day: date) -> int | None:
+        """Position of the last bar on or before `day`."""
+        index = bisect_right(self.dates, day) - 1
+        return index if index >= 0 else None
+
+    def _sparse_table(self) -> list[list[int]]:
+        # levels[k][i] is the index of the max close in closes[i : i + 2**k],
+        # the latest one on ties.
+        if self._levels is None:
+            closes = self.closes
+            levels = [list(range(len(closes)))]
+            span = 1
+            while span * 2 <= len(closes):
+                below = levels[-1]
+                levels.append(
+                    [
+                        right if closes[right] >= closes[left] else left
+                        for left, right in zip(below, below[span:])
+                    ]
+                )
+                span *= 2
+            self._levels = levels
+        return self._levels
+
+    def rolling_max_index(self, end: int, window: int) -> int | None:
+        """Index of the max close in the `window` bars ending at `end` (latest on ties).
+
+        None when fewer than `window` bars end at `end`.
+        """
+        start = end - window + 1
+        if window <= 0 or start < 0 or end >= len(self.closes):
+            return None
+        level = window.bit_length() - 1
+        table = self._sparse_table()[level]
+        left, right = table[start], table[end - (1 << level) + 1]
+        # The right block is later in time, so it wins ties.
+        return right if self.closes[right] >= self.closes[left] else left
+
@@ -0,0 +1,194 @@
+"""Declarative dip rules and the fused pass that evaluates them.
+
+A rule names a metric (the 1-day change or a drawdown over a window of
+trading bars) and one or more alert thresholds. Rules come from ``DIP_RULES``
+/ ``DIP_RULES_FILE`` (a JSON list) or, by default, from the ``DIP_*``
+settings. Every metric the registry needs is computed in one backwards pass
+over each price series, so extra rules and severities cost almost nothing.
+
+Example ``DIP_RULES``::
+
+    [{"kind": "drop_1d", "threshold": -5},
+     {"kind": "drawdown", "window": 20, "thresholds": [-8, -15]},
+     {"kind": "drawdown", "window": 60, "threshold": -20, "name": "slide_60d"}]
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import date
+
+from dipdetector import config
+from dipdetector.analyze.vectorized import RuleResults
+from dipdetector.market.bars import BarSeries
+
+DROP_1D = "drop_1d"
+DRAWDOWN = "drawdown"
+KINDS = (DROP_1D, DRAWDOWN)
+
+# Signal.rule and Alert.rule are String(32).
+_MAX_NAME_LENGTH = 32
+
+
+def metric_name(kind: str, window: int | None = None) -> str:
+    return DROP_1D if kind == DROP_1D else f"drawdown_{window}d"
+
+
+@dataclass(frozen=True)
+class RuleSpec:
+    """One signal and its alert thresholds, mildest first."""
+
+    name: str
+    kind: str
+    thresholds: tuple[float, ...]
+    window: int | None = None
+
+    @property
+    def metric(self) -> str:
+        return metric_name(self.kind, self.window)
+
+    def crossed(self, value: float) -> tuple[float, int] | None:
+        """The most severe threshold `value` is at or below, and its 1-based level."""
+        level = sum(1 for threshold in self.thresholds if value <= threshold)
+        if not level:
+            return None
+        return self.thresholds[level - 1], level
+
+
+@dataclass(frozen=True)
+class RuleRegistry:
+    rules: tuple[RuleSpec, ...]
+
+    @property
+    def windows(self) -> tuple[int, ...]:
+        """Distinct drawdown windows, ascending."""
+        return tuple(sorted({rule.window for rule in self.rules if rule.window is not None}))
+
+    @property
+    def lookback(self) -> int:
+        """Bars each series needs: the longest window plus the previous close."""
+        return max([1, *self.windows]) + 1
+
+
+def _parse_rule(entry: object) -> RuleSpec:
+    if not isinstance(entry, dict):
+        raise ValueError(f"Dip rules must be JSON objects, got: {entry!r}")
+    kind = entry.get("kind")
+    if kind not in KINDS:
+        raise ValueError(f"Dip rule kind must be one of {', '.join(KINDS)}, got: {kind!r}")
+
+    window = entry.get("window")
+    if kind == DRAWDOWN:
+        if not isinstance(window, int) or isinstance(window, bool) or window <= 0:
+            raise ValueError(f"Drawdown rules need a positive integer window, got: {window!r}")
+    elif window is not None:
+        raise ValueError("drop_1d rules do not take a window")
+
+    if "threshold" in entry and "thresholds" in entry:
+        raise ValueError("Set only one of threshold and thresholds in a dip rule")
+    raw = entry["thresholds"] if "thresholds" in entry else [entry.get("threshold")]
+    try:
+        thresholds = tuple(sorted((float(value) for value in raw), reverse=True))
+    except (TypeError, ValueError) as exc:
+        raise ValueError(f"Dip rule thresholds must be numbers, got: {raw!r}") from exc
+    if not thresholds:
+        raise ValueError("Dip rules need at least one threshold")
+
+    name = entry.get("name") or metric_name(kind, window)
+    if not isinstance(name, str) or len(name) > _MAX_NAME_LENGTH:
+        raise ValueError(f"Dip rule names must be strings of at most 32 characters: {name!r}")
+    return RuleSpec(name=name, kind=kind, thresholds=thresholds, window=window)
+
+
+def build_registry(entries: Sequence[object]) -> RuleRegistry:
+    rules = tuple(_parse_rule(entry) for entry in entries)
+    if not rules:
+        raise ValueError("At least one dip rule must be configured")
+    names = [rule.name for rule in rules]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Dip rule names must be unique, got duplicates: {duplicates}")
+    return RuleRegistry(rules)
+
+
+def default_registry() -> RuleRegistry:
+    """The classic three rules from the ``DIP_*`` settings."""
+    rules: dict[str, RuleSpec] = {}
+    for rule in (
+        RuleSpec(DROP_1D, DROP_1D, (config.get_dip_1d_threshold(),)),
+        RuleSpec(
+            metric_name(DRAWDOWN, config.get_dip_nday_window()),
+            DRAWDOWN,
+            (config.get_dip_nday_threshold(),),
+            config.get_dip_nday_window(),
+        ),
+        RuleSpec(
+            metric_name(DRAWDOWN, config.get_dip_52w_window()),
+            DRAWDOWN,
+            (config.get_dip_52w_threshold(),),
+            config.get_dip_52w_window(),
+        ),
+    ):
+        # Equal windows collapse into one rule; the 52-week threshold wins.
+        rules[rule.name] = rule
+    return RuleRegistry(tuple(rules.values()))
+
+
+def load_registry() -> RuleRegistry:
+    entries = config.get_dip_rules()
+    if entries is None:
+        return default_registry()
+    return build_registry(entries)
+
+
+def evaluate_fused(prices: BarSeries, asof_date: date, windows: Sequence[int]) -> RuleResults:
+    """Every metric for `asof_date` from one backwards pass over the trailing bars.
+
+    Matches `rules.compute_1d_drop`, `get_prev_close_details` and
+    `compute_drawdown` for each window, including the latest-date tie-break.
+    """
+    points = prices.price_points()
+    index = len(points) - 1
+    while index >= 0 and points[index][0] > asof_date:
+        index -= 1
+    if index < 0 or points[index][0] != asof_date:
+        return {}
+
+    results: RuleResults = {}
+    asof_close = points[index][1]
+    if index > 0 and points[index - 1][1] != 0:
+        prev_date, prev_close = points[index - 1]
+        results[DROP_1D] = (
+            (asof_close - prev_close) / prev_close * 100.0,
+            {
+                "prev_date": prev_date.isoformat(),
+                "prev_close": float(prev_close),
+                "asof_close": float(asof_close),
+            },
+        )
+
+    pending = sorted({window for window in windows if window > 0})
+    span = min(pending[-1], index + 1) if pending else 0
+    peak = index
+    for size in range(1, span + 1):
+        position = index - size + 1
+        # Walking back in time, only a strictly higher close replaces the
+        # peak, so ties keep the later date.
+        if points[position][1] > points[peak][1]:
+            peak = position
+        if size != pending[0]:
+            continue
+        pending.pop(0)
+        peak_date, peak_close = points[peak]
+        if peak_close != 0:
+            results[f"drawdown_{size}d"] = (
+                (asof_close - peak_close) / peak_close * 100.0,
+                {
+                    "window": size,
+                    "rolling_max_date": peak_date.isoformat(),
+                    "rolling_max_close": float(peak_close),
+                    "asof_close": float(asof_close),
+                },
+            )
+    return results
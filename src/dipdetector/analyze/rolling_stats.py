@@ -0,0 +1,270 @@
+"""Per-bar rolling statistics maintained incrementally in `rolling_stats`.
+
+Each row holds a bar's close, the previous bar's close and the 1-day change,
+plus the maximum close (and the date it was set) over every tracked window
+ending at that bar. Ingest refreshes the rows from the first inserted or
+changed bar onwards, in the same transaction as the prices, so `analyze` and
+``/dips/current`` read one row per ticker instead of scanning up to a year of
+closes. Rows written before a window was tracked do not cover it; readers fall
+back to the raw prices for those until the table is rebuilt with
+``python -m dipdetector.analyze.rolling_stats``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+from collections.abc import Callable, Collection, Sequence
+from contextlib import AbstractContextManager
+from dataclasses import dataclass
+from datetime import date
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from dipdetector import config
+from dipdetector.analyze import current_dips, history, registry
+from dipdetector.analyze.vectorized import RuleResults
+from dipdetector.db.models import DailyPrice, RollingStat, Ticker
+from dipdetector.db.session import get_session
+from dipdetector.db.upsert import chunked, insert_for
+from dipdetector.utils.logging import configure_logging
+
+logger = logging.getLogger(__name__)
+
+
+def tracked_windows() -> tuple[int, ...]:
+    """``ROLLING_STATS_WINDOWS``, or the dip rule windows plus the `/dips/current` defaults."""
+    configured = config.get_rolling_stats_windows()
+    if configured is not None:
+        return tuple(configured)
+    defaults = {window for window in current_dips.DEFAULT_WINDOWS if window > 1}
+    return tuple(sorted(defaults | set(registry.load_registry().windows)))
+
+
+def _load_closes(
+    session: Session, ticker_id: int, source: str, since: date | None, context: int
+) -> tuple[list[tuple[date, float]], int]:
+    """Closes from `since` on, preceded by up to `context` earlier ones.
+
+    Returns the points and how many of them precede `since`.
+    """
+    base = select(DailyPrice.date, DailyPrice.close).where(
+        DailyPrice.ticker_id == ticker_id, DailyPrice.source == source
+    )
+    earlier: list = []
+    if since is not None:
+        earlier = session.execute(
+            base.where(DailyPrice.date < since).order_by(DailyPrice.date.desc()).limit(context)
+        ).all()
+        earlier.reverse()
+        base = base.where(DailyPrice.date >= since)
+    rows = session.execute(base.order_by(DailyPrice.date)).all()
+    points = [(day, float(close)) for day, close in [*earlier, *rows]]
+    return points, len(earlier)
+
+
+def compute_rows(
+    points: Sequence[tuple[date, float]], first: int, windows: Sequence[int]
+) -> list[dict[str, object]]:
+    """`rolling_stats` values for ``points[first:]``; earlier points only feed the windows."""
+    closes = [close for _, close in points]
+    maxima = {window: history.rolling_max_indices(closes, window) for window in windows}
+    rows: list[dict[str, object]] = []
+    for index in range(first, len(points)):
+        day, close = points[index]
+        prev_date, prev_close = points[index - 1] if index else (None, None)
+        rows.append(
+            {
+                "date": day,
+                "close": close,
+                "prev_date": prev_date,
+                "prev_close": prev_close,
+                "change_1d": (close - prev_close) / prev_close * 100.0 if prev_close else None,
+                "maxima": {
+                    str(window): (
+                        None
+                        if indices[index] is None
+                        else [closes[indices[index]], points[indices[index]][0].isoformat()]
+                    )
+                    for window, indices in maxima.items()
+                },
+            }
+        )
+    return rows
+
+
+def refresh_rolling_stats(
+    session: Session,
+    ticker_id: int,
+    source: str,
+    since: date | None = None,
+    windows: Sequence[int] | None = None,
+) -> int:
+    """Recompute the rows of every bar from `since` (default: all bars) on.
+
+    A bar changed on `since` moves the windows of every later bar that still
+    reaches back to it; recomputing through the newest bar covers them, and
+    ingest mostly appends, so that is usually only the new bars. Returns the
+    rows written.
+    """
+    windows = tuple(windows if windows is not None else tracked_windows())
+    points, first = _load_closes(session, ticker_id, source, since, max([1, *windows]))
+    rows = [
+        {"ticker_id": ticker_id, "source": source, **row}
+        for row in compute_rows(points, first, windows)
+    ]
+    for chunk in chunked(rows):
+        stmt = insert_for(session, RollingStat).values(list(chunk))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["ticker_id", "source", "date"],
+            set_={
+                "close": stmt.excluded.close,
+                "prev_date": stmt.excluded.prev_date,
+                "prev_close": stmt.excluded.prev_close,
+                "change_1d": stmt.excluded.change_1d,
+                "maxima": stmt.excluded.maxima,
+                "updated_at": func.now(),
+            },
+        )
+        session.execute(stmt)
+    return len(rows)
+
+
+@dataclass(frozen=True)
+class RollingStats:
+    """One `rolling_stats` row, with the maxima keyed by window."""
+
+    date: date
+    close: float
+    prev_date: date | None
+    prev_close: float | None
+    change_1d: float | None
+    maxima: dict[int, tuple[float, date] | None]
+
+    @classmethod
+    def from_row(cls, row: RollingStat) -> RollingStats:
+        return cls(
+            date=row.date,
+            close=float(row.close),
+            prev_date=row.prev_date,
+            prev_close=None if row.prev_close is None else float(row.prev_close),
+            change_1d=row.change_1d,
+            maxima={
+                int(window): (
+                    None if peak is None else (float(peak[0]), date.fromisoformat(peak[1]))
+                )
+                for window, peak in row.maxima.items()
+            },
+        )
+
+    def covers(self, windows: Collection[int]) -> bool:
+        return all(window in self.maxima for window in windows)
+
+    def rule_results(self, windows: Sequence[int]) -> RuleResults:
+        """The results `registry.evaluate_fused` gives for this bar's date."""
+        results: RuleResults = {}
+        if self.change_1d is not None:
+            results["drop_1d"] = (
+                self.change_1d,
+                {
+                    "prev_date": self.prev_date.isoformat(),
+                    "prev_close": self.prev_close,
+                    "asof_close": self.close,
+                },
+            )
+        for window in windows:
+            peak = self.maxima[window]
+            if peak is None or peak[0] == 0:
+                continue
+            max_close, max_date = peak
+            results[f"drawdown_{window}d"] = (
+                (self.close - max_close) / max_close * 100.0,
+                {
+                    "window": window,
+                    "rolling_max_date": max_date.isoformat(),
+                    "rolling_max_close": max_close,
+                    "asof_close": self.close,
+                },
+            )
+        return results
+
+    def best_recent_drawdown(self, windows: Sequence[int]) -> tuple[float, int] | None:
+        """What `current_dips.compute_best_recent_drawdown` returns for this bar's date."""
+        best: tuple[float, int] | None = None
+        for window in windows:
+            if window <= 0:
+                continue
+            if window == 1:
+                value = self.change_1d
+            else:
+                peak = self.maxima[window]
+                if peak is None or peak[0] == 0:
+                    continue
+                value = (self.close / peak[0] - 1.0) * 100.0
+            if value is None:
+                continue
+            if best is None or value < best[0]:
+                best = (value, window)
+        return best
+
+
+def load_rolling_stats(
+    session: Session,
+    source: str,
+    asof_date: date,
+    ticker_ids: Collection[int] | None = None,
+) -> dict[int, RollingStats]:
+    """Rows for `asof_date` keyed by ticker id, for every ticker (or `ticker_ids`)."""
+    stmt = select(RollingStat).where(RollingStat.source == source, RollingStat.date == asof_date)
+    if ticker_ids is not None:
+        stmt = stmt.where(RollingStat.ticker_id.in_(list(ticker_ids)))
+    return {
+        row.ticker_id: RollingStats.from_row(row) for row in session.execute(stmt).scalars()
+    }
+
+
+def rebuild_rolling_stats(
+    session_factory: Callable[[], AbstractContextManager[Session]] = get_session,
+    source: str | None = None,
+) -> int:
+    """Recompute every ticker's rows, e.g. after the tracked windows changed."""
+    source = source or config.get_price_source()
+    windows = tracked_windows()
+    started = time.perf_counter()
+    with session_factory() as session:
+        ticker_ids = list(
+            session.execute(
+                select(Ticker.id).where(
+                    Ticker.id.in_(
+                        select(DailyPrice.ticker_id).where(DailyPrice.source == source)
+                    )
+                )
+            ).scalars()
+        )
+    written = 0
+    for ticker_id in ticker_ids:
+        with session_factory() as session:
+            written += refresh_rolling_stats(session, ticker_id, source, windows=windows)
+    logger.info(
+        "Rebuilt %d rolling stats rows for %d tickers (windows %s) in %.2fs",
+        written,
+        len(ticker_ids),
+        list(windows),
+        time.perf_counter() - started,
+    )
+    return written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Rebuild the rolling_stats table from daily_prices."
+    )
+    parser.parse_args()
+    configure_logging(config.get_log_level())
+    rebuild_rolling_stats()
+
+
+if __name__ == "__main__":
+    main()
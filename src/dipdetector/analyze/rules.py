@@ -3,37 +3,26 @@
 from __future__ import annotations
 
 from datetime import date
-from typing import Iterable, Sequence
+from typing import Iterable
 
-PricePoint = tuple[date, float]
+from dipdetector.analyze.price_series import PricePoint, PriceSeries
+from dipdetector.market.bars import BarSeries
 
+# A `PriceSeries` is used as is; anything else is sorted and validated on each call,
+# so build one when several rules read the same prices.
+Prices = Iterable[PricePoint] | BarSeries | PriceSeries
 
-def _sorted_prices(prices_by_date: Iterable[PricePoint]) -> list[PricePoint]:
-    return sorted(prices_by_date, key=lambda item: item[0])
 
-
-def _asof_and_prev(prices: Sequence[PricePoint], asof_date: date) -> tuple[float, float, date] | None:
-    asof_close: float | None = None
-    prev_close: float | None = None
-    prev_date: date | None = None
-
-    for idx, (day, close) in enumerate(prices):
-        if day == asof_date:
-            asof_close = close
-            if idx > 0:
-                prev_date, prev_close = prices[idx - 1]
-            break
-
-    if asof_close is None or prev_close is None or prev_date is None:
+def _asof_and_prev(series: PriceSeries, asof_date: date) -> tuple[float, float, date] | None:
+    index = series.index_of(asof_date)
+    if index is None or index == 0:
         return None
+    return series.closes[index], series.closes[index - 1], series.dates[index - 1]
 
-    return asof_close, prev_close, prev_date
 
-
-def compute_1d_drop(prices_by_date: Iterable[PricePoint], asof_date: date) -> float | None:
+def compute_1d_drop(prices_by_date: Prices, asof_date: date) -> float | None:
     """Return percent change from previous close to asof close."""
-    prices = _sorted_prices(prices_by_date)
-    result = _asof_and_prev(prices, asof_date)
+    result = _asof_and_prev(PriceSeries.coerce(prices_by_date), asof_date)
     if not result:
         return None
 
@@ -45,7 +34,7 @@ def compute_1d_drop(prices_by_date: Iterable[PricePoint], asof_date: date) -> fl
 
 
 def compute_drawdown(
-    prices_by_date: Iterable[PricePoint],
+    prices_by_date: Prices,
     asof_date: date,
     window: int,
 ) -> tuple[float, dict[str, object]] | None:
@@ -53,41 +42,25 @@ def compute_drawdown(
     if window <= 0:
         return None
 
-    prices = _sorted_prices(prices_by_date)
-    filtered = [(day, close) for day, close in prices if day <= asof_date]
-    if not filtered:
+    series = PriceSeries.coerce(prices_by_date)
+    index = series.index_of(asof_date)
+    if index is None:
         return None
 
-    dates = [day for day, _ in filtered]
-    if asof_date not in dates:
+    # Ties resolve to the latest date.
+    peak = series.rolling_max_index(index, window)
+    if peak is None:
         return None
 
-    window_prices = filtered[-window:]
-    if len(window_prices) < window:
-        return None
-
-    asof_close = dict(filtered)[asof_date]
-
-    rolling_max_close = None
-    rolling_max_date = None
-    for day, close in window_prices:
-        if rolling_max_close is None:
-            rolling_max_close = close
-            rolling_max_date = day
-            continue
-        if close > rolling_max_close or (close == rolling_max_close and day > rolling_max_date):
-            rolling_max_close = close
-            rolling_max_date = day
-
-    if rolling_max_close is None or rolling_max_date is None:
-        return None
+    asof_close = series.closes[index]
+    rolling_max_close = series.closes[peak]
     if rolling_max_close == 0:
         return None
 
     value_percent = (asof_close - rolling_max_close) / rolling_max_close * 100.0
     details = {
         "window": window,
-        "rolling_max_date": rolling_max_date.isoformat(),
+        "rolling_max_date": series.dates[peak].isoformat(),
         "rolling_max_close": float(rolling_max_close),
         "asof_close": float(asof_close),
     }
@@ -95,11 +68,10 @@ def compute_drawdown(
 
 
 def get_prev_close_details(
-    prices_by_date: Iterable[PricePoint],
+    prices_by_date: Prices,
     asof_date: date,
 ) -> dict[str, object] | None:
-    prices = _sorted_prices(prices_by_date)
-    result = _asof_and_prev(prices, asof_date)
+    result = _asof_and_prev(PriceSeries.coerce(prices_by_date), asof_date)
     if not result:
         return None
 
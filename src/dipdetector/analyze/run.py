@@ -4,228 +4,705 @@ from __future__ import annotations
 
 import argparse
 import logging
+import multiprocessing
+from collections.abc import Collection, Iterator, Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import date
+from itertools import groupby
+from operator import itemgetter
 
-from sqlalchemy import select
+import numpy as np
+from sqlalchemy import bindparam, delete, func, or_, select
 from sqlalchemy.orm import Session
 
 from dipdetector import config
-from dipdetector.analyze import rules
-from dipdetector.db.models import Alert, DailyPrice, Signal, Ticker
+from dipdetector.analyze import history, registry, rolling_stats, vectorized
+from dipdetector.db.models import Alert, DailyPrice, PriceChange, Signal, Ticker
+from dipdetector.db import session as db_session
 from dipdetector.db.session import get_session
+from dipdetector.db.upsert import chunked, insert_for
+from dipdetector.market import archive
+from dipdetector.market.bars import BarSeries
 from dipdetector.utils.logging import configure_logging
 
 logger = logging.getLogger(__name__)
 
+ENGINES = ("loop", "vectorized")
+ANALYZE_FETCH_BATCH = 5000
+# Tickers whose signals and alerts are upserted in one transaction.
+ANALYZE_WRITE_BATCH = 500
 
-def _load_prices(
+
+def _iter_trailing_prices(
     session: Session,
-    ticker_id: int,
     source: str,
     asof_date: date,
     limit: int,
-) -> list[tuple[date, float]]:
-    rows = session.execute(
-        select(DailyPrice.date, DailyPrice.close)
+    batch_size: int = ANALYZE_FETCH_BATCH,
+    start_date: date | None = None,
+    ticker_ids: Collection[int] | None = None,
+) -> Iterator[tuple[int, BarSeries]]:
+    """Yield ``(ticker_id, prices)`` for every active ticker (or `ticker_ids`) from one query.
+
+    Each ticker's last `limit` bars on or before `asof_date` are picked with
+    ``row_number() OVER (PARTITION BY ticker_id ORDER BY date DESC)``. With
+    `start_date`, every bar from `start_date` through `asof_date` is kept plus
+    the `limit` bars before it. Rows arrive ordered by ticker and are fetched
+    `batch_size` at a time, so only one ticker's bars are assembled in memory
+    at once.
+    """
+    partition_by = [DailyPrice.ticker_id]
+    if start_date is not None:
+        # Rank the bars before the range separately from those inside it.
+        partition_by.append(DailyPrice.date >= start_date)
+    ranked = (
+        select(
+            DailyPrice.ticker_id,
+            DailyPrice.date,
+            DailyPrice.open,
+            DailyPrice.high,
+            DailyPrice.low,
+            DailyPrice.close,
+            DailyPrice.volume,
+            func.row_number()
+            .over(partition_by=partition_by, order_by=DailyPrice.date.desc())
+            .label("rank"),
+        )
         .where(
-            DailyPrice.ticker_id == ticker_id,
+            DailyPrice.ticker_id.in_(
+                select(Ticker.id).where(Ticker.active.is_(True))
+                if ticker_ids is None
+                else list(ticker_ids)
+            ),
             DailyPrice.source == source,
             DailyPrice.date <= asof_date,
         )
-        .order_by(DailyPrice.date.desc())
-        .limit(limit)
-    ).all()
+        .subquery()
+    )
+    stmt = (
+        select(
+            ranked.c.ticker_id,
+            ranked.c.date,
+            ranked.c.open,
+            ranked.c.high,
+            ranked.c.low,
+            ranked.c.close,
+            ranked.c.volume,
+        )
+        .where(
+            ranked.c.rank <= limit
+            if start_date is None
+            else or_(ranked.c.rank <= limit, ranked.c.date >= start_date)
+        )
+        .order_by(ranked.c.ticker_id, ranked.c.date)
+        .execution_options(yield_per=batch_size)
+    )
+    rows = session.execute(stmt)
+    for ticker_id, group in groupby(rows, key=itemgetter(0)):
+        yield ticker_id, BarSeries.from_rows(row[1:] for row in group)
+
 
-    prices = [(row.date, float(row.close)) for row in rows]
-    prices.reverse()
-    return prices
+def _upsert_signals(session: Session, rows: Sequence[dict[str, object]]) -> None:
+    for chunk in chunked(rows):
+        stmt = insert_for(session, Signal).values(list(chunk))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["ticker_id", "date", "rule"],
+            set_={"value": stmt.excluded.value},
+        )
+        session.execute(stmt)
+
+
+def _upsert_alerts(session: Session, rows: Sequence[dict[str, object]]) -> None:
+    for chunk in chunked(rows):
+        stmt = insert_for(session, Alert).values(list(chunk))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["ticker_id", "date", "rule"],
+            set_={
+                "magnitude": stmt.excluded.magnitude,
+                "threshold": stmt.excluded.threshold,
+                "details_json": stmt.excluded.details_json,
+            },
+        )
+        session.execute(stmt)
 
 
-def _upsert_signal(
-    session: Session,
-    ticker_id: int,
+def _evaluate_loaded(
+    loaded: Iterator[tuple[int, BarSeries]],
     asof_date: date,
-    rule: str,
-    value: float,
-) -> bool:
-    existing = session.execute(
-        select(Signal).where(
-            Signal.ticker_id == ticker_id,
-            Signal.date == asof_date,
-            Signal.rule == rule,
+    windows: tuple[int, ...],
+    engine: str,
+) -> dict[int, vectorized.RuleResults]:
+    if engine == "vectorized":
+        return vectorized.evaluate_universe(dict(loaded), asof_date, windows)
+    return {
+        ticker_id: registry.evaluate_fused(prices, asof_date, windows)
+        for ticker_id, prices in loaded
+    }
+
+
+def _collect(
+    ticker: Ticker,
+    asof_date: date,
+    results: vectorized.RuleResults,
+    rule_registry: registry.RuleRegistry,
+    signals: list[dict[str, object]],
+    alerts: list[dict[str, object]],
+) -> tuple[dict[str, float], int]:
+    """Append the signal and alert rows of every registered rule for one ticker's results.
+
+    Returns the signal values by rule and the number of alerts triggered.
+    """
+    signal_values: dict[str, float] = {}
+    alerts_triggered = 0
+    for rule in rule_registry.rules:
+        result = results.get(rule.metric)
+        if result is None:
+            continue
+        value, details = result
+        signal_values[rule.name] = value
+        signals.append(
+            {"ticker_id": ticker.id, "date": asof_date, "rule": rule.name, "value": value}
+        )
+        crossed = rule.crossed(value)
+        if crossed is None:
+            continue
+        threshold, level = crossed
+        # Rules can share a metric, so each alert gets its own copy of the details.
+        if details is not None:
+            details = {**details, "threshold": threshold}
+            if len(rule.thresholds) > 1:
+                details["severity"] = level
+        alerts.append(
+            {
+                "ticker_id": ticker.id,
+                "date": asof_date,
+                "rule": rule.name,
+                "magnitude": value,
+                "threshold": threshold,
+                "details_json": details,
+            }
         )
-    ).scalar_one_or_none()
+        alerts_triggered += 1
+    return signal_values, alerts_triggered
+
+
+def _read_rolling_stats(
+    session_factory,
+    source: str,
+    asof_date: date,
+    windows: tuple[int, ...],
+    ticker_ids: Collection[int],
+) -> dict[int, vectorized.RuleResults]:
+    """Results for the tickers whose `rolling_stats` row on `asof_date` covers `windows`."""
+    with session_factory() as session:
+        stats = rolling_stats.load_rolling_stats(session, source, asof_date)
+    return {
+        ticker_id: row.rule_results(windows)
+        for ticker_id, row in stats.items()
+        if ticker_id in ticker_ids and row.covers(windows)
+    }
 
-    if existing:
-        existing.value = value
-        return False
 
-    session.add(
-        Signal(
-            ticker_id=ticker_id,
-            date=asof_date,
-            rule=rule,
-            value=value,
+def active_tickers(session_factory) -> list[Ticker]:
+    """Every ticker flagged active, in no particular order."""
+    with session_factory() as session:
+        return list(
+            session.execute(select(Ticker).where(Ticker.active.is_(True))).scalars().all()
         )
-    )
-    return True
 
 
-def _upsert_alert(
-    session: Session,
-    ticker_id: int,
-    asof_date: date,
-    rule: str,
-    magnitude: float,
-    threshold: float,
-    details: dict[str, object] | None,
-) -> bool:
-    existing = session.execute(
-        select(Alert).where(
-            Alert.ticker_id == ticker_id,
-            Alert.date == asof_date,
-            Alert.rule == rule,
-        )
-    ).scalar_one_or_none()
-
-    if existing:
-        existing.magnitude = magnitude
-        existing.threshold = threshold
-        existing.details_json = details
-        return False
-
-    session.add(
-        Alert(
-            ticker_id=ticker_id,
-            date=asof_date,
-            rule=rule,
-            magnitude=magnitude,
-            threshold=threshold,
-            details_json=details,
+def load_universe(
+    session_factory,
+    source: str,
+    symbols: Mapping[int, str],
+    end_date: date,
+    lookback: int,
+    archive_dir: str | None,
+    start_date: date | None = None,
+    shard: bool = False,
+) -> Iterator[tuple[int, BarSeries]]:
+    """Yield each ticker's last `lookback` bars up to `end_date`.
+
+    `symbols` maps the tickers to load by id. With `start_date`, the bars of
+    the whole range plus `lookback` before it. Database loads cover every
+    active ticker unless `shard` restricts them to `symbols`.
+    """
+    if archive_dir is not None:
+        archived = archive.load_universe(archive_dir, source, list(symbols.values()), end=end_date)
+        for ticker_id, symbol in symbols.items():
+            if symbol not in archived:
+                continue
+            prices = archived[symbol]
+            if start_date is None:
+                yield ticker_id, prices[-lookback:]
+            else:
+                yield ticker_id, prices
+        return
+    with session_factory() as session:
+        yield from _iter_trailing_prices(
+            session,
+            source,
+            end_date,
+            lookback,
+            start_date=start_date,
+            ticker_ids=list(symbols) if shard else None,
         )
+
+
+def _evaluate_shard(
+    database_url: str,
+    source: str,
+    asof_date: date,
+    windows: tuple[int, ...],
+    lookback: int,
+    symbols: dict[int, str],
+    archive_dir: str | None,
+    engine: str,
+) -> dict[int, vectorized.RuleResults]:
+    """Worker-process entry point: load and evaluate one shard of tickers."""
+    db_session.configure_engine(database_url)
+    loaded = load_universe(
+        db_session.get_session,
+        source,
+        symbols,
+        asof_date,
+        lookback,
+        archive_dir,
+        shard=True,
     )
-    return True
+    return _evaluate_loaded(loaded, asof_date, windows, engine)
+
+
+def _evaluate_in_processes(
+    session_factory,
+    processes: int,
+    source: str,
+    asof_date: date,
+    windows: tuple[int, ...],
+    lookback: int,
+    tickers: Sequence[Ticker],
+    archive_dir: str | None,
+    engine: str,
+) -> dict[int, vectorized.RuleResults]:
+    """Evaluate round-robin shards of `tickers` on a pool of `processes` workers.
+
+    Workers are spawned fresh and open their own engine on the same database,
+    so no connection is shared with the parent; only the (small) rule results
+    travel back.
+    """
+    with session_factory() as session:
+        database_url = session.get_bind().url.render_as_string(hide_password=False)
+    shards = [
+        {ticker.id: ticker.symbol for ticker in tickers[index::processes]}
+        for index in range(processes)
+    ]
+    evaluated: dict[int, vectorized.RuleResults] = {}
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=processes, mp_context=context) as executor:
+        futures = [
+            executor.submit(
+                _evaluate_shard,
+                database_url,
+                source,
+                asof_date,
+                windows,
+                lookback,
+                shard,
+                archive_dir,
+                engine,
+            )
+            for shard in shards
+            if shard
+        ]
+        for future in as_completed(futures):
+            evaluated.update(future.result())
+    return evaluated
+
+
+def _write_rows(
+    session_factory,
+    signals: list[dict[str, object]],
+    alerts: list[dict[str, object]],
+) -> None:
+    with session_factory() as session:
+        _upsert_signals(session, signals)
+        _upsert_alerts(session, alerts)
 
 
 def analyze(
     asof_date: date,
     session_factory=get_session,
     price_source: str | None = None,
+    archive_dir: str | None = None,
+    engine: str | None = None,
+    processes: int | None = None,
 ) -> None:
+    """Compute signals and alerts for every active ticker as of `asof_date`.
+
+    Prices come from `daily_prices`, or from the Arrow archive under
+    `archive_dir` when given (see `dipdetector.market.archive`); either way they
+    are loaded for the whole universe at once, not per ticker. The ``loop``
+    engine applies `rules` ticker by ticker; ``vectorized`` loads every
+    ticker's window first and evaluates them together with NumPy (see
+    `analyze.vectorized`). Both write identical signals and alerts, upserted
+    with batched ``INSERT ... ON CONFLICT`` statements, one transaction per
+    `ANALYZE_WRITE_BATCH` tickers, so re-running a date updates rows in place.
+
+    Tickers whose `rolling_stats` row for `asof_date` covers every rule window
+    are read from that table (see `analyze.rolling_stats`) and skip the price
+    scan; only the rest are loaded. The table is bypassed when prices come from
+    the archive, or when `engine` or `processes` is passed explicitly, so every
+    ticker then goes through the requested engine (`engine` defaults to
+    ``loop`` and `processes` to ``ANALYZE_PROCESSES``).
+
+    With ``processes > 1`` the remaining tickers are split into that many
+    shards that are loaded and evaluated in worker processes; the parent
+    merges their results and does all the writes.
+    """
+    use_rolling_stats = archive_dir is None and engine is None and processes is None
+    engine = engine or "loop"
+    if engine not in ENGINES:
+        raise ValueError(f"engine must be one of {', '.join(ENGINES)}, got: {engine!r}")
+    if processes is None:
+        processes = config.get_analyze_processes()
+    if processes <= 0:
+        raise ValueError("processes must be a positive integer")
+
     source = price_source or config.get_price_source()
-    dip_1d_threshold = config.get_dip_1d_threshold()
-    dip_nday_window = config.get_dip_nday_window()
-    dip_nday_threshold = config.get_dip_nday_threshold()
-    dip_52w_window = config.get_dip_52w_window()
-    dip_52w_threshold = config.get_dip_52w_threshold()
+    rule_registry = registry.load_registry()
+    windows, lookback = rule_registry.windows, rule_registry.lookback
+    tickers = active_tickers(session_factory)
+
+    evaluated: dict[int, vectorized.RuleResults] = {}
+    if use_rolling_stats:
+        evaluated = _read_rolling_stats(
+            session_factory, source, asof_date, windows, {ticker.id for ticker in tickers}
+        )
+        logger.info("Read rolling stats for %d of %d tickers", len(evaluated), len(tickers))
+    else:
+        logger.info(
+            "Skipping rolling stats; evaluating %d tickers with the %s engine in %d process(es)",
+            len(tickers),
+            engine,
+            processes,
+        )
+    pending = [ticker for ticker in tickers if ticker.id not in evaluated]
+
+    if pending and processes > 1:
+        evaluated.update(
+            _evaluate_in_processes(
+                session_factory,
+                processes,
+                source,
+                asof_date,
+                windows,
+                lookback,
+                pending,
+                archive_dir,
+                engine,
+            )
+        )
+    elif pending:
+        loaded = load_universe(
+            session_factory,
+            source,
+            {ticker.id: ticker.symbol for ticker in pending},
+            asof_date,
+            lookback,
+            archive_dir,
+            shard=len(pending) < len(tickers),
+        )
+        evaluated.update(_evaluate_loaded(loaded, asof_date, windows, engine))
 
-    lookback = max(dip_nday_window, dip_52w_window) + 1
+    evaluated_tickers = []
+    for ticker in tickers:
+        if ticker.id in evaluated:
+            evaluated_tickers.append(ticker)
+        else:
+            logger.info("Ticker %s: no price data", ticker.symbol)
+
+    for batch in chunked(evaluated_tickers, ANALYZE_WRITE_BATCH):
+        signals: list[dict[str, object]] = []
+        alerts: list[dict[str, object]] = []
+        for ticker in batch:
+            signal_values, alerts_triggered = _collect(
+                ticker, asof_date, evaluated[ticker.id], rule_registry, signals, alerts
+            )
+            logger.info(
+                "Ticker %s: signals %s, alerts triggered %d",
+                ticker.symbol,
+                signal_values,
+                alerts_triggered,
+            )
+        _write_rows(session_factory, signals, alerts)
 
-    with session_factory() as session:
-        tickers = (
-            session.execute(select(Ticker).where(Ticker.active.is_(True))).scalars().all()
+
+def analyze_range(
+    start_date: date,
+    end_date: date,
+    session_factory=get_session,
+    price_source: str | None = None,
+    archive_dir: str | None = None,
+) -> None:
+    """Compute signals and alerts for every trading date from `start_date` to `end_date`.
+
+    Each ticker's bars for the range (plus the lookback before it) are loaded
+    once and evaluated with `analyze.history`, in time linear in the number of
+    bars. Rows are identical to running `analyze` for each date.
+    """
+    if start_date > end_date:
+        raise ValueError("start_date must not be after end_date")
+
+    source = price_source or config.get_price_source()
+    rule_registry = registry.load_registry()
+    windows, lookback = rule_registry.windows, rule_registry.lookback
+    tickers = active_tickers(session_factory)
+
+    evaluated = {
+        ticker_id: history.evaluate_history(prices, start_date, end_date, windows)
+        for ticker_id, prices in load_universe(
+            session_factory,
+            source,
+            {ticker.id: ticker.symbol for ticker in tickers},
+            end_date,
+            lookback,
+            archive_dir,
+            start_date,
         )
+    }
 
+    evaluated_tickers = []
     for ticker in tickers:
-        with session_factory() as session:
-            prices = _load_prices(session, ticker.id, source, asof_date, lookback)
-            if not prices:
-                logger.info("Ticker %s: no price data", ticker.symbol)
-                continue
-
-            signal_values: dict[str, float] = {}
+        if evaluated.get(ticker.id):
+            evaluated_tickers.append(ticker)
+        else:
+            logger.info("Ticker %s: no price data in range", ticker.symbol)
+
+    for batch in chunked(evaluated_tickers, ANALYZE_WRITE_BATCH):
+        signals: list[dict[str, object]] = []
+        alerts: list[dict[str, object]] = []
+        for ticker in batch:
             alerts_triggered = 0
+            dates = evaluated[ticker.id]
+            for day, results in dates.items():
+                _, triggered = _collect(ticker, day, results, rule_registry, signals, alerts)
+                alerts_triggered += triggered
+            logger.info(
+                "Ticker %s: evaluated %d dates, alerts triggered %d",
+                ticker.symbol,
+                len(dates),
+                alerts_triggered,
+            )
+        _write_rows(session_factory, signals, alerts)
+
 
-            value_1d = rules.compute_1d_drop(prices, asof_date)
-            if value_1d is not None:
-                signal_values["drop_1d"] = value_1d
-                _upsert_signal(session, ticker.id, asof_date, "drop_1d", value_1d)
-                if value_1d <= dip_1d_threshold:
-                    details = rules.get_prev_close_details(prices, asof_date)
-                    if details is not None:
-                        details["threshold"] = dip_1d_threshold
-                    _upsert_alert(
-                        session,
-                        ticker.id,
-                        asof_date,
-                        "drop_1d",
-                        value_1d,
-                        dip_1d_threshold,
-                        details,
-                    )
-                    alerts_triggered += 1
-
-            drawdown_20 = rules.compute_drawdown(prices, asof_date, dip_nday_window)
-            if drawdown_20 is not None:
-                value, details = drawdown_20
-                signal_values[f"drawdown_{dip_nday_window}d"] = value
-                _upsert_signal(
-                    session,
-                    ticker.id,
-                    asof_date,
-                    f"drawdown_{dip_nday_window}d",
-                    value,
-                )
-                if value <= dip_nday_threshold:
-                    details["threshold"] = dip_nday_threshold
-                    _upsert_alert(
-                        session,
-                        ticker.id,
-                        asof_date,
-                        f"drawdown_{dip_nday_window}d",
-                        value,
-                        dip_nday_threshold,
-                        details,
-                    )
-                    alerts_triggered += 1
-
-            drawdown_52w = rules.compute_drawdown(prices, asof_date, dip_52w_window)
-            if drawdown_52w is not None:
-                value, details = drawdown_52w
-                signal_values[f"drawdown_{dip_52w_window}d"] = value
-                _upsert_signal(
-                    session,
-                    ticker.id,
-                    asof_date,
-                    f"drawdown_{dip_52w_window}d",
-                    value,
-                )
-                if value <= dip_52w_threshold:
-                    details["threshold"] = dip_52w_threshold
-                    _upsert_alert(
-                        session,
-                        ticker.id,
-                        asof_date,
-                        f"drawdown_{dip_52w_window}d",
-                        value,
-                        dip_52w_threshold,
-                        details,
-                    )
-                    alerts_triggered += 1
+def _delete_stale(
+    session: Session,
+    model: type[Signal] | type[Alert],
+    recomputed: Collection[tuple[int, date]],
+    kept: list[dict[str, object]],
+) -> None:
+    """Delete rows on recomputed (ticker, date) pairs that the new results no longer produce."""
+    if not recomputed:
+        return
+    keep = {(row["ticker_id"], row["date"], row["rule"]) for row in kept}
+    pairs = set(recomputed)
+    existing = session.execute(
+        select(model.id, model.ticker_id, model.date, model.rule).where(
+            model.ticker_id.in_({ticker_id for ticker_id, _ in pairs}),
+            model.date.between(min(day for _, day in pairs), max(day for _, day in pairs)),
+        )
+    ).all()
+    stale = [
+        row_id
+        for row_id, ticker_id, day, rule in existing
+        if (ticker_id, day) in pairs and (ticker_id, day, rule) not in keep
+    ]
+    for chunk in chunked(stale):
+        session.execute(delete(model).where(model.id.in_(chunk)))
+
+
+def _affected_dates(prices: BarSeries, changed: Collection[date], span: int) -> set[date]:
+    """Bar dates whose results can move when the bars on `changed` dates change.
+
+    A changed (or newly inserted) bar enters every window ending within `span`
+    bars after it, so those dates are recomputed along with the bar's own.
+    """
+    days = prices.dates
+    affected: set[int] = set()
+    for day in changed:
+        position = int(np.searchsorted(days, np.datetime64(day, "D")))
+        affected.update(range(position, min(position + span, len(days) - 1) + 1))
+    return {day for index, day in enumerate(days.tolist()) if index in affected}
+
+
+def analyze_incremental(
+    asof_date: date,
+    session_factory=get_session,
+    price_source: str | None = None,
+) -> None:
+    """Recompute only the tickers and dates touched by ingest since the last run.
+
+    Ingest logs every inserted or changed bar in `price_changes`. For each
+    logged ticker this re-evaluates the changed dates and the dates whose
+    windows reach back to them, up to `asof_date`. Tickers sharing an earliest
+    changed date are loaded together, from that date minus the lookback. Signals and alerts those
+    dates no longer produce are deleted, and the log entries consumed are
+    cleared in the same transaction as the new rows.
+    """
+    source = price_source or config.get_price_source()
+    rule_registry = registry.load_registry()
+    windows, lookback = rule_registry.windows, rule_registry.lookback
+    span = max(lookback - 2, 1)
 
+    with session_factory() as session:
+        changes = session.execute(
+            select(PriceChange.id, PriceChange.ticker_id, PriceChange.date, PriceChange.recorded_at)
+            .join(Ticker, Ticker.id == PriceChange.ticker_id)
+            .where(
+                PriceChange.source == source,
+                PriceChange.date <= asof_date,
+                Ticker.active.is_(True),
+            )
+        ).all()
+    if not changes:
+        logger.info("No price changes to analyze through %s", asof_date)
+        return
+
+    changed_dates: dict[int, set[date]] = {}
+    seen: dict[int, list[dict[str, object]]] = {}
+    for change_id, ticker_id, day, recorded_at in changes:
+        changed_dates.setdefault(ticker_id, set()).add(day)
+        seen.setdefault(ticker_id, []).append({"change_id": change_id, "seen_at": recorded_at})
+
+    # Each ticker is loaded from its own earliest change (plus the lookback), so
+    # one old correction does not widen the scan for every other ticker.
+    by_start: dict[date, list[int]] = {}
+    for ticker_id, days in changed_dates.items():
+        by_start.setdefault(min(days), []).append(ticker_id)
+
+    evaluated: dict[int, dict[date, vectorized.RuleResults]] = {}
+    with session_factory() as session:
+        for start_date, ticker_ids in sorted(by_start.items()):
+            for ticker_id, prices in _iter_trailing_prices(
+                session,
+                source,
+                asof_date,
+                lookback,
+                start_date=start_date,
+                ticker_ids=ticker_ids,
+            ):
+                affected = _affected_dates(prices, changed_dates[ticker_id], span)
+                if not affected:
+                    continue
+                results = history.evaluate_history(prices, min(affected), max(affected), windows)
+                evaluated[ticker_id] = {day: results[day] for day in affected}
+
+    tickers = [ticker for ticker in active_tickers(session_factory) if ticker.id in changed_dates]
+    consumed = delete(PriceChange.__table__).where(
+        PriceChange.id == bindparam("change_id"),
+        PriceChange.recorded_at == bindparam("seen_at"),
+    )
+    for batch in chunked(tickers, ANALYZE_WRITE_BATCH):
+        signals: list[dict[str, object]] = []
+        alerts: list[dict[str, object]] = []
+        recomputed: list[tuple[int, date]] = []
+        for ticker in batch:
+            dates = evaluated.get(ticker.id, {})
+            recomputed.extend((ticker.id, day) for day in dates)
+            alerts_triggered = 0
+            for day, results in sorted(dates.items()):
+                _, triggered = _collect(ticker, day, results, rule_registry, signals, alerts)
+                alerts_triggered += triggered
             logger.info(
-                "Ticker %s: signals %s, alerts triggered %d",
+                "Ticker %s: recomputed %d changed dates, alerts triggered %d",
                 ticker.symbol,
-                signal_values,
+                len(dates),
                 alerts_triggered,
             )
+        with session_factory() as session:
+            # A corrected bar can stop a rule from applying or an alert from firing.
+            _delete_stale(session, Signal, recomputed, signals)
+            _delete_stale(session, Alert, recomputed, alerts)
+            _upsert_signals(session, signals)
+            _upsert_alerts(session, alerts)
+            session.execute(consumed, [entry for ticker in batch for entry in seen[ticker.id]])
 
 
-def _parse_date(value: str) -> date:
+def parse_date(value: str, flag: str = "--asof") -> date:
+    """Parse a YYYY-MM-DD command-line value, naming `flag` in the error."""
     try:
         return date.fromisoformat(value)
     except ValueError as exc:
-        raise ValueError("--asof must be YYYY-MM-DD") from exc
+        raise ValueError(f"{flag} must be YYYY-MM-DD") from exc
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Run dip analysis and alerts.")
     parser.add_argument("--asof", type=str, help="As-of date (YYYY-MM-DD)")
+    parser.add_argument(
+        "--from",
+        dest="from_date",
+        type=str,
+        help="Evaluate every date from this one (YYYY-MM-DD) instead of a single --asof",
+    )
+    parser.add_argument(
+        "--to",
+        dest="to_date",
+        type=str,
+        help="Last date of a --from range (YYYY-MM-DD, default today)",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only recompute tickers and dates whose prices changed since the last run",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        help=(
+            "Evaluate tickers one by one (loop, the default) or all at once with NumPy "
+            "(vectorized); bypasses rolling_stats"
+        ),
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        help=(
+            "Evaluate ticker shards in this many worker processes "
+            "(default ANALYZE_PROCESSES); bypasses rolling_stats"
+        ),
+    )
+    parser.add_argument(
+        "--archive",
+        action="store_true",
+        help="Read prices from the Arrow archive at PRICE_ARCHIVE_DIR instead of the database",
+    )
     args = parser.parse_args()
 
+    if args.from_date and args.asof:
+        parser.error("--asof cannot be combined with --from/--to")
+    if args.to_date and not args.from_date:
+        parser.error("--to requires --from")
+    if args.incremental and (args.from_date or args.archive):
+        parser.error("--incremental cannot be combined with --from/--to or --archive")
+
     configure_logging(config.get_log_level())
-    asof_date = _parse_date(args.asof) if args.asof else date.today()
-    analyze(asof_date)
+    archive_dir = None
+    if args.archive:
+        archive_dir = config.get_price_archive_dir()
+        if archive_dir is None:
+            parser.error("--archive requires PRICE_ARCHIVE_DIR to be set")
+    if args.from_date:
+        start_date = parse_date(args.from_date, "--from")
+        end_date = parse_date(args.to_date, "--to") if args.to_date else date.today()
+        analyze_range(start_date, end_date, archive_dir=archive_dir)
+        return
+    asof_date = parse_date(args.asof) if args.asof else date.today()
+    if args.incremental:
+        analyze_incremental(asof_date)
+        return
+    analyze(asof_date, archive_dir=archive_dir, engine=args.engine, processes=args.processes)
 
 
 if __name__ == "__main__":
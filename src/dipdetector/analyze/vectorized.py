@@ -0,0 +1,105 @@
+"""Whole-universe dip rules computed with NumPy.
+
+Gives the same results as `analyze.rules` applied ticker by ticker, but
+evaluates every ticker at once. Each ticker's trailing bars are packed into a
+right-aligned tickers-by-bars close matrix (last column = latest bar, NaN
+padding on the left), so windows count trading bars per ticker exactly as
+`rules.compute_drawdown` does, even when tickers have gaps on different days.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping, Sequence
+from datetime import date, timedelta
+from typing import Hashable, TypeVar
+
+import numpy as np
+
+from dipdetector.market.bars import EPOCH, MS_PER_DAY, BarSeries
+
+K = TypeVar("K", bound=Hashable)
+
+RuleResults = dict[str, tuple[float, dict[str, object] | None]]
+
+
+def _day(days: int) -> date:
+    return EPOCH + timedelta(days=days)
+
+
+def _pack(
+    series: Sequence[BarSeries], asof_date: date, width: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Right-align the last `width` bars on or before `asof_date` of each series."""
+    asof_ms = (asof_date - EPOCH).days * MS_PER_DAY
+    closes = np.full((len(series), width), np.nan)
+    days = np.full((len(series), width), -1, dtype=np.int64)
+    counts = np.zeros(len(series), dtype=np.int64)
+    for row, bars in enumerate(series):
+        end = int(np.searchsorted(bars.t, asof_ms, side="right"))
+        start = max(0, end - width)
+        count = end - start
+        if count:
+            closes[row, width - count :] = bars.close[start:end]
+            days[row, width - count :] = bars.t[start:end] // MS_PER_DAY
+        counts[row] = count
+    return closes, days, counts
+
+
+def evaluate_universe(
+    prices: Mapping[K, BarSeries],
+    asof_date: date,
+    windows: Sequence[int],
+) -> dict[K, RuleResults]:
+    """Compute ``drop_1d`` and ``drawdown_<window>d`` for every ticker.
+
+    Returns ``{key: {rule: (value, details)}}`` with the values and details
+    `rules.compute_1d_drop` / `get_prev_close_details` / `compute_drawdown`
+    would produce; a rule that does not apply to a ticker is left out.
+    """
+    keys = list(prices)
+    results: dict[K, RuleResults] = {key: {} for key in keys}
+    if not keys:
+        return results
+
+    width = max([2, *windows])
+    closes, days, counts = _pack([prices[key] for key in keys], asof_date, width)
+    has_asof = days[:, -1] == (asof_date - EPOCH).days
+    asof_close = closes[:, -1]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        prev_close = closes[:, -2]
+        valid = has_asof & (counts >= 2) & (prev_close != 0)
+        change = (asof_close - prev_close) / prev_close * 100.0
+        for row in np.flatnonzero(valid).tolist():
+            results[keys[row]]["drop_1d"] = (
+                float(change[row]),
+                {
+                    "prev_date": _day(int(days[row, -2])).isoformat(),
+                    "prev_close": float(prev_close[row]),
+                    "asof_close": float(asof_close[row]),
+                },
+            )
+
+        rows = np.arange(len(keys))
+        for window in windows:
+            if window <= 0:
+                continue
+            framed = closes[:, -window:]
+            # Last occurrence of the maximum: ties go to the later date.
+            offset = window - 1 - np.argmax(framed[:, ::-1], axis=1)
+            column = width - window + offset
+            max_close = closes[rows, column]
+            valid = has_asof & (counts >= window) & (max_close != 0)
+            drawdown = (asof_close - max_close) / max_close * 100.0
+            rule = f"drawdown_{window}d"
+            for row in np.flatnonzero(valid).tolist():
+                results[keys[row]][rule] = (
+                    float(drawdown[row]),
+                    {
+                        "window": window,
+                        "rolling_max_date": _day(int(days[row, column[row]])).isoformat(),
+                        "rolling_max_close": float(max_close[row]),
+                        "asof_close": float(asof_close[row]),
+                    },
+                )
+    return results
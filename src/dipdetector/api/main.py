@@ -3,6 +3,8 @@
 from __future__ import annotations
 
 import os
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -22,7 +24,13 @@ def _get_cors_origins() -> list[str]:
     ]
 
 
-app = FastAPI(title="Stock Dip Notifier API", version="0.1.0")
+@asynccontextmanager
+async def _lifespan(app: FastAPI) -> AsyncIterator[None]:
+    yield
+    await chart.close_provider(app)
+
+
+app = FastAPI(title="Stock Dip Notifier API", version="0.1.0", lifespan=_lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -2,25 +2,62 @@
 
 from __future__ import annotations
 
+import json
+from collections.abc import AsyncIterator
 from datetime import datetime, time as time_of_day, timezone, timedelta
 from zoneinfo import ZoneInfo
 
-from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi import (
+    APIRouter,
+    FastAPI,
+    HTTPException,
+    Query,
+    Request,
+    WebSocket,
+    WebSocketDisconnect,
+)
+from fastapi.responses import StreamingResponse
 
 from dipdetector import config
-from dipdetector.api.schemas import IntradayBarOut, IntradayChartResponse
-from dipdetector.providers.massive_provider import MassiveProvider
+from dipdetector.api.schemas import IntradayChartResponse
+from dipdetector.market.bars import BarSeries
+from dipdetector.providers.cache import get_response_cache
+from dipdetector.providers.massive_async import AsyncMassiveProvider
+from dipdetector.providers.rate_limit import INTERACTIVE, get_rate_limiter
+from dipdetector.providers.retry import build_retry_policy
 from dipdetector.realtime.massive_ws import MassiveWSFanout, get_fanout
 
 router = APIRouter(tags=["chart"])
 _fanout: MassiveWSFanout | None = None
 
 
-def _get_provider() -> MassiveProvider:
-    return MassiveProvider(
-        config.get_massive_api_key(),
-        config.get_massive_rest_base_url(),
-    )
+def _get_provider(request: Request) -> AsyncMassiveProvider:
+    # One provider per app lifecycle keeps a warm connection pool across chart
+    # requests; it is created on the app's loop and closed by `close_provider`.
+    state = request.app.state
+    provider = getattr(state, "chart_provider", None)
+    if provider is None:
+        provider = AsyncMassiveProvider(
+            config.get_massive_api_key(),
+            config.get_massive_rest_base_url(),
+            max_concurrency=config.get_massive_max_concurrency(),
+            cache=get_response_cache(),
+            limiter=get_rate_limiter(),
+            priority=INTERACTIVE,
+            retry_policy=build_retry_policy(
+                "chart", deadline=config.get_massive_chart_retry_deadline_sec()
+            ),
+        )
+        state.chart_provider = provider
+    return provider
+
+
+async def close_provider(app: FastAPI) -> None:
+    """Close the app's chart provider, if one was created; called on shutdown."""
+    provider = getattr(app.state, "chart_provider", None)
+    app.state.chart_provider = None
+    if provider is not None:
+        await provider.aclose()
 
 
 def _get_fanout() -> MassiveWSFanout:
@@ -31,55 +68,73 @@ def _get_fanout() -> MassiveWSFanout:
 
 
 @router.get("/chart/intraday/{symbol}", response_model=IntradayChartResponse)
-def get_intraday_chart(
+async def get_intraday_chart(
+    request: Request,
     symbol: str,
     lookback_minutes: int | None = Query(default=None, ge=1, le=3900),
-) -> IntradayChartResponse:
+) -> StreamingResponse:
     lookback = lookback_minutes or config.get_live_chart_lookback_minutes()
     timespan = config.get_live_chart_timespan()
     multiplier = config.get_live_chart_multiplier()
-    provider = _get_provider()
-    try:
-        bars = provider.fetch_intraday_bars(symbol, lookback, timespan, multiplier)
-    except Exception as exc:
-        raise HTTPException(status_code=502, detail="Failed to fetch intraday bars") from exc
-
-    return IntradayChartResponse(
-        symbol=symbol.upper(),
-        timespan=timespan,
-        bars=[IntradayBarOut(**bar) for bar in bars],
-    )
+    provider = _get_provider(request)
+    pages = provider.iter_intraday_series(symbol, lookback, timespan, multiplier)
+    return await _stream_chart(symbol, timespan, pages, "Failed to fetch intraday bars")
 
 
 @router.get("/chart/daily/{symbol}", response_model=IntradayChartResponse)
-def get_daily_chart(
+async def get_daily_chart(
+    request: Request,
     symbol: str,
     lookback_days: int = Query(default=30, ge=1, le=5000),
     timespan: str = Query(default="day", pattern="^(minute|hour|day)$"),
     multiplier: int = Query(default=1, ge=1, le=60),
-) -> IntradayChartResponse:
-    provider = _get_provider()
+) -> StreamingResponse:
+    provider = _get_provider(request)
     end_dt = _get_session_end(datetime.now(timezone.utc))
     eastern = ZoneInfo("America/New_York")
     end_local = end_dt.astimezone(eastern)
     start_date = end_local.date() - timedelta(days=lookback_days)
     start_dt = datetime.combine(start_date, time_of_day(9, 30), tzinfo=eastern)
-    try:
-        bars = provider.fetch_aggregate_bars(
-            symbol,
-            start_dt=start_dt,
-            end_dt=end_dt,
-            timespan=timespan,
-            multiplier=multiplier,
-        )
-    except Exception as exc:
-        raise HTTPException(status_code=502, detail="Failed to fetch daily bars") from exc
-
-    return IntradayChartResponse(
-        symbol=symbol.upper(),
+    pages = provider.iter_aggregate_series(
+        symbol,
+        start_dt=start_dt,
+        end_dt=end_dt,
         timespan=timespan,
-        bars=[IntradayBarOut(**bar) for bar in bars],
+        multiplier=multiplier,
     )
+    return await _stream_chart(symbol, timespan, pages, "Failed to fetch daily bars")
+
+
+async def _stream_chart(
+    symbol: str,
+    timespan: str,
+    pages: AsyncIterator[BarSeries],
+    error_detail: str,
+) -> StreamingResponse:
+    """Serialize an `IntradayChartResponse` incrementally, one provider page per write.
+
+    The first page is awaited before the response starts so an upstream failure
+    still surfaces as a 502; later failures abort the stream.
+    """
+    try:
+        first = await anext(pages, None)
+    except Exception as exc:
+        raise HTTPException(status_code=502, detail=error_detail) from exc
+
+    async def body() -> AsyncIterator[str]:
+        header = json.dumps({"symbol": symbol.upper(), "timespan": timespan})
+        yield header[:-1] + ', "bars": ['
+        separator = ""
+        page = first
+        while page is not None:
+            if len(page):
+                # Bars are typed floats/ints already; strip the list brackets to splice pages.
+                yield separator + json.dumps(page.to_agg_dicts())[1:-1]
+                separator = ", "
+            page = await anext(pages, None)
+        yield "]}"
+
+    return StreamingResponse(body(), media_type="application/json")
 
 
 @router.websocket("/ws/chart/intraday/{symbol}")
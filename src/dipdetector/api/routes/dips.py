@@ -11,11 +11,12 @@ from sqlalchemy.orm import Session
 from dipdetector import config
 from dipdetector.api.deps import get_db_session
 from dipdetector.api.schemas import CurrentDipItem, CurrentDipsResponse, SignalOut, to_float
-from dipdetector.analyze.current_dips import compute_best_recent_drawdown
+from dipdetector.analyze.current_dips import DEFAULT_WINDOWS, compute_best_recent_drawdown
+from dipdetector.analyze.price_series import PriceSeries
+from dipdetector.analyze.rolling_stats import load_rolling_stats
 from dipdetector.db.models import DailyPrice, Signal, Ticker
 
 router = APIRouter(tags=["dips"])
-DEFAULT_WINDOWS = [1, 2, 3, 5, 7, 10, 14]
 
 
 def _parse_date(value: str) -> date:
@@ -104,6 +105,31 @@ def list_dips(
     return results
 
 
+def _scan_best_drawdown(
+    session: Session,
+    ticker_id: int,
+    source: str,
+    asof_date: date,
+    window_list: list[int],
+    lookback: int,
+) -> tuple[float, int] | None:
+    rows = session.execute(
+        select(DailyPrice.date, DailyPrice.close)
+        .where(
+            DailyPrice.ticker_id == ticker_id,
+            DailyPrice.date <= asof_date,
+            DailyPrice.source == source,
+        )
+        .order_by(DailyPrice.date.desc())
+        .limit(lookback)
+    ).all()
+
+    prices = PriceSeries(
+        [(row.date, to_float(row.close)) for row in reversed(rows)], presorted=True
+    )
+    return compute_best_recent_drawdown(prices, asof_date, window_list)
+
+
 @router.get("/dips/current", response_model=CurrentDipsResponse)
 def list_current_dips(
     asof: str | None = Query(default=None),
@@ -132,22 +158,18 @@ def list_current_dips(
     tickers = (
         session.execute(select(Ticker).where(Ticker.active.is_(True))).scalars().all()
     )
+    # Window 1 is the 1-day change, which every rolling_stats row carries.
+    needed = {window for window in window_list if window > 1}
+    stats = load_rolling_stats(session, source, asof_date)
     items: list[CurrentDipItem] = []
     for ticker in tickers:
-        rows = session.execute(
-            select(DailyPrice.date, DailyPrice.close)
-            .where(
-                DailyPrice.ticker_id == ticker.id,
-                DailyPrice.date <= asof_date,
-                DailyPrice.source == source,
+        stat = stats.get(ticker.id)
+        if stat is not None and stat.covers(needed):
+            result = stat.best_recent_drawdown(window_list)
+        else:
+            result = _scan_best_drawdown(
+                session, ticker.id, source, asof_date, window_list, lookback
             )
-            .order_by(DailyPrice.date.desc())
-            .limit(lookback)
-        ).all()
-
-        prices = [(row.date, to_float(row.close)) for row in rows]
-        prices.reverse()
-        result = compute_best_recent_drawdown(prices, asof_date, window_list)
         if not result:
             continue
 
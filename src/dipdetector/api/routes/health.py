@@ -1,10 +1,11 @@
-"""Health check route."""
+"""Health check routes."""
 
 from __future__ import annotations
 
 from fastapi import APIRouter
 
-from dipdetector.api.schemas import HealthResponse
+from dipdetector.api.schemas import HealthResponse, ProviderHealthResponse, RetryMetricsOut
+from dipdetector.providers.retry import get_retry_metrics
 
 router = APIRouter(tags=["health"])
 
@@ -12,3 +13,13 @@ router = APIRouter(tags=["health"])
 @router.get("/health", response_model=HealthResponse)
 def health() -> HealthResponse:
     return HealthResponse(status="ok")
+
+
+@router.get("/health/provider", response_model=ProviderHealthResponse)
+def provider_health() -> ProviderHealthResponse:
+    metrics = get_retry_metrics()
+    degraded = any(item["circuit_state"] == "open" for item in metrics.values())
+    return ProviderHealthResponse(
+        status="degraded" if degraded else "ok",
+        retry={name: RetryMetricsOut(**item) for name, item in metrics.items()},
+    )
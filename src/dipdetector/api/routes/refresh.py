@@ -1,4 +1,4 @@
-"""API endpoint to refresh data by running ingest + analyze."""
+"""API endpoint to refresh data by running ingest + incremental analyze."""
 
 from __future__ import annotations
 
@@ -7,7 +7,7 @@ import threading
 
 from fastapi import APIRouter, HTTPException, Query, status
 
-from dipdetector.analyze.run import analyze
+from dipdetector.analyze.run import analyze_incremental
 from dipdetector.ingest.ingest_prices import ingest_prices
 
 router = APIRouter()
@@ -25,7 +25,7 @@ def refresh(days: int = Query(30, ge=1, le=3650)) -> dict[str, str | int]:
     try:
         ingest_prices(days=days)
         asof_date = date.today()
-        analyze(asof_date)
+        analyze_incremental(asof_date)
         return {"status": "ok", "days": days, "asof": asof_date.isoformat()}
     finally:
         _refresh_lock.release()
@@ -14,6 +14,24 @@ class HealthResponse(BaseModel):
     status: str
 
 
+class RetryMetricsOut(BaseModel):
+    calls: int
+    attempts: int
+    retries: int
+    successes: int
+    failures: int
+    non_retryable: int
+    deadline_exceeded: int
+    circuit_rejections: int
+    circuit_opened: int
+    circuit_state: str
+
+
+class ProviderHealthResponse(BaseModel):
+    status: str
+    retry: dict[str, RetryMetricsOut]
+
+
 class AlertOut(BaseModel):
     symbol: str
     date: date
@@ -2,8 +2,9 @@
 
 from __future__ import annotations
 
+import json
 import os
-from typing import Iterable
+from typing import Any, Iterable
 
 from dipdetector.tickers import DEFAULT_TICKERS
 
@@ -48,6 +49,81 @@ def get_massive_news_limit() -> int:
     return _get_int("MASSIVE_NEWS_LIMIT", 10)
 
 
+def get_massive_max_concurrency() -> int:
+    return _get_int("MASSIVE_MAX_CONCURRENCY", 16)
+
+
+def get_massive_cache_mode() -> str:
+    value = os.getenv("MASSIVE_CACHE_MODE", "off").strip().lower() or "off"
+    if value not in {"off", "readwrite", "record", "replay"}:
+        raise ValueError(
+            f"MASSIVE_CACHE_MODE must be one of off, readwrite, record, replay, got: {value!r}"
+        )
+    return value
+
+
+def get_massive_cache_dir() -> str:
+    return os.getenv("MASSIVE_CACHE_DIR", ".cache/massive").strip()
+
+
+def get_massive_cache_ttl_sec() -> int:
+    return _get_int("MASSIVE_CACHE_TTL_SEC", 60)
+
+
+def get_massive_rate_limit_per_min() -> float:
+    return _get_float("MASSIVE_RATE_LIMIT_PER_MIN", 0.0)
+
+
+def get_massive_rate_limit_burst() -> float | None:
+    value = _get_float("MASSIVE_RATE_LIMIT_BURST", 0.0)
+    return value or None
+
+
+def get_massive_rate_limit_endpoints() -> dict[str, float]:
+    raw = os.getenv("MASSIVE_RATE_LIMIT_ENDPOINTS", "").strip()
+    limits: dict[str, float] = {}
+    for part in raw.split(","):
+        if not part.strip():
+            continue
+        name, _, value = part.partition("=")
+        try:
+            limits[name.strip()] = float(value)
+        except ValueError as exc:
+            raise ValueError(
+                f"MASSIVE_RATE_LIMIT_ENDPOINTS entries must be name=per_minute, got: {part!r}"
+            ) from exc
+    return limits
+
+
+def get_massive_rate_limit_reserve() -> float:
+    return _get_float("MASSIVE_RATE_LIMIT_RESERVE", 0.2)
+
+
+def get_massive_rate_limit_state_file() -> str | None:
+    value = os.getenv("MASSIVE_RATE_LIMIT_STATE_FILE", "").strip()
+    return value or None
+
+
+def get_massive_retry_max_attempts() -> int:
+    return _get_int("MASSIVE_RETRY_MAX_ATTEMPTS", 4)
+
+
+def get_massive_retry_deadline_sec() -> float:
+    return _get_float("MASSIVE_RETRY_DEADLINE_SEC", 30.0)
+
+
+def get_massive_chart_retry_deadline_sec() -> float:
+    return _get_float("MASSIVE_CHART_RETRY_DEADLINE_SEC", 2.0)
+
+
+def get_massive_circuit_failures() -> int:
+    return _get_int("MASSIVE_CIRCUIT_FAILURES", 5)
+
+
+def get_massive_circuit_reset_sec() -> float:
+    return _get_float("MASSIVE_CIRCUIT_RESET_SEC", 30.0)
+
+
 def get_massive_ws_url() -> str:
     value = os.getenv("MASSIVE_STOCKS_WS_URL", "").strip()
     if value:
@@ -79,6 +155,50 @@ def get_ai_overview_ttl_min() -> int:
     return _get_int("AI_OVERVIEW_TTL_MIN", 360)
 
 
+def get_ingest_workers() -> int:
+    return _get_int("INGEST_WORKERS", 1)
+
+
+def get_analyze_processes() -> int:
+    value = _get_int("ANALYZE_PROCESSES", 1)
+    if value <= 0:
+        raise ValueError(f"ANALYZE_PROCESSES must be a positive integer, got: {value}")
+    return value
+
+
+def get_ingest_chunk_size() -> int:
+    value = _get_int("INGEST_CHUNK_SIZE", 5000)
+    if value <= 0:
+        raise ValueError(f"INGEST_CHUNK_SIZE must be a positive integer, got: {value}")
+    return value
+
+
+def get_ingest_run_id() -> str | None:
+    value = os.getenv("INGEST_RUN_ID", "").strip()
+    return value or None
+
+
+def get_ingest_lease_batch_size() -> int:
+    return _get_int("INGEST_LEASE_BATCH_SIZE", 20)
+
+
+def get_ingest_lease_sec() -> int:
+    return _get_int("INGEST_LEASE_SEC", 300)
+
+
+def get_ingest_lease_max_attempts() -> int:
+    return _get_int("INGEST_LEASE_MAX_ATTEMPTS", 3)
+
+
+def get_ingest_overlap_days() -> int:
+    return _get_int("INGEST_OVERLAP_DAYS", 5)
+
+
+def get_price_archive_dir() -> str | None:
+    value = os.getenv("PRICE_ARCHIVE_DIR", "").strip()
+    return value or None
+
+
 def get_log_level() -> str:
     return os.getenv("LOG_LEVEL", "INFO").strip().upper()
 
@@ -135,3 +255,39 @@ def get_dip_52w_window() -> int:
 
 def get_dip_52w_threshold() -> float:
     return _get_float("DIP_52W_THRESHOLD", -15.0)
+
+
+def get_dip_rules() -> list[Any] | None:
+    """Rule definitions from DIP_RULES (JSON) or the JSON file at DIP_RULES_FILE, if set."""
+    raw = os.getenv("DIP_RULES", "").strip()
+    path = os.getenv("DIP_RULES_FILE", "").strip()
+    if raw and path:
+        raise ValueError("Set only one of DIP_RULES and DIP_RULES_FILE")
+    if path:
+        with open(path, encoding="utf-8") as handle:
+            raw = handle.read()
+    if not raw:
+        return None
+    try:
+        rules = json.loads(raw)
+    except json.JSONDecodeError as exc:
+        raise ValueError(f"Dip rules must be valid JSON: {exc}") from exc
+    if not isinstance(rules, list):
+        raise ValueError("Dip rules must be a JSON list of rule objects")
+    return rules
+
+
+def get_rolling_stats_windows() -> list[int] | None:
+    """Windows kept in `rolling_stats` from ROLLING_STATS_WINDOWS (comma-separated), if set."""
+    raw = os.getenv("ROLLING_STATS_WINDOWS", "").strip()
+    if not raw:
+        return None
+    try:
+        windows = sorted({int(part) for part in raw.split(",") if part.strip()})
+    except ValueError as exc:
+        raise ValueError(
+            f"ROLLING_STATS_WINDOWS must be comma-separated integers, got: {raw!r}"
+        ) from exc
+    if not windows or windows[0] <= 0:
+        raise ValueError(f"ROLLING_STATS_WINDOWS must be positive integers, got: {raw!r}")
+    return windows
@@ -9,8 +9,10 @@ from sqlalchemy import (
     Boolean,
     Date,
     DateTime,
+    Float,
     ForeignKey,
     Index,
+    Integer,
     JSON,
     Numeric,
     String,
@@ -126,3 +128,89 @@ class AIOverview(Base):
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), nullable=False, server_default=func.now()
     )
+
+
+class IngestState(Base):
+    __tablename__ = "ingest_state"
+    __table_args__ = (
+        UniqueConstraint("ticker_id", "source", name="uq_ingest_state_ticker_source"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    ticker_id: Mapped[int] = mapped_column(ForeignKey("tickers.id"), nullable=False)
+    source: Mapped[str] = mapped_column(String(32), nullable=False)
+    run_id: Mapped[str] = mapped_column(String(64), nullable=False)
+    # Newest bar stored for this ticker/source, and the end date the last successful fetch covered.
+    last_bar_date: Mapped[date | None] = mapped_column(Date)
+    fetched_through: Mapped[date] = mapped_column(Date, nullable=False)
+    last_success_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+
+class BackfillState(Base):
+    # Start date of the widest backfill that completed for a ticker, so resumed runs skip it.
+    __tablename__ = "backfill_state"
+    __table_args__ = (
+        UniqueConstraint("ticker_id", "source", name="uq_backfill_state_ticker_source"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    ticker_id: Mapped[int] = mapped_column(ForeignKey("tickers.id"), nullable=False)
+    source: Mapped[str] = mapped_column(String(32), nullable=False)
+    backfilled_from: Mapped[date] = mapped_column(Date, nullable=False)
+    completed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+
+class IngestLease(Base):
+    __tablename__ = "ingest_leases"
+    __table_args__ = (
+        UniqueConstraint("run_id", "ticker_id", "source", name="uq_ingest_leases_run_ticker_source"),
+        Index("ix_ingest_leases_run_status", "run_id", "status"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    run_id: Mapped[str] = mapped_column(String(64), nullable=False)
+    ticker_id: Mapped[int] = mapped_column(ForeignKey("tickers.id"), nullable=False)
+    source: Mapped[str] = mapped_column(String(32), nullable=False)
+    # pending -> leased -> done; an expired lease is claimable again.
+    status: Mapped[str] = mapped_column(String(16), nullable=False, server_default="pending")
+    owner: Mapped[str | None] = mapped_column(String(128))
+    lease_expires_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+
+
+class PriceChange(Base):
+    # A daily bar inserted or changed since incremental analyze last consumed it.
+    __tablename__ = "price_changes"
+    __table_args__ = (
+        UniqueConstraint("ticker_id", "source", "date", name="uq_price_changes_ticker_source_date"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    ticker_id: Mapped[int] = mapped_column(ForeignKey("tickers.id"), nullable=False)
+    source: Mapped[str] = mapped_column(String(32), nullable=False)
+    date: Mapped[datetime.date] = mapped_column(Date, nullable=False)
+    # Bumped when the same bar changes again, so analyze only clears what it saw.
+    recorded_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+
+class RollingStat(Base):
+    # Per-bar rolling state kept current by ingest, see `dipdetector.analyze.rolling_stats`.
+    __tablename__ = "rolling_stats"
+    __table_args__ = (
+        UniqueConstraint("ticker_id", "source", "date", name="uq_rolling_stats_ticker_source_date"),
+        Index("ix_rolling_stats_date", "date"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    ticker_id: Mapped[int] = mapped_column(ForeignKey("tickers.id"), nullable=False)
+    source: Mapped[str] = mapped_column(String(32), nullable=False)
+    date: Mapped[datetime.date] = mapped_column(Date, nullable=False)
+    close: Mapped[float] = mapped_column(Numeric(12, 4), nullable=False)
+    prev_date: Mapped[date | None] = mapped_column(Date)
+    prev_close: Mapped[float | None] = mapped_column(Numeric(12, 4))
+    change_1d: Mapped[float | None] = mapped_column(Float)
+    # {"<window>": [max_close, "YYYY-MM-DD"]}, or null while the ticker has fewer bars.
+    maxima: Mapped[dict] = mapped_column(JSON, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
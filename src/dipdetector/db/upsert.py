@@ -0,0 +1,41 @@
+"""Dialect-aware INSERT ... ON CONFLICT helpers."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator, Sequence
+from itertools import islice
+from typing import Any, TypeVar
+
+from sqlalchemy.orm import Session
+
+T = TypeVar("T")
+
+# Keeps bound parameters per statement well under the SQLite and Postgres limits.
+UPSERT_BATCH_SIZE = 1000
+
+
+def dialect_name(session: Session) -> str:
+    return session.get_bind().dialect.name
+
+
+def insert_for(session: Session, table: Any) -> Any:
+    """Return an `insert()` construct supporting `on_conflict_do_update` for the session's dialect."""
+    name = dialect_name(session)
+    if name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"ON CONFLICT upserts are not supported for dialect {name!r}")
+    return insert(table)
+
+
+def chunked(items: Iterable[T], size: int = UPSERT_BATCH_SIZE) -> Iterator[Sequence[T]]:
+    """Split `items` into batches of at most `size`; iterators are consumed lazily."""
+    if isinstance(items, Sequence):
+        for start in range(0, len(items), size):
+            yield items[start : start + size]
+        return
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
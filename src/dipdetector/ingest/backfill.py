@@ -0,0 +1,282 @@
+"""Bulk historical backfill of daily prices via Postgres COPY."""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import logging
+import time
+from collections.abc import Callable, Iterable
+from contextlib import AbstractContextManager
+from datetime import date, datetime, timedelta, timezone
+from typing import Sequence
+
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from dipdetector import config
+from dipdetector.analyze import rolling_stats
+from dipdetector.db.models import BackfillState
+from dipdetector.db.session import get_session
+from dipdetector.db.upsert import chunked, dialect_name, insert_for
+from dipdetector.ingest.ingest_prices import resolve_tickers, upsert_daily_prices
+from dipdetector.market import archive
+from dipdetector.providers.base import DailyPriceBar, PriceProvider, StreamingPriceProvider
+from dipdetector.providers.cache import get_response_cache
+from dipdetector.providers.massive_provider import MassiveProvider
+from dipdetector.providers.rate_limit import BACKGROUND, get_rate_limiter
+from dipdetector.providers.retry import build_retry_policy
+from dipdetector.utils.logging import configure_logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 50000
+
+_STAGING_TABLE = "daily_prices_staging"
+_COPY_COLUMNS = ("ticker_id", "date", "open", "high", "low", "close", "volume", "source")
+
+_CREATE_STAGING_SQL = f"""
+CREATE TEMP TABLE IF NOT EXISTS {_STAGING_TABLE} (
+    seq bigserial,
+    ticker_id integer NOT NULL,
+    date date NOT NULL,
+    open numeric(12, 4) NOT NULL,
+    high numeric(12, 4) NOT NULL,
+    low numeric(12, 4) NOT NULL,
+    close numeric(12, 4) NOT NULL,
+    volume bigint,
+    source varchar(32) NOT NULL
+) ON COMMIT DELETE ROWS
+"""
+
+# A bar repeated within a chunk keeps its last copy, like `upsert_daily_prices`;
+# ON CONFLICT DO UPDATE cannot touch the same row twice in one statement.
+# Changed rows are also logged in price_changes, like `upsert_daily_prices` does.
+_MERGE_SQL = f"""
+WITH changed AS (
+    INSERT INTO daily_prices (ticker_id, date, open, high, low, close, volume, source)
+    SELECT DISTINCT ON (ticker_id, date, source)
+        ticker_id, date, open, high, low, close, volume, source
+    FROM {_STAGING_TABLE}
+    ORDER BY ticker_id, date, source, seq DESC
+    ON CONFLICT (ticker_id, date, source) DO UPDATE SET
+        open = excluded.open,
+        high = excluded.high,
+        low = excluded.low,
+        close = excluded.close,
+        volume = excluded.volume
+    WHERE (daily_prices.open, daily_prices.high, daily_prices.low, daily_prices.close,
+           daily_prices.volume)
+        IS DISTINCT FROM (excluded.open, excluded.high, excluded.low, excluded.close,
+           excluded.volume)
+    RETURNING ticker_id, date, source
+)
+INSERT INTO price_changes (ticker_id, source, date, recorded_at)
+SELECT ticker_id, source, date, now() FROM changed
+ON CONFLICT (ticker_id, source, date) DO UPDATE SET recorded_at = excluded.recorded_at
+"""
+
+
+def bars_to_csv(ticker_id: int, source: str, bars: Sequence[DailyPriceBar]) -> io.StringIO:
+    """Render bars as CSV in `_COPY_COLUMNS` order; a missing volume becomes NULL."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    for bar in bars:
+        writer.writerow(
+            (
+                ticker_id,
+                bar.date.isoformat(),
+                bar.open,
+                bar.high,
+                bar.low,
+                bar.close,
+                "" if bar.volume is None else bar.volume,
+                source,
+            )
+        )
+    buffer.seek(0)
+    return buffer
+
+
+def _copy_merge(
+    session: Session,
+    ticker_id: int,
+    source: str,
+    bars: Iterable[DailyPriceBar],
+    chunk_size: int,
+    windows: Sequence[int],
+) -> int:
+    session.execute(text(_CREATE_STAGING_SQL))
+    dbapi_connection = session.connection().connection
+    columns = ", ".join(_COPY_COLUMNS)
+    rows = 0
+    since: date | None = None
+    for chunk in chunked(bars, chunk_size):
+        with dbapi_connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {_STAGING_TABLE} ({columns}) FROM STDIN WITH (FORMAT csv)",
+                bars_to_csv(ticker_id, source, chunk),
+            )
+        session.execute(text(_MERGE_SQL))
+        session.execute(text(f"TRUNCATE {_STAGING_TABLE}"))
+        rows += len(chunk)
+        first = min(bar.date for bar in chunk)
+        since = first if since is None else min(since, first)
+    if since is not None:
+        # One pass over the loaded history instead of one per chunk.
+        rolling_stats.refresh_rolling_stats(
+            session, ticker_id, source, since=since, windows=windows
+        )
+    return rows
+
+
+def _upsert_chunks(
+    session: Session,
+    ticker_id: int,
+    source: str,
+    bars: Iterable[DailyPriceBar],
+    chunk_size: int,
+    windows: Sequence[int],
+) -> int:
+    rows = 0
+    for chunk in chunked(bars, chunk_size):
+        upsert_daily_prices(session, ticker_id, source, chunk, windows)
+        rows += len(chunk)
+    return rows
+
+
+def _backfilled_from(
+    session: Session, ticker_ids: Sequence[int], source: str
+) -> dict[int, date]:
+    if not ticker_ids:
+        return {}
+    rows = session.execute(
+        select(BackfillState.ticker_id, BackfillState.backfilled_from).where(
+            BackfillState.ticker_id.in_(ticker_ids), BackfillState.source == source
+        )
+    ).all()
+    return {ticker_id: backfilled_from for ticker_id, backfilled_from in rows}
+
+
+def _record_backfill(session: Session, ticker_id: int, source: str, start_date: date) -> None:
+    stmt = insert_for(session, BackfillState).values(
+        ticker_id=ticker_id,
+        source=source,
+        backfilled_from=start_date,
+        completed_at=datetime.now(timezone.utc),
+    )
+    # Only a wider backfill than the recorded one runs, so overwriting never narrows it.
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["ticker_id", "source"],
+        set_={
+            "backfilled_from": stmt.excluded.backfilled_from,
+            "completed_at": stmt.excluded.completed_at,
+        },
+    )
+    session.execute(stmt)
+
+
+def backfill_prices(
+    days: int,
+    provider: PriceProvider | None = None,
+    session_factory: Callable[[], AbstractContextManager[Session]] = get_session,
+    tickers: Sequence[str] | None = None,
+    resume: bool = True,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> None:
+    """Load `days` of history per ticker, one transaction per ticker.
+
+    On Postgres bars are COPYed into a temp staging table and merged into
+    `daily_prices` with one statement per chunk. Other dialects fall back to
+    `upsert_daily_prices`. A `StreamingPriceProvider` is consumed lazily, so at
+    most `chunk_size` bars are held in memory. Each ticker's load records
+    its start date in `backfill_state` in the same transaction; with `resume`
+    set, tickers already backfilled from that date or earlier are skipped, so an
+    interrupted run can be restarted and only redoes the ticker that was in
+    flight, even for tickers whose history starts after the start date. When
+    ``PRICE_ARCHIVE_DIR`` is set, the backfilled tickers' archive files are
+    rewritten afterwards.
+    """
+    if days <= 0:
+        raise ValueError("days must be a positive integer")
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be a positive integer")
+
+    source = config.get_price_source()
+    provider = provider or MassiveProvider(
+        config.get_massive_api_key(),
+        config.get_massive_rest_base_url(),
+        cache=get_response_cache(),
+        limiter=get_rate_limiter(),
+        priority=BACKGROUND,
+        retry_policy=build_retry_policy("backfill"),
+    )
+    tickers_list = list(dict.fromkeys(tickers if tickers is not None else config.get_tickers()))
+    end_date = date.today()
+    start_date = end_date - timedelta(days=days)
+    run_started = time.perf_counter()
+
+    with session_factory() as session:
+        ticker_ids = resolve_tickers(session, tickers_list)
+        done = _backfilled_from(session, list(ticker_ids.values()), source) if resume else {}
+    windows = rolling_stats.tracked_windows()
+
+    loaded: list[str] = []
+    for symbol, ticker_id in ticker_ids.items():
+        backfilled_from = done.get(ticker_id)
+        if backfilled_from is not None and backfilled_from <= start_date:
+            logger.info("Ticker %s: already backfilled from %s, skipping", symbol, backfilled_from)
+            continue
+
+        started = time.perf_counter()
+        if isinstance(provider, StreamingPriceProvider):
+            bars: Iterable[DailyPriceBar] = provider.iter_daily_prices(symbol, start_date, end_date)
+        else:
+            bars = provider.fetch_daily_prices(symbol, start_date, end_date)
+        with session_factory() as session:
+            load = _copy_merge if dialect_name(session) == "postgresql" else _upsert_chunks
+            rows = load(session, ticker_id, source, bars, chunk_size, windows)
+            _record_backfill(session, ticker_id, source, start_date)
+        loaded.append(symbol)
+        logger.info(
+            "Ticker %s: backfilled %d rows in %.2fs",
+            symbol,
+            rows,
+            time.perf_counter() - started,
+        )
+
+    logger.info(
+        "Backfilled %d of %d tickers in %.2fs",
+        len(loaded),
+        len(ticker_ids),
+        time.perf_counter() - run_started,
+    )
+
+    archive_dir = config.get_price_archive_dir()
+    if archive_dir and loaded:
+        archive.sync_archive(archive_dir, source, session_factory, loaded)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Backfill multi-year daily price history.")
+    parser.add_argument("--days", type=int, default=3650, help="Number of days of history")
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help="Rows copied and merged per statement",
+    )
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="Reload tickers even if their history already reaches the start date",
+    )
+    args = parser.parse_args()
+
+    configure_logging(config.get_log_level())
+    backfill_prices(days=args.days, resume=not args.no_resume, chunk_size=args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,24 +3,55 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
+import inspect
 import logging
+import time
+import uuid
 from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from contextlib import AbstractContextManager
-from datetime import date, timedelta
-from typing import Sequence
+from dataclasses import dataclass
+from datetime import date, datetime, time as time_of_day, timedelta, timezone
+from typing import NamedTuple, Sequence
+from zoneinfo import ZoneInfo
 
-from sqlalchemy import func, select
+from sqlalchemy import func, literal_column, or_, select
 from sqlalchemy.orm import Session
 
 from dipdetector import config
-from dipdetector.db.models import DailyPrice, Ticker
+from dipdetector.analyze import rolling_stats
+from dipdetector.db.models import DailyPrice, IngestState, PriceChange, Ticker
 from dipdetector.db.session import get_session
-from dipdetector.providers.base import DailyPriceBar, PriceProvider
+from dipdetector.db.upsert import chunked, dialect_name, insert_for
+from dipdetector.market import archive
+from dipdetector.market.bars import BarSeries
+from dipdetector.providers.base import (
+    AsyncPriceProvider,
+    BarSeriesProvider,
+    DailyPriceBar,
+    GroupedDailyProvider,
+    PriceProvider,
+    StreamingPriceProvider,
+)
+from dipdetector.providers.cache import get_response_cache
+from dipdetector.providers.massive_async import AsyncMassiveProvider
 from dipdetector.providers.massive_provider import MassiveProvider
+from dipdetector.providers.rate_limit import BACKGROUND, get_rate_limiter
+from dipdetector.providers.retry import build_retry_policy
 from dipdetector.utils.logging import configure_logging
 
 logger = logging.getLogger(__name__)
 
+_PRICE_COLUMNS = ("open", "high", "low", "close", "volume")
+
+# Ingest accepts bars either as `DailyPriceBar` objects or as one columnar series.
+Bars = Sequence[DailyPriceBar] | BarSeries
+
+# Daily bars are treated as final once extended-hours trading has closed.
+_DAILY_BAR_FINAL_TIME = time_of_day(20, 0)
+_EASTERN = ZoneInfo("America/New_York")
+
 
 def ensure_ticker(session: Session, symbol: str) -> Ticker:
     ticker = session.execute(select(Ticker).where(Ticker.symbol == symbol)).scalar_one_or_none()
@@ -32,103 +63,602 @@ def ensure_ticker(session: Session, symbol: str) -> Ticker:
     return ticker
 
 
-def get_start_date(
-    session: Session, ticker_id: int, source: str, end_date: date, days: int
-) -> date:
-    max_date = session.execute(
-        select(func.max(DailyPrice.date)).where(
-            DailyPrice.ticker_id == ticker_id, DailyPrice.source == source
+def resolve_tickers(session: Session, symbols: Sequence[str]) -> dict[str, int]:
+    """Map symbols to ticker ids, bulk-creating any missing `Ticker` rows."""
+    ids: dict[str, int] = {}
+    for chunk in chunked(list(symbols)):
+        rows = session.execute(
+            select(Ticker.symbol, Ticker.id).where(Ticker.symbol.in_(chunk))
+        ).all()
+        ids.update({symbol: ticker_id for symbol, ticker_id in rows})
+
+    missing = [symbol for symbol in symbols if symbol not in ids]
+    for chunk in chunked(missing):
+        stmt = insert_for(session, Ticker).values(
+            [{"symbol": symbol, "active": True} for symbol in chunk]
         )
-    ).scalar_one()
+        session.execute(stmt.on_conflict_do_nothing(index_elements=["symbol"]))
+        rows = session.execute(
+            select(Ticker.symbol, Ticker.id).where(Ticker.symbol.in_(chunk))
+        ).all()
+        ids.update({symbol: ticker_id for symbol, ticker_id in rows})
+    return ids
+
+
+def get_latest_dates(session: Session, ticker_ids: Sequence[int], source: str) -> dict[int, date]:
+    """Return the newest stored bar date per ticker in one grouped query."""
+    latest: dict[int, date] = {}
+    for chunk in chunked(list(ticker_ids)):
+        rows = session.execute(
+            select(DailyPrice.ticker_id, func.max(DailyPrice.date))
+            .where(DailyPrice.ticker_id.in_(chunk), DailyPrice.source == source)
+            .group_by(DailyPrice.ticker_id)
+        ).all()
+        latest.update({ticker_id: max_date for ticker_id, max_date in rows})
+    return latest
+
+
+def compute_start_date(
+    max_date: date | None, end_date: date, days: int, overlap_days: int = 5
+) -> date:
     if max_date:
-        start_date = max_date - timedelta(days=5)
+        start_date = max_date - timedelta(days=overlap_days)
     else:
         start_date = end_date - timedelta(days=days)
     return min(start_date, end_date)
 
 
+class UpsertCounts(NamedTuple):
+    inserted: int
+    updated: int
+    unchanged: int
+
+
 def upsert_daily_prices(
-    session: Session, ticker_id: int, source: str, bars: Sequence[DailyPriceBar]
-) -> tuple[int, int]:
+    session: Session,
+    ticker_id: int,
+    source: str,
+    bars: Bars,
+    windows: Sequence[int] | None = None,
+) -> UpsertCounts:
+    """Insert or update `bars` in batches of INSERT ... ON CONFLICT statements.
+
+    Existing rows are only rewritten when an OHLCV value differs from the
+    stored one; the comparison happens in the database, so re-fetched overlap
+    days cost no dead tuples or WAL. Returns inserted, updated and unchanged
+    counts.
+
+    The dates of inserted and updated rows are logged with
+    `record_price_changes` so incremental analysis can pick them up, and the
+    ticker's `rolling_stats` are refreshed from the earliest of them for
+    `windows` (default `rolling_stats.tracked_windows()`; callers writing many
+    tickers resolve them once and pass them in).
+    """
     if not bars:
-        return 0, 0
-
-    dates = [bar.date for bar in bars]
-    existing = session.execute(
-        select(DailyPrice).where(
-            DailyPrice.ticker_id == ticker_id,
-            DailyPrice.source == source,
-            DailyPrice.date.in_(dates),
-        )
-    ).scalars()
-    existing_by_date = {row.date: row for row in existing}
+        return UpsertCounts(0, 0, 0)
+
+    values = (
+        bars.rows()
+        if isinstance(bars, BarSeries)
+        else ((bar.date, bar.open, bar.high, bar.low, bar.close, bar.volume) for bar in bars)
+    )
+    rows_by_date = {
+        day: {
+            "ticker_id": ticker_id,
+            "date": day,
+            "open": open_,
+            "high": high,
+            "low": low,
+            "close": close,
+            "volume": volume,
+            "source": source,
+        }
+        for day, open_, high, low, close, volume in values
+    }
+    rows = list(rows_by_date.values())
+    is_postgres = dialect_name(session) == "postgresql"
 
     inserted = 0
-    updated = 0
-    for bar in bars:
-        row = existing_by_date.get(bar.date)
-        if row:
-            row.open = bar.open
-            row.high = bar.high
-            row.low = bar.low
-            row.close = bar.close
-            row.volume = bar.volume
-            updated += 1
+    changed: list[date] = []
+    for chunk in chunked(rows):
+        stmt = insert_for(session, DailyPrice).values(list(chunk))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["ticker_id", "date", "source"],
+            set_={column: stmt.excluded[column] for column in _PRICE_COLUMNS},
+            where=or_(
+                *(
+                    DailyPrice.__table__.c[column].is_distinct_from(stmt.excluded[column])
+                    for column in _PRICE_COLUMNS
+                )
+            ),
+        )
+        # RETURNING yields inserted and updated rows only; skipped conflicts are absent.
+        if is_postgres:
+            # xmax is 0 only for tuples created by this statement, not for updated ones.
+            returned = session.execute(
+                stmt.returning(DailyPrice.date, literal_column("xmax = 0"))
+            ).all()
+            inserted += sum(1 for _, is_insert in returned if is_insert)
+            changed.extend(day for day, _ in returned)
         else:
-            session.add(
-                DailyPrice(
-                    ticker_id=ticker_id,
-                    date=bar.date,
-                    open=bar.open,
-                    high=bar.high,
-                    low=bar.low,
-                    close=bar.close,
-                    volume=bar.volume,
-                    source=source,
+            existing = session.execute(
+                select(func.count()).where(
+                    DailyPrice.ticker_id == ticker_id,
+                    DailyPrice.source == source,
+                    DailyPrice.date.in_([row["date"] for row in chunk]),
                 )
+            ).scalar_one()
+            changed.extend(session.execute(stmt.returning(DailyPrice.date)).scalars())
+            inserted += len(chunk) - existing
+
+    record_price_changes(session, ticker_id, source, changed)
+    if changed:
+        rolling_stats.refresh_rolling_stats(
+            session, ticker_id, source, since=min(changed), windows=windows
+        )
+    return UpsertCounts(inserted, len(changed) - inserted, len(rows) - len(changed))
+
+
+def record_price_changes(
+    session: Session, ticker_id: int, source: str, dates: Sequence[date]
+) -> None:
+    """Log changed bars for incremental analysis (`analyze --incremental`).
+
+    A bar that changes again before analysis consumes it gets a new
+    `recorded_at`, so the pending entry is not lost to a concurrent run.
+    """
+    recorded_at = datetime.now(timezone.utc)
+    for chunk in chunked(dates):
+        stmt = insert_for(session, PriceChange).values(
+            [
+                {"ticker_id": ticker_id, "source": source, "date": day, "recorded_at": recorded_at}
+                for day in chunk
+            ]
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["ticker_id", "source", "date"],
+            set_={"recorded_at": stmt.excluded.recorded_at},
+        )
+        session.execute(stmt)
+
+
+@dataclass(frozen=True)
+class TickerPlan:
+    symbol: str
+    ticker_id: int
+    start_date: date
+
+
+def get_ingest_states(
+    session: Session, ticker_ids: Sequence[int], source: str
+) -> dict[int, IngestState]:
+    states: dict[int, IngestState] = {}
+    for chunk in chunked(list(ticker_ids)):
+        rows = session.execute(
+            select(IngestState).where(
+                IngestState.ticker_id.in_(chunk), IngestState.source == source
+            )
+        ).scalars()
+        states.update({state.ticker_id: state for state in rows})
+    return states
+
+
+def _is_up_to_date(state: IngestState, end_date: date) -> bool:
+    if state.fetched_through < end_date:
+        return False
+    last_success_at = state.last_success_at
+    if last_success_at.tzinfo is None:
+        last_success_at = last_success_at.replace(tzinfo=timezone.utc)
+    final_at = datetime.combine(end_date, _DAILY_BAR_FINAL_TIME, tzinfo=_EASTERN)
+    return last_success_at >= final_at
+
+
+def plan_ingest(
+    session: Session,
+    symbols: Sequence[str],
+    source: str,
+    end_date: date,
+    days: int,
+    run_id: str | None = None,
+    force: bool = False,
+) -> list[TickerPlan]:
+    """Resolve every ticker and its start date up front with a fixed number of queries.
+
+    Start dates come from the persisted ingest watermark, falling back to the
+    newest stored bar. Unless `force` is set, tickers are left out of the plan
+    when they already completed under `run_id`, or when their last successful
+    fetch covered `end_date` after that day's bars were final.
+    """
+    ticker_ids = resolve_tickers(session, symbols)
+    states = get_ingest_states(session, list(ticker_ids.values()), source)
+    missing_state = [ticker_id for ticker_id in ticker_ids.values() if ticker_id not in states]
+    latest = get_latest_dates(session, missing_state, source)
+    overlap_days = config.get_ingest_overlap_days()
+
+    plans: list[TickerPlan] = []
+    for symbol in symbols:
+        ticker_id = ticker_ids[symbol]
+        state = states.get(ticker_id)
+        if state is not None and not force:
+            if (run_id is not None and state.run_id == run_id) or _is_up_to_date(state, end_date):
+                logger.info("Ticker %s: up to date through %s, skipping", symbol, end_date)
+                continue
+        watermark = state.last_bar_date if state is not None else latest.get(ticker_id)
+        plans.append(
+            TickerPlan(
+                symbol=symbol,
+                ticker_id=ticker_id,
+                start_date=compute_start_date(watermark, end_date, days, overlap_days),
+            )
+        )
+    return plans
+
+
+def record_ingest_state(
+    session: Session,
+    ticker_id: int,
+    source: str,
+    run_id: str,
+    fetched_through: date,
+    bars: Bars,
+) -> None:
+    if isinstance(bars, BarSeries):
+        last_bar_date = bars.last_date
+    else:
+        last_bar_date = max((bar.date for bar in bars), default=None)
+    stmt = insert_for(session, IngestState).values(
+        ticker_id=ticker_id,
+        source=source,
+        run_id=run_id,
+        last_bar_date=last_bar_date,
+        fetched_through=fetched_through,
+        last_success_at=datetime.now(timezone.utc),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["ticker_id", "source"],
+        set_={
+            "run_id": stmt.excluded.run_id,
+            "last_bar_date": func.coalesce(
+                stmt.excluded.last_bar_date, IngestState.last_bar_date
+            ),
+            "fetched_through": stmt.excluded.fetched_through,
+            "last_success_at": stmt.excluded.last_success_at,
+        },
+    )
+    session.execute(stmt)
+
+
+def _fetch_timed(
+    provider: PriceProvider, plan: TickerPlan, end_date: date
+) -> tuple[Bars, float]:
+    started = time.perf_counter()
+    if isinstance(provider, BarSeriesProvider):
+        bars: Bars = provider.fetch_daily_series(plan.symbol, plan.start_date, end_date)
+    else:
+        bars = provider.fetch_daily_prices(plan.symbol, plan.start_date, end_date)
+    return bars, time.perf_counter() - started
+
+
+def _write_bars(
+    session_factory: Callable[[], AbstractContextManager[Session]],
+    plan: TickerPlan,
+    source: str,
+    run_id: str,
+    end_date: date,
+    bars: Bars,
+    fetch_seconds: float,
+    windows: Sequence[int],
+) -> None:
+    started = time.perf_counter()
+    with session_factory() as session:
+        counts = upsert_daily_prices(session, plan.ticker_id, source, bars, windows)
+        record_ingest_state(session, plan.ticker_id, source, run_id, end_date, bars)
+    logger.info(
+        "Ticker %s: fetched %d rows, inserted %d, updated %d, unchanged %d "
+        "(fetch %.2fs, write %.2fs)",
+        plan.symbol,
+        len(bars),
+        counts.inserted,
+        counts.updated,
+        counts.unchanged,
+        fetch_seconds,
+        time.perf_counter() - started,
+    )
+
+
+def _stream_bars(
+    provider: StreamingPriceProvider,
+    session_factory: Callable[[], AbstractContextManager[Session]],
+    plan: TickerPlan,
+    source: str,
+    run_id: str,
+    end_date: date,
+    chunk_size: int,
+    windows: Sequence[int],
+) -> None:
+    """Fetch and write one ticker chunk by chunk, holding at most `chunk_size` bars."""
+    started = time.perf_counter()
+    fetched = 0
+    totals = UpsertCounts(0, 0, 0)
+    last_chunk: Sequence[DailyPriceBar] = []
+    bars = provider.iter_daily_prices(plan.symbol, plan.start_date, end_date)
+    with session_factory() as session:
+        for chunk in chunked(bars, chunk_size):
+            counts = upsert_daily_prices(session, plan.ticker_id, source, chunk, windows)
+            totals = UpsertCounts(*(total + count for total, count in zip(totals, counts)))
+            fetched += len(chunk)
+            last_chunk = chunk
+        # Bars arrive in date order, so the last chunk holds the newest bar.
+        record_ingest_state(session, plan.ticker_id, source, run_id, end_date, last_chunk)
+    logger.info(
+        "Ticker %s: streamed %d rows, inserted %d, updated %d, unchanged %d (%.2fs)",
+        plan.symbol,
+        fetched,
+        totals.inserted,
+        totals.updated,
+        totals.unchanged,
+        time.perf_counter() - started,
+    )
+
+
+def _weekdays(start: date, end: date) -> list[date]:
+    days: list[date] = []
+    current = start
+    while current <= end:
+        if current.weekday() < 5:
+            days.append(current)
+        current += timedelta(days=1)
+    return days
+
+
+def _fetch_grouped(
+    provider: GroupedDailyProvider,
+    plans: Sequence[TickerPlan],
+    end_date: date,
+    workers: int,
+) -> dict[str, tuple[list[DailyPriceBar], float]]:
+    """Collect bars for every plan from one grouped-daily snapshot per trading day.
+
+    Each snapshot is cut down to the planned symbols as soon as it arrives, so
+    memory grows with the universe rather than with the whole market.
+    """
+    started = time.perf_counter()
+    trading_days = _weekdays(min(plan.start_date for plan in plans), end_date)
+    start_by_symbol = {plan.symbol: plan.start_date for plan in plans}
+
+    def fetch(day: date) -> dict[str, DailyPriceBar]:
+        snapshot = provider.fetch_grouped_daily(day)
+        return {
+            symbol: snapshot[symbol]
+            for symbol, start in start_by_symbol.items()
+            if day >= start and symbol in snapshot
+        }
+
+    if workers == 1:
+        snapshots = [fetch(day) for day in trading_days]
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingest") as executor:
+            snapshots = list(executor.map(fetch, trading_days))
+
+    bars_by_symbol: dict[str, list[DailyPriceBar]] = {plan.symbol: [] for plan in plans}
+    for snapshot in snapshots:
+        for symbol, bar in snapshot.items():
+            bars_by_symbol[symbol].append(bar)
+
+    elapsed = time.perf_counter() - started
+    logger.info(
+        "Fetched %d grouped-daily snapshots in %.2fs",
+        len(trading_days),
+        elapsed,
+    )
+    return {symbol: (bars, elapsed) for symbol, bars in bars_by_symbol.items()}
+
+
+async def _ingest_async(
+    provider: AsyncPriceProvider,
+    plans: Sequence[TickerPlan],
+    end_date: date,
+    session_factory: Callable[[], AbstractContextManager[Session]],
+    source: str,
+    run_id: str,
+    windows: Sequence[int],
+    close_provider: bool,
+) -> None:
+    async def fetch(plan: TickerPlan) -> tuple[TickerPlan, Bars, float]:
+        started = time.perf_counter()
+        if isinstance(provider, BarSeriesProvider):
+            bars: Bars = await provider.fetch_daily_series(plan.symbol, plan.start_date, end_date)
+        else:
+            bars = await provider.fetch_daily_prices(plan.symbol, plan.start_date, end_date)
+        return plan, bars, time.perf_counter() - started
+
+    tasks = [asyncio.ensure_future(fetch(plan)) for plan in plans]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            plan, bars, fetch_seconds = await next_done
+            _write_bars(
+                session_factory, plan, source, run_id, end_date, bars, fetch_seconds, windows
             )
-            inserted += 1
-    return inserted, updated
+    finally:
+        for task in tasks:
+            task.cancel()
+        if close_provider and isinstance(provider, AsyncMassiveProvider):
+            await provider.aclose()
 
 
 def ingest_prices(
     days: int,
-    provider: PriceProvider | None = None,
+    provider: PriceProvider | AsyncPriceProvider | None = None,
     session_factory: Callable[[], AbstractContextManager[Session]] = get_session,
     tickers: Sequence[str] | None = None,
+    workers: int = 1,
+    grouped: bool = False,
+    use_async: bool = False,
+    run_id: str | None = None,
+    force: bool = False,
 ) -> None:
+    """Fetch and store daily bars for each ticker.
+
+    With ``workers > 1`` provider fetches run concurrently on a thread pool and
+    share ``provider``, which must therefore be thread-safe. Database writes
+    always happen on the calling thread, one session per ticker. With one
+    worker and a `StreamingPriceProvider`, bars are written as they arrive in
+    chunks of ``INGEST_CHUNK_SIZE``, so memory does not grow with the range.
+
+    With ``grouped=True`` bars come from one whole-market grouped-daily request
+    per trading day instead of one request per ticker, so the request count
+    depends on the date range rather than the size of the universe.
+
+    An `AsyncPriceProvider` (or ``use_async=True``, which builds an
+    `AsyncMassiveProvider` allowing ``workers`` requests in flight) fetches every
+    ticker on one event loop instead of a thread pool. A provider built here is
+    closed when the run ends.
+
+    Each ticker's bars and its ingest watermark commit together. Passing the
+    `run_id` of an interrupted run resumes it, skipping tickers that run already
+    finished; see `plan_ingest` for the other skip rules. When
+    ``PRICE_ARCHIVE_DIR`` is set, the ingested tickers' archive files are
+    brought up to date afterwards.
+    """
     if days <= 0:
         raise ValueError("days must be a positive integer")
+    if workers <= 0:
+        raise ValueError("workers must be a positive integer")
 
     source = config.get_price_source()
+    owns_provider = provider is None
+    if provider is None and use_async:
+        provider = AsyncMassiveProvider(
+            config.get_massive_api_key(),
+            config.get_massive_rest_base_url(),
+            max_concurrency=workers,
+            cache=get_response_cache(),
+            limiter=get_rate_limiter(),
+            priority=BACKGROUND,
+            retry_policy=build_retry_policy("ingest"),
+        )
     provider = provider or MassiveProvider(
-        config.get_massive_api_key(), config.get_massive_rest_base_url()
+        config.get_massive_api_key(),
+        config.get_massive_rest_base_url(),
+        pool_size=workers,
+        cache=get_response_cache(),
+        limiter=get_rate_limiter(),
+        priority=BACKGROUND,
+        retry_policy=build_retry_policy("ingest"),
     )
-    tickers_list = list(tickers) if tickers is not None else config.get_tickers()
+    if grouped and not isinstance(provider, GroupedDailyProvider):
+        raise ValueError("provider does not support grouped daily fetches")
+    tickers_list = list(dict.fromkeys(tickers if tickers is not None else config.get_tickers()))
     end_date = date.today()
+    run_id = run_id or uuid.uuid4().hex
+    run_started = time.perf_counter()
+    logger.info("Ingest run %s through %s", run_id, end_date)
+
+    with session_factory() as session:
+        plans = plan_ingest(session, tickers_list, source, end_date, days, run_id, force)
+    windows = rolling_stats.tracked_windows()
 
-    for symbol in tickers_list:
-        with session_factory() as session:
-            ticker = ensure_ticker(session, symbol)
-            start_date = get_start_date(session, ticker.id, source, end_date, days)
-            bars = provider.fetch_daily_prices(symbol, start_date, end_date)
-            inserted, updated = upsert_daily_prices(session, ticker.id, source, bars)
-            logger.info(
-                "Ticker %s: fetched %d rows, inserted %d, updated %d",
-                symbol,
-                len(bars),
-                inserted,
-                updated,
+    if inspect.iscoroutinefunction(provider.fetch_daily_prices):
+        asyncio.run(
+            _ingest_async(
+                provider, plans, end_date, session_factory, source, run_id, windows, owns_provider
+            )
+        )
+    elif grouped:
+        if plans:
+            fetched = _fetch_grouped(provider, plans, end_date, workers)
+            for plan in plans:
+                bars, fetch_seconds = fetched[plan.symbol]
+                _write_bars(
+                    session_factory, plan, source, run_id, end_date, bars, fetch_seconds, windows
+                )
+    elif workers == 1 and isinstance(provider, StreamingPriceProvider):
+        chunk_size = config.get_ingest_chunk_size()
+        for plan in plans:
+            _stream_bars(
+                provider, session_factory, plan, source, run_id, end_date, chunk_size, windows
             )
+    elif workers == 1:
+        for plan in plans:
+            bars, fetch_seconds = _fetch_timed(provider, plan, end_date)
+            _write_bars(
+                session_factory, plan, source, run_id, end_date, bars, fetch_seconds, windows
+            )
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingest") as executor:
+            futures: dict[Future[tuple[Bars, float]], TickerPlan] = {
+                executor.submit(_fetch_timed, provider, plan, end_date): plan for plan in plans
+            }
+            try:
+                for future in as_completed(futures):
+                    bars, fetch_seconds = future.result()
+                    _write_bars(
+                        session_factory,
+                        futures[future],
+                        source,
+                        run_id,
+                        end_date,
+                        bars,
+                        fetch_seconds,
+                        windows,
+                    )
+            except BaseException:
+                for pending in futures:
+                    pending.cancel()
+                raise
+
+    logger.info(
+        "Ingested %d tickers in %.2fs with %d worker(s)",
+        len(plans),
+        time.perf_counter() - run_started,
+        workers,
+    )
+
+    archive_dir = config.get_price_archive_dir()
+    if archive_dir and plans:
+        archive.sync_archive(archive_dir, source, session_factory, [plan.symbol for plan in plans])
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Ingest daily price bars.")
     parser.add_argument("--days", type=int, default=30, help="Number of days to backfill")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=config.get_ingest_workers(),
+        help="Number of concurrent provider fetches",
+    )
+    parser.add_argument(
+        "--grouped",
+        action="store_true",
+        help="Fetch one whole-market grouped-daily snapshot per trading day",
+    )
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="Fetch on one event loop with up to --workers requests in flight",
+    )
+    parser.add_argument(
+        "--run-id",
+        help="Resume a previous run, skipping tickers it already completed",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Fetch every ticker even if its watermark says it is up to date",
+    )
     args = parser.parse_args()
 
     configure_logging(config.get_log_level())
-    ingest_prices(days=args.days)
+    ingest_prices(
+        days=args.days,
+        workers=args.workers,
+        grouped=args.grouped,
+        use_async=args.use_async,
+        run_id=args.run_id,
+        force=args.force,
+    )
 
 
 if __name__ == "__main__":
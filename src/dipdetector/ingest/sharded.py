@@ -0,0 +1,431 @@
+"""Sharded ingest: worker processes split one run's tickers through leases."""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from collections.abc import Callable, Iterator
+from contextlib import AbstractContextManager, contextmanager
+from datetime import date, datetime, timedelta, timezone
+from typing import Sequence
+
+from sqlalchemy import case, or_, select, update
+from sqlalchemy.orm import Session
+
+from dipdetector import config
+from dipdetector.analyze import rolling_stats
+from dipdetector.db.models import IngestLease
+from dipdetector.db.session import get_session
+from dipdetector.db.upsert import chunked, insert_for
+from dipdetector.ingest.ingest_prices import (
+    plan_ingest,
+    record_ingest_state,
+    resolve_tickers,
+    upsert_daily_prices,
+)
+from dipdetector.market import archive
+from dipdetector.providers.base import PriceProvider
+from dipdetector.providers.cache import get_response_cache
+from dipdetector.providers.massive_provider import MassiveProvider
+from dipdetector.providers.rate_limit import BACKGROUND, get_rate_limiter
+from dipdetector.providers.retry import build_retry_policy
+from dipdetector.utils.logging import configure_logging
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+
+def seed_leases(session: Session, run_id: str, source: str, ticker_ids: Sequence[int]) -> None:
+    """Create a pending lease per ticker; idempotent, so every worker may seed."""
+    for chunk in chunked(list(ticker_ids)):
+        stmt = insert_for(session, IngestLease).values(
+            [
+                {"run_id": run_id, "ticker_id": ticker_id, "source": source, "status": PENDING}
+                for ticker_id in chunk
+            ]
+        )
+        session.execute(
+            stmt.on_conflict_do_nothing(index_elements=["run_id", "ticker_id", "source"])
+        )
+
+
+def claim_leases(
+    session: Session,
+    run_id: str,
+    source: str,
+    owner: str,
+    batch_size: int,
+    lease_seconds: float,
+    now: datetime | None = None,
+    max_attempts: int | None = None,
+) -> list[int]:
+    """Lease up to `batch_size` pending or expired tickers to `owner`.
+
+    Candidate rows are locked with ``FOR UPDATE SKIP LOCKED`` so concurrent
+    workers never claim the same row and never wait on each other. With
+    `max_attempts`, tickers already claimed that often are left alone, so one
+    that keeps killing its worker is not retried forever.
+    """
+    now = now or _utcnow()
+    filters = [
+        IngestLease.run_id == run_id,
+        IngestLease.source == source,
+        or_(
+            IngestLease.status == PENDING,
+            (IngestLease.status == LEASED) & (IngestLease.lease_expires_at < now),
+        ),
+    ]
+    if max_attempts is not None:
+        filters.append(IngestLease.attempts < max_attempts)
+    candidates = (
+        select(IngestLease.id)
+        .where(*filters)
+        .order_by(IngestLease.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    stmt = (
+        update(IngestLease)
+        .where(IngestLease.id.in_(candidates.scalar_subquery()))
+        .values(
+            status=LEASED,
+            owner=owner,
+            lease_expires_at=now + timedelta(seconds=lease_seconds),
+            attempts=IngestLease.attempts + 1,
+        )
+        .returning(IngestLease.ticker_id)
+    )
+    return list(session.execute(stmt).scalars())
+
+
+def renew_leases(
+    session: Session,
+    run_id: str,
+    source: str,
+    owner: str,
+    lease_seconds: float,
+    now: datetime | None = None,
+) -> int:
+    now = now or _utcnow()
+    result = session.execute(
+        update(IngestLease)
+        .where(
+            IngestLease.run_id == run_id,
+            IngestLease.source == source,
+            IngestLease.owner == owner,
+            IngestLease.status == LEASED,
+        )
+        .values(lease_expires_at=now + timedelta(seconds=lease_seconds))
+    )
+    return result.rowcount
+
+
+def complete_lease(
+    session: Session, run_id: str, source: str, ticker_id: int, owner: str
+) -> bool:
+    """Mark a ticker done if `owner` still holds its lease.
+
+    Run this in the same transaction as the ticker's writes: the UPDATE locks
+    the lease row, and a False result means another worker took it over, so
+    the caller must not write.
+    """
+    result = session.execute(
+        update(IngestLease)
+        .where(
+            IngestLease.run_id == run_id,
+            IngestLease.source == source,
+            IngestLease.ticker_id == ticker_id,
+            IngestLease.owner == owner,
+            IngestLease.status == LEASED,
+        )
+        .values(status=DONE, lease_expires_at=None)
+    )
+    return result.rowcount == 1
+
+
+def fail_lease(
+    session: Session,
+    run_id: str,
+    source: str,
+    ticker_id: int,
+    owner: str,
+    max_attempts: int,
+) -> str | None:
+    """Give up `owner`'s lease on a ticker whose ingest raised.
+
+    The ticker goes back to pending for another try, or to failed once it has
+    been claimed `max_attempts` times. Returns the new status, or None if
+    `owner` no longer held the lease.
+    """
+    result = session.execute(
+        update(IngestLease)
+        .where(
+            IngestLease.run_id == run_id,
+            IngestLease.source == source,
+            IngestLease.ticker_id == ticker_id,
+            IngestLease.owner == owner,
+            IngestLease.status == LEASED,
+        )
+        .values(
+            status=case((IngestLease.attempts >= max_attempts, FAILED), else_=PENDING),
+            owner=None,
+            lease_expires_at=None,
+        )
+        .returning(IngestLease.status)
+    )
+    return result.scalar_one_or_none()
+
+
+@contextmanager
+def _renewing(
+    session_factory: Callable[[], AbstractContextManager[Session]],
+    run_id: str,
+    source: str,
+    owner: str,
+    lease_seconds: float,
+) -> Iterator[None]:
+    """Renew `owner`'s leases from a background thread every third of a lease.
+
+    Renewal does not wait for a ticker to finish, so one slow fetch cannot let
+    the rest of the batch expire and be claimed by another worker.
+    """
+    stop = threading.Event()
+
+    def renew() -> None:
+        while not stop.wait(lease_seconds / 3):
+            try:
+                with session_factory() as session:
+                    renew_leases(session, run_id, source, owner, lease_seconds)
+            except Exception:
+                logger.exception("Worker %s: failed to renew leases", owner)
+
+    thread = threading.Thread(target=renew, name=f"lease-renewal-{owner}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def release_leases(session: Session, run_id: str, source: str, owner: str) -> int:
+    """Hand unfinished leases back so other workers can claim them immediately."""
+    result = session.execute(
+        update(IngestLease)
+        .where(
+            IngestLease.run_id == run_id,
+            IngestLease.source == source,
+            IngestLease.owner == owner,
+            IngestLease.status == LEASED,
+        )
+        .values(status=PENDING, owner=None, lease_expires_at=None)
+    )
+    return result.rowcount
+
+
+def run_worker(
+    days: int,
+    run_id: str,
+    provider: PriceProvider | None = None,
+    session_factory: Callable[[], AbstractContextManager[Session]] = get_session,
+    tickers: Sequence[str] | None = None,
+    batch_size: int | None = None,
+    lease_seconds: float | None = None,
+    worker_id: str | None = None,
+    force: bool = False,
+    max_attempts: int | None = None,
+) -> int:
+    """Ingest tickers of `run_id` until none are left to claim; return how many this worker wrote.
+
+    Any number of workers may run this with the same `run_id`. Each claims a
+    batch of leases and plans and ingests those tickers while a background
+    thread keeps the leases renewed. A ticker whose fetch or write raises is
+    logged and handed back, and marked failed after `max_attempts` claims; the
+    worker carries on with the rest. A worker that dies simply lets its leases
+    expire, after which another worker claims them. Lease expiry compares wall
+    clocks, so worker hosts must keep their clocks in sync. When
+    ``PRICE_ARCHIVE_DIR`` is set, the tickers this worker wrote are synced to
+    the archive before it returns.
+    """
+    if days <= 0:
+        raise ValueError("days must be a positive integer")
+    batch_size = batch_size or config.get_ingest_lease_batch_size()
+    lease_seconds = lease_seconds or config.get_ingest_lease_sec()
+    max_attempts = max_attempts or config.get_ingest_lease_max_attempts()
+    if batch_size <= 0 or lease_seconds <= 0 or max_attempts <= 0:
+        raise ValueError("lease batch size, duration and max attempts must be positive")
+
+    source = config.get_price_source()
+    provider = provider or MassiveProvider(
+        config.get_massive_api_key(),
+        config.get_massive_rest_base_url(),
+        cache=get_response_cache(),
+        limiter=get_rate_limiter(),
+        priority=BACKGROUND,
+        retry_policy=build_retry_policy("ingest"),
+    )
+    owner = worker_id or default_worker_id()
+    tickers_list = list(dict.fromkeys(tickers if tickers is not None else config.get_tickers()))
+    end_date = date.today()
+    run_started = time.perf_counter()
+    logger.info("Worker %s joining ingest run %s through %s", owner, run_id, end_date)
+
+    with session_factory() as session:
+        ticker_ids = resolve_tickers(session, tickers_list)
+        seed_leases(session, run_id, source, list(ticker_ids.values()))
+    symbols = {ticker_id: symbol for symbol, ticker_id in ticker_ids.items()}
+    windows = rolling_stats.tracked_windows()
+
+    written: list[str] = []
+    failed = 0
+    try:
+        while True:
+            with session_factory() as session:
+                claimed = claim_leases(
+                    session,
+                    run_id,
+                    source,
+                    owner,
+                    batch_size,
+                    lease_seconds,
+                    max_attempts=max_attempts,
+                )
+            if not claimed:
+                break
+            with _renewing(session_factory, run_id, source, owner, lease_seconds):
+                with session_factory() as session:
+                    plans = plan_ingest(
+                        session,
+                        [symbols[ticker_id] for ticker_id in claimed],
+                        source,
+                        end_date,
+                        days,
+                        run_id,
+                        force,
+                    )
+                planned = {plan.ticker_id for plan in plans}
+                with session_factory() as session:
+                    for ticker_id in claimed:
+                        if ticker_id not in planned:
+                            complete_lease(session, run_id, source, ticker_id, owner)
+
+                for plan in plans:
+                    started = time.perf_counter()
+                    try:
+                        bars = provider.fetch_daily_prices(plan.symbol, plan.start_date, end_date)
+                        with session_factory() as session:
+                            if not complete_lease(session, run_id, source, plan.ticker_id, owner):
+                                logger.warning(
+                                    "Ticker %s: lease lost to another worker, discarding fetch",
+                                    plan.symbol,
+                                )
+                                continue
+                            counts = upsert_daily_prices(
+                                session, plan.ticker_id, source, bars, windows
+                            )
+                            record_ingest_state(
+                                session, plan.ticker_id, source, run_id, end_date, bars
+                            )
+                    except Exception:
+                        with session_factory() as session:
+                            status = fail_lease(
+                                session, run_id, source, plan.ticker_id, owner, max_attempts
+                            )
+                        failed += 1
+                        logger.exception(
+                            "Ticker %s: ingest failed, lease now %s", plan.symbol, status or "lost"
+                        )
+                        continue
+                    written.append(plan.symbol)
+                    logger.info(
+                        "Ticker %s: fetched %d rows, inserted %d, updated %d, unchanged %d (%.2fs)",
+                        plan.symbol,
+                        len(bars),
+                        counts.inserted,
+                        counts.updated,
+                        counts.unchanged,
+                        time.perf_counter() - started,
+                    )
+    finally:
+        with session_factory() as session:
+            release_leases(session, run_id, source, owner)
+
+    logger.info(
+        "Worker %s ingested %d tickers (%d failures) in %.2fs",
+        owner,
+        len(written),
+        failed,
+        time.perf_counter() - run_started,
+    )
+
+    archive_dir = config.get_price_archive_dir()
+    if archive_dir and written:
+        archive.sync_archive(archive_dir, source, session_factory, written)
+    return len(written)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Run one sharded ingest worker; start several with the same --run-id."
+    )
+    parser.add_argument("--days", type=int, default=30, help="Number of days to ingest")
+    parser.add_argument(
+        "--run-id",
+        default=config.get_ingest_run_id(),
+        help="Run shared by all workers (default: INGEST_RUN_ID)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=config.get_ingest_lease_batch_size(),
+        help="Tickers leased per claim",
+    )
+    parser.add_argument(
+        "--lease-sec",
+        type=int,
+        default=config.get_ingest_lease_sec(),
+        help="Seconds a lease lasts before another worker may take it over",
+    )
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=config.get_ingest_lease_max_attempts(),
+        help="Claims of a failing ticker before it is marked failed",
+    )
+    parser.add_argument("--worker-id", default=None, help="Lease owner name (default: host-pid)")
+    parser.add_argument("--force", action="store_true", help="Ignore ingest watermarks")
+    args = parser.parse_args()
+    if not args.run_id:
+        parser.error("--run-id or INGEST_RUN_ID is required so workers share one run")
+
+    configure_logging(config.get_log_level())
+    run_worker(
+        days=args.days,
+        run_id=args.run_id,
+        batch_size=args.batch_size,
+        lease_seconds=args.lease_sec,
+        worker_id=args.worker_id,
+        force=args.force,
+        max_attempts=args.max_attempts,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+"""Local Arrow archive of `daily_prices` for offline analytics and fast reloads.
+
+Layout: ``<root>/<source>/<SYMBOL>/<year>.arrow``, one uncompressed Arrow IPC
+file per ticker and calendar year with the `BarSeries` columns. Files are
+memory-mapped on read, so columns are views over the page cache rather than
+parsed copies. `sync_archive` rewrites only the year files that changed since
+the last sync, going back as far as the oldest bar logged in `price_changes`
+since then or loaded before the archived range; every write is an atomic
+rename, so readers never see a partial file.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+from collections.abc import Callable, Sequence
+from contextlib import AbstractContextManager
+from datetime import date, datetime, timedelta
+from itertools import groupby
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from dipdetector import config
+from dipdetector.db.models import DailyPrice, PriceChange, Ticker
+from dipdetector.db.session import get_session
+from dipdetector.market.bars import EPOCH, MS_PER_DAY, BarSeries
+from dipdetector.utils.logging import configure_logging
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - optional "archive" extra
+    pa = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ("t", "open", "high", "low", "close", "volume")
+_SUFFIX = ".arrow"
+# Newest `price_changes.recorded_at` a ticker's last sync accounted for.
+_CHANGES_MARKER = ".changes_through"
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise RuntimeError("The price archive requires pyarrow: pip install 'dipdetector[archive]'")
+
+
+def _schema() -> pa.Schema:
+    return pa.schema([("t", pa.int64())] + [(name, pa.float64()) for name in COLUMNS[1:]])
+
+
+def _ticker_dir(root: Path, source: str, symbol: str) -> Path:
+    return root / source / symbol
+
+
+def _year_files(ticker_dir: Path) -> dict[int, Path]:
+    if not ticker_dir.is_dir():
+        return {}
+    return {
+        int(path.stem): path
+        for path in ticker_dir.iterdir()
+        if path.suffix == _SUFFIX and path.stem.isdigit()
+    }
+
+
+def _read_file(path: Path) -> BarSeries:
+    # Fixed-width columns without nulls convert to NumPy without copying, so
+    # the arrays stay backed by the mapping.
+    table = pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+    return BarSeries(
+        *(table.column(name).combine_chunks().to_numpy(zero_copy_only=True) for name in COLUMNS)
+    )
+
+
+def _read_marker(ticker_dir: Path) -> datetime | None:
+    try:
+        return datetime.fromisoformat((ticker_dir / _CHANGES_MARKER).read_text().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def _write_marker(ticker_dir: Path, value: datetime) -> None:
+    ticker_dir.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=ticker_dir, prefix=f"{_CHANGES_MARKER}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            handle.write(value.isoformat())
+        os.replace(tmp_name, ticker_dir / _CHANGES_MARKER)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+
+def _write_file(path: Path, series: BarSeries) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    columns = [pa.array(getattr(series, name)) for name in COLUMNS]
+    batch = pa.record_batch(columns, schema=_schema())
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.stem}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle, pa.ipc.new_file(handle, batch.schema) as writer:
+            writer.write_batch(batch)
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+
+def archived_through(root: str | Path, source: str, symbol: str) -> date | None:
+    """Last bar date archived for `symbol`, or None if it has no archive yet."""
+    _require_pyarrow()
+    files = _year_files(_ticker_dir(Path(root), source, symbol))
+    if not files:
+        return None
+    return _read_file(files[max(files)]).last_date
+
+
+def _archived_range(ticker_dir: Path) -> tuple[date, date] | None:
+    files = _year_files(ticker_dir)
+    if not files:
+        return None
+    first = _read_file(files[min(files)])
+    last = first if len(files) == 1 else _read_file(files[max(files)])
+    if not len(first) or not len(last):
+        return None
+    return first.first_date, last.last_date
+
+
+def _changes_since(
+    session: Session, ticker_id: int, source: str, seen_through: datetime | None
+) -> tuple[date | None, datetime | None]:
+    """Oldest changed date and newest `recorded_at` logged after `seen_through`."""
+    stmt = select(func.min(PriceChange.date), func.max(PriceChange.recorded_at)).where(
+        PriceChange.ticker_id == ticker_id, PriceChange.source == source
+    )
+    if seen_through is not None:
+        stmt = stmt.where(PriceChange.recorded_at > seen_through)
+    earliest, latest = session.execute(stmt).one()
+    return earliest, latest
+
+
+def _rewrite_from(
+    session: Session,
+    ticker_id: int,
+    source: str,
+    archived: tuple[date, date],
+    overlap_days: int,
+    earliest_change: date | None,
+) -> date:
+    """Earliest date whose year file may be stale.
+
+    That is the overlap before the archived watermark, pulled back to the
+    oldest change logged since the last sync (backfilled history, split
+    re-adjustments) and to any bars older than the archived range.
+    """
+    first_archived, last_archived = archived
+    since = last_archived - timedelta(days=overlap_days)
+    if earliest_change is not None:
+        since = min(since, earliest_change)
+    earliest_bar = session.execute(
+        select(func.min(DailyPrice.date)).where(
+            DailyPrice.ticker_id == ticker_id, DailyPrice.source == source
+        )
+    ).scalar_one()
+    if earliest_bar is not None and earliest_bar < first_archived:
+        since = min(since, earliest_bar)
+    return since
+
+
+def sync_ticker(
+    session: Session,
+    root: str | Path,
+    source: str,
+    symbol: str,
+    ticker_id: int,
+    overlap_days: int,
+    full: bool = False,
+) -> int:
+    """Rewrite the year files of `symbol` that may differ from `daily_prices`.
+
+    Re-ingested overlap days may have been corrected, so the rewrite starts
+    `overlap_days` before the archived watermark, or earlier when older bars
+    changed or were backfilled (see `_rewrite_from`); `full` rewrites every
+    year. Returns the rows written.
+    """
+    _require_pyarrow()
+    ticker_dir = _ticker_dir(Path(root), source, symbol)
+    archived = None if full else _archived_range(ticker_dir)
+    earliest_change, changes_through = _changes_since(
+        session, ticker_id, source, None if archived is None else _read_marker(ticker_dir)
+    )
+    stmt = select(
+        DailyPrice.date,
+        DailyPrice.open,
+        DailyPrice.high,
+        DailyPrice.low,
+        DailyPrice.close,
+        DailyPrice.volume,
+    ).where(DailyPrice.ticker_id == ticker_id, DailyPrice.source == source)
+    if archived is not None:
+        since = _rewrite_from(
+            session, ticker_id, source, archived, overlap_days, earliest_change
+        )
+        stmt = stmt.where(DailyPrice.date >= date(since.year, 1, 1))
+    rows = session.execute(stmt.order_by(DailyPrice.date)).all()
+
+    written = 0
+    for year, year_rows in groupby(rows, key=lambda row: row[0].year):
+        series = BarSeries.from_rows(year_rows)
+        _write_file(ticker_dir / f"{year}{_SUFFIX}", series)
+        written += len(series)
+    if changes_through is not None:
+        _write_marker(ticker_dir, changes_through)
+    return written
+
+
+def sync_archive(
+    root: str | Path,
+    source: str | None = None,
+    session_factory: Callable[[], AbstractContextManager[Session]] = get_session,
+    tickers: Sequence[str] | None = None,
+    overlap_days: int | None = None,
+    full: bool = False,
+) -> int:
+    """Bring the archive up to date with `daily_prices` for `tickers` (default: all)."""
+    _require_pyarrow()
+    source = source or config.get_price_source()
+    if overlap_days is None:
+        overlap_days = config.get_ingest_overlap_days()
+    started = time.perf_counter()
+
+    with session_factory() as session:
+        stmt = select(Ticker.symbol, Ticker.id).where(
+            Ticker.id.in_(
+                select(DailyPrice.ticker_id).where(DailyPrice.source == source).distinct()
+            )
+        )
+        if tickers is not None:
+            stmt = stmt.where(Ticker.symbol.in_(list(tickers)))
+        ticker_ids = dict(session.execute(stmt.order_by(Ticker.symbol)).all())
+
+    written = 0
+    for symbol, ticker_id in ticker_ids.items():
+        with session_factory() as session:
+            written += sync_ticker(session, root, source, symbol, ticker_id, overlap_days, full)
+
+    logger.info(
+        "Archived %d rows for %d tickers to %s in %.2fs",
+        written,
+        len(ticker_ids),
+        root,
+        time.perf_counter() - started,
+    )
+    return written
+
+
+def _to_ms(day: date) -> int:
+    return (day - EPOCH).days * MS_PER_DAY
+
+
+def read_ticker(
+    root: str | Path,
+    source: str,
+    symbol: str,
+    start: date | None = None,
+    end: date | None = None,
+) -> BarSeries:
+    """Bars of `symbol` between `start` and `end` inclusive, memory-mapped where possible."""
+    _require_pyarrow()
+    files = _year_files(_ticker_dir(Path(root), source, symbol))
+    parts = [
+        _read_file(files[year])
+        for year in sorted(files)
+        if (start is None or year >= start.year) and (end is None or year <= end.year)
+    ]
+    if not parts:
+        return BarSeries.empty()
+    series = parts[0] if len(parts) == 1 else BarSeries.concat(parts)
+    lo = 0 if start is None else int(np.searchsorted(series.t, _to_ms(start), side="left"))
+    hi = len(series) if end is None else int(np.searchsorted(series.t, _to_ms(end), side="right"))
+    return series[lo:hi]
+
+
+def load_universe(
+    root: str | Path,
+    source: str | None = None,
+    symbols: Sequence[str] | None = None,
+    start: date | None = None,
+    end: date | None = None,
+) -> dict[str, BarSeries]:
+    """Load every archived ticker (or just `symbols`) keyed by symbol."""
+    _require_pyarrow()
+    source = source or config.get_price_source()
+    source_dir = Path(root) / source
+    if symbols is None:
+        symbols = sorted(path.name for path in source_dir.iterdir()) if source_dir.is_dir() else []
+    universe: dict[str, BarSeries] = {}
+    for symbol in symbols:
+        series = read_ticker(root, source, symbol, start, end)
+        if len(series):
+            universe[symbol] = series
+    return universe
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sync the local Arrow archive of daily prices.")
+    parser.add_argument(
+        "--dir",
+        default=config.get_price_archive_dir(),
+        help="Archive root (default: PRICE_ARCHIVE_DIR)",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Rewrite every year file instead of only those changed since the last sync",
+    )
+    args = parser.parse_args()
+    if not args.dir:
+        parser.error("--dir or PRICE_ARCHIVE_DIR is required")
+
+    configure_logging(config.get_log_level())
+    sync_archive(args.dir, full=args.full)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""Columnar OHLCV bar storage."""
+
+from __future__ import annotations
+
+from array import array
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any
+
+import numpy as np
+
+from dipdetector.providers.base import DailyPriceBar
+
+MS_PER_DAY = 86_400_000
+EPOCH = date(1970, 1, 1)
+
+BarRow = tuple[date, float, float, float, float, int | None]
+
+
+@dataclass(frozen=True, eq=False)
+class BarSeries:
+    """OHLCV bars for one symbol as parallel NumPy arrays, ordered by timestamp.
+
+    `t` holds epoch milliseconds (UTC) as int64; prices and volume are float64,
+    with NaN marking a missing volume. A bar costs 48 bytes instead of a few
+    hundred for a `DailyPriceBar` or an intraday bar dict, and numeric work is
+    array arithmetic. Daily bars are keyed by the UTC calendar day of `t`.
+    Convert with `from_daily_bars` / `to_daily_bars`, `from_agg_dicts` /
+    `to_agg_dicts` and `price_points` where code still expects per-bar types.
+    """
+
+    t: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    def __post_init__(self) -> None:
+        for name in ("open", "high", "low", "close", "volume"):
+            if len(getattr(self, name)) != len(self.t):
+                raise ValueError(f"BarSeries column {name!r} does not match the length of 't'")
+
+    @classmethod
+    def from_columns(
+        cls,
+        t: Sequence[int] | np.ndarray,
+        open: Sequence[float] | np.ndarray,
+        high: Sequence[float] | np.ndarray,
+        low: Sequence[float] | np.ndarray,
+        close: Sequence[float] | np.ndarray,
+        volume: Sequence[float | None] | np.ndarray | None = None,
+    ) -> BarSeries:
+        t_values = np.asarray(t, dtype=np.int64)
+        if volume is None:
+            volume_values = np.full(len(t_values), np.nan)
+        elif isinstance(volume, np.ndarray):
+            volume_values = volume.astype(np.float64, copy=False)
+        else:
+            volume_values = np.array(
+                [np.nan if value is None else value for value in volume], dtype=np.float64
+            )
+        series = cls(
+            t=t_values,
+            open=np.asarray(open, dtype=np.float64),
+            high=np.asarray(high, dtype=np.float64),
+            low=np.asarray(low, dtype=np.float64),
+            close=np.asarray(close, dtype=np.float64),
+            volume=volume_values,
+        )
+        return series.sorted()
+
+    @classmethod
+    def empty(cls) -> BarSeries:
+        return BarSeriesBuilder().build()
+
+    @classmethod
+    def concat(cls, parts: Iterable[BarSeries]) -> BarSeries:
+        parts = [part for part in parts if len(part)]
+        if not parts:
+            return cls.empty()
+        return cls(
+            *(
+                np.concatenate([getattr(part, name) for part in parts])
+                for name in ("t", "open", "high", "low", "close", "volume")
+            )
+        ).sorted()
+
+    @classmethod
+    def from_daily_bars(cls, bars: Iterable[DailyPriceBar]) -> BarSeries:
+        builder = BarSeriesBuilder()
+        for bar in bars:
+            builder.append(
+                (bar.date - EPOCH).days * MS_PER_DAY,
+                bar.open,
+                bar.high,
+                bar.low,
+                bar.close,
+                bar.volume,
+            )
+        return builder.build()
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Sequence[Any]]) -> BarSeries:
+        """Build from ``(date, open, high, low, close, volume)`` rows such as `daily_prices`."""
+        builder = BarSeriesBuilder()
+        for day, open_, high, low, close, volume in rows:
+            builder.append((day - EPOCH).days * MS_PER_DAY, open_, high, low, close, volume)
+        return builder.build()
+
+    @classmethod
+    def from_agg_dicts(cls, bars: Iterable[dict[str, float | int]]) -> BarSeries:
+        """Build from `{"t", "o", "h", "l", "c", "v"}` dicts as served by the chart API."""
+        builder = BarSeriesBuilder()
+        for bar in bars:
+            builder.append(bar["t"], bar["o"], bar["h"], bar["l"], bar["c"], bar.get("v"))
+        return builder.build()
+
+    def __len__(self) -> int:
+        return len(self.t)
+
+    def __getitem__(self, key: slice) -> BarSeries:
+        if not isinstance(key, slice):
+            raise TypeError("BarSeries supports slicing only")
+        return BarSeries(
+            self.t[key],
+            self.open[key],
+            self.high[key],
+            self.low[key],
+            self.close[key],
+            self.volume[key],
+        )
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            column.nbytes
+            for column in (self.t, self.open, self.high, self.low, self.close, self.volume)
+        )
+
+    @property
+    def dates(self) -> np.ndarray:
+        """UTC calendar day of each bar as ``datetime64[D]``."""
+        return (self.t // MS_PER_DAY).astype("datetime64[D]")
+
+    @property
+    def first_date(self) -> date | None:
+        if not len(self):
+            return None
+        return EPOCH + timedelta(days=int(self.t[0] // MS_PER_DAY))
+
+    @property
+    def last_date(self) -> date | None:
+        if not len(self):
+            return None
+        return EPOCH + timedelta(days=int(self.t[-1] // MS_PER_DAY))
+
+    def sorted(self) -> BarSeries:
+        """Return the series ordered by `t` (self when already ordered)."""
+        if len(self.t) < 2 or bool(np.all(self.t[1:] >= self.t[:-1])):
+            return self
+        order = np.argsort(self.t, kind="stable")
+        return BarSeries(
+            self.t[order],
+            self.open[order],
+            self.high[order],
+            self.low[order],
+            self.close[order],
+            self.volume[order],
+        )
+
+    def rows(self) -> Iterator[BarRow]:
+        """Yield ``(date, open, high, low, close, volume)`` with plain Python values."""
+        days = (self.t // MS_PER_DAY).tolist()
+        volumes = [None if value != value else int(value) for value in self.volume.tolist()]
+        for day, open_, high, low, close, volume in zip(
+            days,
+            self.open.tolist(),
+            self.high.tolist(),
+            self.low.tolist(),
+            self.close.tolist(),
+            volumes,
+        ):
+            yield EPOCH + timedelta(days=day), open_, high, low, close, volume
+
+    def price_points(self) -> list[tuple[date, float]]:
+        """``(date, close)`` pairs in date order, the shape `analyze.rules` works on."""
+        days = (self.t // MS_PER_DAY).tolist()
+        return [
+            (EPOCH + timedelta(days=day), close) for day, close in zip(days, self.close.tolist())
+        ]
+
+    def to_daily_bars(self) -> list[DailyPriceBar]:
+        return [
+            DailyPriceBar(date=day, open=open_, high=high, low=low, close=close, volume=volume)
+            for day, open_, high, low, close, volume in self.rows()
+        ]
+
+    def to_agg_dicts(self) -> list[dict[str, float | int]]:
+        # NaN volume is reported as 0, matching `_agg_to_intraday_bar`.
+        volumes = np.nan_to_num(self.volume, nan=0.0)
+        return [
+            {"t": t, "o": o, "h": h, "l": low, "c": c, "v": v}
+            for t, o, h, low, c, v in zip(
+                self.t.tolist(),
+                self.open.tolist(),
+                self.high.tolist(),
+                self.low.tolist(),
+                self.close.tolist(),
+                volumes.tolist(),
+            )
+        ]
+
+
+class BarSeriesBuilder:
+    """Accumulates bars into typed buffers (8 bytes per field) and builds a `BarSeries`."""
+
+    def __init__(self) -> None:
+        self._t = array("q")
+        self._open = array("d")
+        self._high = array("d")
+        self._low = array("d")
+        self._close = array("d")
+        self._volume = array("d")
+
+    def __len__(self) -> int:
+        return len(self._t)
+
+    def append(
+        self,
+        t: int,
+        open: float,
+        high: float,
+        low: float,
+        close: float,
+        volume: float | None,
+    ) -> None:
+        self._t.append(int(t))
+        self._open.append(float(open))
+        self._high.append(float(high))
+        self._low.append(float(low))
+        self._close.append(float(close))
+        self._volume.append(float("nan") if volume is None else float(volume))
+
+    def build(self) -> BarSeries:
+        series = BarSeries(
+            t=np.frombuffer(self._t, dtype=np.int64).copy(),
+            open=np.frombuffer(self._open, dtype=np.float64).copy(),
+            high=np.frombuffer(self._high, dtype=np.float64).copy(),
+            low=np.frombuffer(self._low, dtype=np.float64).copy(),
+            close=np.frombuffer(self._close, dtype=np.float64).copy(),
+            volume=np.frombuffer(self._volume, dtype=np.float64).copy(),
+        )
+        return series.sorted()
@@ -2,9 +2,13 @@
 
 from __future__ import annotations
 
+from collections.abc import Iterator
 from dataclasses import dataclass
 from datetime import date
-from typing import Protocol
+from typing import TYPE_CHECKING, Protocol, runtime_checkable
+
+if TYPE_CHECKING:
+    from dipdetector.market.bars import BarSeries
 
 
 @dataclass(frozen=True)
@@ -21,3 +25,32 @@ class PriceProvider(Protocol):
     def fetch_daily_prices(self, symbol: str, start: date, end: date) -> list[DailyPriceBar]:
         """Return daily bars for start..end (inclusive)."""
         ...
+
+
+class AsyncPriceProvider(Protocol):
+    async def fetch_daily_prices(
+        self, symbol: str, start: date, end: date
+    ) -> list[DailyPriceBar]:
+        """Return daily bars for start..end (inclusive) without blocking the event loop."""
+        ...
+
+
+@runtime_checkable
+class GroupedDailyProvider(Protocol):
+    def fetch_grouped_daily(self, day: date) -> dict[str, DailyPriceBar]:
+        """Return the daily bar for every symbol that traded on `day`, keyed by symbol."""
+        ...
+
+
+@runtime_checkable
+class StreamingPriceProvider(Protocol):
+    def iter_daily_prices(self, symbol: str, start: date, end: date) -> Iterator[DailyPriceBar]:
+        """Yield daily bars for start..end (inclusive) in date order, one page at a time."""
+        ...
+
+
+@runtime_checkable
+class BarSeriesProvider(Protocol):
+    def fetch_daily_series(self, symbol: str, start: date, end: date) -> BarSeries:
+        """Return daily bars for start..end (inclusive) as a columnar `BarSeries`."""
+        ...
@@ -0,0 +1,170 @@
+"""Content-addressed on-disk cache for provider responses."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from collections.abc import Callable
+from datetime import date
+from pathlib import Path
+from typing import Any
+
+from dipdetector import config
+
+CACHE_MODES = ("off", "readwrite", "record", "replay")
+
+# Entries are written with `expires_at` first so pruning can read it from the
+# head of the file instead of parsing every payload.
+_EXPIRES_AT_HEAD = re.compile(rb'^\{"expires_at": (null|[0-9.eE+-]+)')
+
+
+class CacheMiss(LookupError):
+    """Raised in replay mode when a response was never recorded."""
+
+
+class ResponseCache:
+    """Stores JSON-serializable provider payloads keyed by endpoint plus params.
+
+    Modes:
+        - ``readwrite``: serve unexpired entries, fetch and store misses.
+        - ``record``: always fetch and overwrite the stored entry.
+        - ``replay``: never touch the network; serve any stored entry regardless
+          of age and raise `CacheMiss` otherwise.
+
+    Entries written with ``ttl=None`` never expire, which suits closed
+    historical ranges. Writes are atomic renames, so the cache can be shared
+    by threads and processes. In ``readwrite`` mode, `store` also deletes
+    expired entries at most once per `prune_interval` seconds; ``record`` and
+    ``replay`` keep everything, since replay serves entries regardless of age.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        mode: str = "readwrite",
+        prune_interval: float = 600.0,
+    ):
+        if mode not in CACHE_MODES or mode == "off":
+            raise ValueError(f"Unsupported cache mode: {mode!r}")
+        self.directory = Path(directory)
+        self.mode = mode
+        self._prune_interval = prune_interval
+        self._next_prune = 0.0
+
+    @staticmethod
+    def key(endpoint: str, params: dict[str, Any]) -> str:
+        canonical = json.dumps(
+            {"endpoint": endpoint, "params": params}, sort_keys=True, default=str
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def lookup(self, endpoint: str, params: dict[str, Any]) -> tuple[bool, Any]:
+        """Return (hit, payload). In replay mode a miss raises `CacheMiss`."""
+        if self.mode == "record":
+            return False, None
+
+        path = self._path(self.key(endpoint, params))
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            entry = None
+
+        if entry is not None:
+            expires_at = entry.get("expires_at")
+            if self.mode == "replay" or expires_at is None or expires_at > time.time():
+                return True, entry.get("payload")
+
+        if self.mode == "replay":
+            raise CacheMiss(f"No recorded response for {endpoint} {params}")
+        return False, None
+
+    def store(self, endpoint: str, params: dict[str, Any], payload: Any, ttl: float | None) -> None:
+        path = self._path(self.key(endpoint, params))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        now = time.time()
+        entry = {
+            "expires_at": None if ttl is None else now + ttl,
+            "endpoint": endpoint,
+            "params": params,
+            "stored_at": now,
+            "payload": payload,
+        }
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(entry, handle, default=str)
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        if self.mode == "readwrite" and now >= self._next_prune:
+            self._next_prune = now + self._prune_interval
+            self.prune(now)
+
+    def prune(self, now: float | None = None) -> int:
+        """Delete expired entries and return how many were removed."""
+        now = time.time() if now is None else now
+        removed = 0
+        for path in self.directory.glob("*/*.json"):
+            try:
+                with open(path, "rb") as handle:
+                    match = _EXPIRES_AT_HEAD.match(handle.read(64))
+                    if match is not None:
+                        raw = match.group(1)
+                        expires_at = None if raw == b"null" else float(raw)
+                    else:
+                        handle.seek(0)
+                        expires_at = json.load(handle).get("expires_at")
+            except (OSError, ValueError):
+                continue
+            if expires_at is not None and expires_at <= now:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+    def get_or_fetch(
+        self,
+        endpoint: str,
+        params: dict[str, Any],
+        fetch: Callable[[], Any],
+        ttl: float | None,
+    ) -> Any:
+        hit, payload = self.lookup(endpoint, params)
+        if hit:
+            return payload
+        payload = fetch()
+        self.store(endpoint, params, payload, ttl)
+        return payload
+
+
+def ttl_for_range(end: date) -> float | None:
+    """Ranges that closed before today never change; anything touching today expires quickly."""
+    if end < date.today():
+        return None
+    return float(config.get_massive_cache_ttl_sec())
+
+
+def bucket_range_ms(start_ms: int, end_ms: int, ttl: float | None) -> tuple[int, int]:
+    """Floor an open range to its TTL so repeated requests share one cache key.
+
+    Ranges touching today end at "now", which would otherwise give every
+    request its own entry. Closed ranges (``ttl=None``) are returned as is.
+    """
+    if ttl is None or ttl <= 0:
+        return start_ms, end_ms
+    step = int(ttl * 1000)
+    return start_ms - start_ms % step, end_ms - end_ms % step
+
+
+def get_response_cache() -> ResponseCache | None:
+    mode = config.get_massive_cache_mode()
+    if mode == "off":
+        return None
+    return ResponseCache(config.get_massive_cache_dir(), mode)
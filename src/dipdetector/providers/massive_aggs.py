@@ -0,0 +1,167 @@
+"""Helpers shared by the sync and async Massive (Polygon) providers.
+
+They convert aggregates payloads into bars, build the cache keys for
+aggregates requests, and resolve US equity session boundaries.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from datetime import date, datetime, time as time_of_day, timezone, timedelta
+from typing import Any
+from zoneinfo import ZoneInfo
+
+from dipdetector.market.bars import BarSeries, BarSeriesBuilder
+from dipdetector.providers.base import DailyPriceBar
+
+
+def aggs_params(
+    symbol: str, multiplier: int, timespan: str, from_: str | int, to: str | int
+) -> dict[str, Any]:
+    return {
+        "ticker": symbol,
+        "multiplier": multiplier,
+        "timespan": timespan,
+        "from": from_,
+        "to": to,
+        "adjusted": True,
+    }
+
+
+def bar_to_payload(bar: DailyPriceBar) -> dict[str, Any]:
+    return {
+        "date": bar.date.isoformat(),
+        "open": bar.open,
+        "high": bar.high,
+        "low": bar.low,
+        "close": bar.close,
+        "volume": bar.volume,
+    }
+
+
+def bar_from_payload(item: dict[str, Any]) -> DailyPriceBar:
+    return DailyPriceBar(
+        date=date.fromisoformat(item["date"]),
+        open=item["open"],
+        high=item["high"],
+        low=item["low"],
+        close=item["close"],
+        volume=item["volume"],
+    )
+
+
+def eastern_date(value: datetime) -> date:
+    return value.astimezone(ZoneInfo("America/New_York")).date()
+
+
+def agg_to_bar(agg: Any, bar_date: date | None = None) -> DailyPriceBar | None:
+    timestamp = get_agg_value(agg, "timestamp", "t")
+    if timestamp is None and bar_date is None:
+        return None
+
+    open_price = get_agg_value(agg, "open", "o")
+    high = get_agg_value(agg, "high", "h")
+    low = get_agg_value(agg, "low", "l")
+    close = get_agg_value(agg, "close", "c")
+    if open_price is None or high is None or low is None or close is None:
+        return None
+
+    volume = get_agg_value(agg, "volume", "v")
+    volume_value = int(volume) if volume is not None else None
+
+    if bar_date is None:
+        bar_date = datetime.fromtimestamp(int(timestamp) / 1000, tz=timezone.utc).date()
+    return DailyPriceBar(
+        date=bar_date,
+        open=float(open_price),
+        high=float(high),
+        low=float(low),
+        close=float(close),
+        volume=volume_value,
+    )
+
+
+def agg_to_intraday_bar(agg: Any) -> dict[str, float | int] | None:
+    timestamp = get_agg_value(agg, "timestamp", "t")
+    if timestamp is None:
+        return None
+
+    open_price = get_agg_value(agg, "open", "o")
+    high = get_agg_value(agg, "high", "h")
+    low = get_agg_value(agg, "low", "l")
+    close = get_agg_value(agg, "close", "c")
+    if open_price is None or high is None or low is None or close is None:
+        return None
+
+    volume = get_agg_value(agg, "volume", "v")
+    volume_value = float(volume) if volume is not None else 0.0
+
+    return {
+        "t": int(timestamp),
+        "o": float(open_price),
+        "h": float(high),
+        "l": float(low),
+        "c": float(close),
+        "v": volume_value,
+    }
+
+
+def aggs_to_series(aggs: Iterable[Any]) -> BarSeries:
+    builder = BarSeriesBuilder()
+    for agg in aggs:
+        timestamp = get_agg_value(agg, "timestamp", "t")
+        open_price = get_agg_value(agg, "open", "o")
+        high = get_agg_value(agg, "high", "h")
+        low = get_agg_value(agg, "low", "l")
+        close = get_agg_value(agg, "close", "c")
+        if timestamp is None or open_price is None or high is None or low is None or close is None:
+            continue
+        builder.append(timestamp, open_price, high, low, close, get_agg_value(agg, "volume", "v"))
+    return builder.build()
+
+
+def get_agg_value(agg: Any, *names: str) -> Any | None:
+    for name in names:
+        if hasattr(agg, name):
+            value = getattr(agg, name)
+        elif isinstance(agg, dict) and name in agg:
+            value = agg[name]
+        else:
+            continue
+        if value is not None:
+            return value
+    return None
+
+
+def get_session_start(value: datetime) -> datetime:
+    eastern = ZoneInfo("America/New_York")
+    local = value.astimezone(eastern)
+    session_date = _resolve_session_date(local)
+    return datetime.combine(session_date, time_of_day(9, 30), tzinfo=eastern)
+
+
+def get_session_end(value: datetime) -> datetime:
+    eastern = ZoneInfo("America/New_York")
+    local = value.astimezone(eastern)
+    session_date = _resolve_session_date(local)
+    session_start = datetime.combine(session_date, time_of_day(9, 30), tzinfo=eastern)
+    session_close = datetime.combine(session_date, time_of_day(16, 0), tzinfo=eastern)
+
+    if session_start <= local <= session_close:
+        return local
+    return session_close
+
+
+def _resolve_session_date(local: datetime) -> date:
+    session_date = local.date()
+    if local.weekday() >= 5:
+        session_date = _previous_weekday(session_date - timedelta(days=1))
+    elif local.time() < time_of_day(9, 30):
+        session_date = _previous_weekday(session_date - timedelta(days=1))
+    return session_date
+
+
+def _previous_weekday(value: date) -> date:
+    while value.weekday() >= 5:
+        value -= timedelta(days=1)
+    return value
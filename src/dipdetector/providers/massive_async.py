@@ -0,0 +1,280 @@
+"""Asyncio Massive (Polygon) provider over a pooled httpx client."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+from datetime import date, datetime, timedelta, timezone
+from typing import Any
+
+import httpx
+
+from dipdetector.market.bars import BarSeries
+from dipdetector.providers.base import AsyncPriceProvider, DailyPriceBar
+from dipdetector.providers.cache import ResponseCache, bucket_range_ms, ttl_for_range
+from dipdetector.providers.massive_aggs import (
+    agg_to_bar,
+    agg_to_intraday_bar,
+    aggs_params,
+    aggs_to_series,
+    bar_from_payload,
+    bar_to_payload,
+    eastern_date,
+    get_session_end,
+    get_session_start,
+)
+from dipdetector.providers.rate_limit import INTERACTIVE, RateLimiter
+from dipdetector.providers.retry import RetryPolicy
+
+DEFAULT_BASE_URL = "https://api.polygon.io"
+
+
+class AsyncMassiveProvider(AsyncPriceProvider):
+    """Non-blocking counterpart of `MassiveProvider`.
+
+    One instance owns one connection pool; share it across tasks and close it
+    with `aclose()` (or use it as an async context manager). At most
+    `max_concurrency` HTTP requests are in flight at once, and `retry_policy`
+    backs off with `asyncio.sleep` so other tasks keep running. A
+    `ResponseCache` is shared with `MassiveProvider`: both use the same keys
+    for the same request. A `RateLimiter` is consulted before every HTTP
+    request, including each page. `iter_*` methods yield bars page by page for
+    constant-memory consumers; `*_series` methods return columnar `BarSeries`.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str | None = None,
+        max_concurrency: int = 16,
+        timeout: float = 10.0,
+        transport: httpx.AsyncBaseTransport | None = None,
+        cache: ResponseCache | None = None,
+        limiter: RateLimiter | None = None,
+        priority: str = INTERACTIVE,
+        retry_policy: RetryPolicy | None = None,
+    ):
+        if not api_key:
+            raise ValueError("MASSIVE_API_KEY is required to fetch prices.")
+        if max_concurrency <= 0:
+            raise ValueError("max_concurrency must be a positive integer")
+        self._client = httpx.AsyncClient(
+            base_url=(base_url or DEFAULT_BASE_URL).rstrip("/"),
+            headers={"Authorization": f"Bearer {api_key}", "Accept-Encoding": "gzip"},
+            limits=httpx.Limits(
+                max_connections=max_concurrency,
+                max_keepalive_connections=max_concurrency,
+            ),
+            timeout=timeout,
+            transport=transport,
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._cache = cache
+        self._limiter = limiter
+        self._priority = priority
+        self._retry = retry_policy or RetryPolicy()
+
+    async def __aenter__(self) -> AsyncMassiveProvider:
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    async def fetch_daily_prices(self, symbol: str, start: date, end: date) -> list[DailyPriceBar]:
+        params = aggs_params(symbol, 1, "day", start.isoformat(), end.isoformat())
+        if self._cache is not None:
+            # Cache reads and writes hit the disk, so keep them off the event loop.
+            hit, payload = await asyncio.to_thread(self._cache.lookup, "aggs", params)
+            if hit:
+                return [bar_from_payload(item) for item in payload]
+
+        bars = [bar async for bar in self._iter_daily_prices(symbol, start, end)]
+        bars.sort(key=lambda bar: bar.date)
+        if self._cache is not None:
+            await asyncio.to_thread(
+                self._cache.store,
+                "aggs",
+                params,
+                [bar_to_payload(bar) for bar in bars],
+                ttl_for_range(end),
+            )
+        return bars
+
+    async def iter_daily_prices(
+        self, symbol: str, start: date, end: date
+    ) -> AsyncIterator[DailyPriceBar]:
+        """Yield daily bars in date order, one page in memory at a time.
+
+        With a response cache configured this buffers via `fetch_daily_prices`.
+        """
+        if self._cache is not None:
+            for bar in await self.fetch_daily_prices(symbol, start, end):
+                yield bar
+            return
+        async for bar in self._iter_daily_prices(symbol, start, end):
+            yield bar
+
+    async def fetch_daily_series(self, symbol: str, start: date, end: date) -> BarSeries:
+        if self._cache is not None:
+            return BarSeries.from_daily_bars(await self.fetch_daily_prices(symbol, start, end))
+        pages = [
+            page
+            async for page in self._iter_series(
+                symbol, 1, "day", start.isoformat(), end.isoformat()
+            )
+        ]
+        return BarSeries.concat(pages)
+
+    async def fetch_intraday_bars(
+        self,
+        symbol: str,
+        lookback_minutes: int,
+        timespan: str = "minute",
+        multiplier: int = 1,
+    ) -> list[dict[str, float | int]]:
+        if lookback_minutes <= 0:
+            return []
+        start_dt, end_dt = _intraday_window(lookback_minutes)
+        return await self.fetch_aggregate_bars(symbol, start_dt, end_dt, timespan, multiplier)
+
+    async def iter_intraday_series(
+        self,
+        symbol: str,
+        lookback_minutes: int,
+        timespan: str = "minute",
+        multiplier: int = 1,
+    ) -> AsyncIterator[BarSeries]:
+        if lookback_minutes <= 0:
+            return
+        start_dt, end_dt = _intraday_window(lookback_minutes)
+        async for page in self.iter_aggregate_series(
+            symbol, start_dt, end_dt, timespan, multiplier
+        ):
+            yield page
+
+    async def fetch_aggregate_bars(
+        self,
+        symbol: str,
+        start_dt: datetime,
+        end_dt: datetime,
+        timespan: str,
+        multiplier: int = 1,
+    ) -> list[dict[str, float | int]]:
+        start_ms = int(start_dt.timestamp() * 1000)
+        end_ms = int(end_dt.timestamp() * 1000)
+        ttl = ttl_for_range(eastern_date(end_dt))
+        params = aggs_params(symbol, multiplier, timespan, *bucket_range_ms(start_ms, end_ms, ttl))
+        if self._cache is not None:
+            hit, payload = await asyncio.to_thread(self._cache.lookup, "aggs", params)
+            if hit:
+                return payload
+
+        bars = [
+            bar
+            async for bar in self._iter_aggregate_bars(
+                symbol, start_ms, end_ms, timespan, multiplier
+            )
+        ]
+        bars.sort(key=lambda bar: bar["t"])
+        if self._cache is not None:
+            await asyncio.to_thread(self._cache.store, "aggs", params, bars, ttl)
+        return bars
+
+    async def iter_aggregate_series(
+        self,
+        symbol: str,
+        start_dt: datetime,
+        end_dt: datetime,
+        timespan: str,
+        multiplier: int = 1,
+    ) -> AsyncIterator[BarSeries]:
+        """Yield one `BarSeries` per API page, in timestamp order."""
+        if self._cache is not None:
+            yield BarSeries.from_agg_dicts(
+                await self.fetch_aggregate_bars(symbol, start_dt, end_dt, timespan, multiplier)
+            )
+            return
+        start_ms = int(start_dt.timestamp() * 1000)
+        end_ms = int(end_dt.timestamp() * 1000)
+        async for page in self._iter_series(symbol, multiplier, timespan, start_ms, end_ms):
+            yield page
+
+    async def _iter_daily_prices(
+        self, symbol: str, start: date, end: date
+    ) -> AsyncIterator[DailyPriceBar]:
+        async for agg in self._iter_aggs(symbol, 1, "day", start.isoformat(), end.isoformat()):
+            bar = agg_to_bar(agg)
+            if bar is not None:
+                yield bar
+
+    async def _iter_aggregate_bars(
+        self, symbol: str, start_ms: int, end_ms: int, timespan: str, multiplier: int
+    ) -> AsyncIterator[dict[str, float | int]]:
+        async for agg in self._iter_aggs(symbol, multiplier, timespan, start_ms, end_ms):
+            bar = agg_to_intraday_bar(agg)
+            if bar is not None:
+                yield bar
+
+    async def _iter_series(
+        self,
+        symbol: str,
+        multiplier: int,
+        timespan: str,
+        from_: str | int,
+        to: str | int,
+    ) -> AsyncIterator[BarSeries]:
+        async for page in self._iter_pages(symbol, multiplier, timespan, from_, to):
+            series = aggs_to_series(page)
+            if len(series):
+                yield series
+
+    async def _iter_aggs(
+        self,
+        symbol: str,
+        multiplier: int,
+        timespan: str,
+        from_: str | int,
+        to: str | int,
+    ) -> AsyncIterator[dict[str, Any]]:
+        async for page in self._iter_pages(symbol, multiplier, timespan, from_, to):
+            for agg in page:
+                yield agg
+
+    async def _iter_pages(
+        self,
+        symbol: str,
+        multiplier: int,
+        timespan: str,
+        from_: str | int,
+        to: str | int,
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        url: str | None = f"/v2/aggs/ticker/{symbol}/range/{multiplier}/{timespan}/{from_}/{to}"
+        params: dict[str, Any] | None = {"adjusted": "true", "sort": "asc", "limit": 50000}
+
+        while url:
+            payload = await self._get_json(url, params)
+            yield payload.get("results") or []
+            # next_url already carries the cursor and original query parameters.
+            url = payload.get("next_url")
+            params = None
+
+    async def _get_json(self, url: str, params: dict[str, Any] | None) -> dict[str, Any]:
+        async def attempt() -> dict[str, Any]:
+            if self._limiter is not None:
+                await self._limiter.acquire_async("aggs", self._priority)
+            async with self._semaphore:
+                response = await self._client.get(url, params=params)
+            response.raise_for_status()
+            payload = response.json()
+            return payload if isinstance(payload, dict) else {}
+
+        return await self._retry.call_async(attempt)
+
+
+def _intraday_window(lookback_minutes: int) -> tuple[datetime, datetime]:
+    end_dt = get_session_end(datetime.now(timezone.utc))
+    start_dt = max(end_dt - timedelta(minutes=lookback_minutes), get_session_start(end_dt))
+    return start_dt, end_dt
@@ -6,6 +6,10 @@ from typing import Any
 
 import requests
 
+from dipdetector import config
+from dipdetector.providers.cache import ResponseCache
+from dipdetector.providers.rate_limit import INTERACTIVE, RateLimiter
+
 
 def fetch_ticker_news(
     symbol: str,
@@ -13,11 +17,37 @@ def fetch_ticker_news(
     limit: int,
     base_url: str,
     api_key: str,
+    cache: ResponseCache | None = None,
+    limiter: RateLimiter | None = None,
 ) -> list[dict[str, Any]]:
     """Fetch and normalize recent news for a ticker.
 
     Returns compact dicts with: title, publisher, published_utc, summary, url.
+    Only successful responses are cached, with the short cache TTL.
     """
+    cache_params = {"ticker": symbol, "limit": limit}
+    if cache is not None:
+        hit, payload = cache.lookup("news", cache_params)
+        if hit:
+            return payload
+
+    if limiter is not None:
+        limiter.acquire("news", INTERACTIVE)
+    items = _fetch_ticker_news(symbol, limit=limit, base_url=base_url, api_key=api_key)
+    if items is None:
+        return []
+    if cache is not None:
+        cache.store("news", cache_params, items, float(config.get_massive_cache_ttl_sec()))
+    return items
+
+
+def _fetch_ticker_news(
+    symbol: str,
+    *,
+    limit: int,
+    base_url: str,
+    api_key: str,
+) -> list[dict[str, Any]] | None:
     url = f"{base_url.rstrip('/')}/v2/reference/news"
     params = {
         "ticker": symbol,
@@ -30,15 +60,15 @@ def fetch_ticker_news(
     try:
         response = requests.get(url, params=params, timeout=10)
     except requests.RequestException:
-        return []
+        return None
 
     if response.status_code != 200:
-        return []
+        return None
 
     try:
         payload = response.json()
     except ValueError:
-        return []
+        return None
 
     raw_items = payload.get("results", []) if isinstance(payload, dict) else []
     items: list[dict[str, Any]] = []
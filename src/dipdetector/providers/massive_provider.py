@@ -2,25 +2,64 @@
 
 from __future__ import annotations
 
-from datetime import date, datetime, time as time_of_day, timezone, timedelta
-import time
+import json
+from collections.abc import Iterator
+from datetime import date, datetime, timezone, timedelta
 from typing import Any
-from zoneinfo import ZoneInfo
 
 from massive import RESTClient
 
-from dipdetector.providers.base import DailyPriceBar, PriceProvider
-
-
-class MassiveProvider(PriceProvider):
+from dipdetector.market.bars import BarSeries
+from dipdetector.providers.base import (
+    DailyPriceBar,
+    GroupedDailyProvider,
+    PriceProvider,
+    StreamingPriceProvider,
+)
+from dipdetector.providers.cache import ResponseCache, bucket_range_ms, ttl_for_range
+from dipdetector.providers.massive_aggs import (
+    agg_to_bar,
+    agg_to_intraday_bar,
+    aggs_params,
+    aggs_to_series,
+    bar_from_payload,
+    bar_to_payload,
+    eastern_date,
+    get_agg_value,
+    get_session_end,
+    get_session_start,
+)
+from dipdetector.providers.rate_limit import INTERACTIVE, RateLimiter
+from dipdetector.providers.retry import RetryPolicy
+
+
+class MassiveProvider(PriceProvider, GroupedDailyProvider, StreamingPriceProvider):
     """Fetches daily OHLCV bars from Massive (Polygon).
 
     Notes:
         - The `end` date is treated as inclusive, matching the Massive aggregates API.
         - Uses adjusted prices by default.
+        - Safe to share across threads; `pool_size` bounds the keep-alive
+          connections reused per host when fetching concurrently.
+        - With a `ResponseCache`, responses are served from disk when possible.
+        - With a `RateLimiter`, every API call first takes a token at `priority`.
+        - `iter_*` methods stream bars page by page so memory stays flat for
+          long ranges; `fetch_*` methods return one sorted list, and
+          `fetch_*_series` methods a columnar `BarSeries`.
+        - Every API call runs under `retry_policy`: jittered backoff on transient
+          errors only, an overall deadline, and an optional circuit breaker.
     """
 
-    def __init__(self, api_key: str, base_url: str | None = None):
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str | None = None,
+        pool_size: int = 1,
+        cache: ResponseCache | None = None,
+        limiter: RateLimiter | None = None,
+        priority: str = INTERACTIVE,
+        retry_policy: RetryPolicy | None = None,
+    ):
         if not api_key:
             raise ValueError("MASSIVE_API_KEY is required to fetch prices.")
         if base_url:
@@ -30,36 +69,92 @@ class MassiveProvider(PriceProvider):
                 self._client = RESTClient(api_key)
         else:
             self._client = RESTClient(api_key)
+        if pool_size > 1:
+            _set_connection_pool_size(self._client, pool_size)
+        self._cache = cache
+        self._limiter = limiter
+        self._priority = priority
+        self._retry = retry_policy or RetryPolicy()
 
-    def fetch_daily_prices(self, symbol: str, start: date, end: date) -> list[DailyPriceBar]:
-        start_str = start.isoformat()
-        end_str = end.isoformat()
-        retries = [0.5, 1.5, 3.0]
-        last_error: Exception | None = None
+    def _throttle(self, endpoint: str) -> None:
+        if self._limiter is not None:
+            self._limiter.acquire(endpoint, self._priority)
 
-        for attempt in range(len(retries) + 1):
-            try:
-                aggs = self._client.list_aggs(
-                    ticker=symbol,
-                    multiplier=1,
-                    timespan="day",
-                    from_=start_str,
-                    to=end_str,
-                    limit=50000,
-                    adjusted=True,
-                )
-                bars = [_agg_to_bar(agg) for agg in aggs]
-                cleaned = [bar for bar in bars if bar is not None]
-                cleaned.sort(key=lambda bar: bar.date)
-                return cleaned
-            except Exception as exc:  # pragma: no cover - retry behavior tested separately
-                last_error = exc
-                if attempt < len(retries):
-                    time.sleep(retries[attempt])
-
-        if last_error:
-            raise last_error
-        return []
+    def fetch_daily_prices(self, symbol: str, start: date, end: date) -> list[DailyPriceBar]:
+        if self._cache is None:
+            return self._fetch_daily_prices(symbol, start, end)
+        payload = self._cache.get_or_fetch(
+            "aggs",
+            aggs_params(symbol, 1, "day", start.isoformat(), end.isoformat()),
+            lambda: [bar_to_payload(bar) for bar in self._fetch_daily_prices(symbol, start, end)],
+            ttl_for_range(end),
+        )
+        return [bar_from_payload(item) for item in payload]
+
+    def iter_daily_prices(self, symbol: str, start: date, end: date) -> Iterator[DailyPriceBar]:
+        """Yield daily bars in date order without materializing the whole range.
+
+        The response cache stores whole payloads, so with a cache configured
+        this falls back to `fetch_daily_prices`.
+        """
+        if self._cache is not None:
+            yield from self.fetch_daily_prices(symbol, start, end)
+            return
+        for agg in self._iter_aggs(symbol, 1, "day", start.isoformat(), end.isoformat()):
+            bar = agg_to_bar(agg)
+            if bar is not None:
+                yield bar
+
+    def fetch_daily_series(self, symbol: str, start: date, end: date) -> BarSeries:
+        """Columnar variant of `fetch_daily_prices`; no per-bar objects are built."""
+        if self._cache is not None:
+            return BarSeries.from_daily_bars(self.fetch_daily_prices(symbol, start, end))
+        return aggs_to_series(
+            self._iter_aggs(symbol, 1, "day", start.isoformat(), end.isoformat())
+        )
+
+    def _fetch_daily_prices(self, symbol: str, start: date, end: date) -> list[DailyPriceBar]:
+        bars = [
+            bar
+            for bar in map(
+                agg_to_bar, self._iter_aggs(symbol, 1, "day", start.isoformat(), end.isoformat())
+            )
+            if bar is not None
+        ]
+        bars.sort(key=lambda bar: bar.date)
+        return bars
+
+    def fetch_grouped_daily(self, day: date) -> dict[str, DailyPriceBar]:
+        """Fetch one whole-market grouped-daily snapshot for `day`.
+
+        Returns an empty dict for non-trading days.
+        """
+        if self._cache is None:
+            return self._fetch_grouped_daily(day)
+        payload = self._cache.get_or_fetch(
+            "grouped_daily",
+            {"date": day.isoformat(), "adjusted": True},
+            lambda: {
+                symbol: bar_to_payload(bar)
+                for symbol, bar in self._fetch_grouped_daily(day).items()
+            },
+            ttl_for_range(day),
+        )
+        return {symbol: bar_from_payload(item) for symbol, item in payload.items()}
+
+    def _fetch_grouped_daily(self, day: date) -> dict[str, DailyPriceBar]:
+        def attempt() -> dict[str, DailyPriceBar]:
+            self._throttle("grouped_daily")
+            aggs = self._client.get_grouped_daily_aggs(day.isoformat(), adjusted=True)
+            bars: dict[str, DailyPriceBar] = {}
+            for agg in aggs or []:
+                symbol = get_agg_value(agg, "ticker", "T")
+                bar = agg_to_bar(agg, bar_date=day)
+                if symbol and bar is not None:
+                    bars[str(symbol)] = bar
+            return bars
+
+        return self._retry.call(attempt)
 
     def fetch_intraday_bars(
         self,
@@ -71,39 +166,12 @@ class MassiveProvider(PriceProvider):
         if lookback_minutes <= 0:
             return []
 
-        end_dt = _get_session_end(datetime.now(timezone.utc))
+        end_dt = get_session_end(datetime.now(timezone.utc))
         start_dt = end_dt - timedelta(minutes=lookback_minutes)
-        session_start = _get_session_start(end_dt)
+        session_start = get_session_start(end_dt)
         if start_dt < session_start:
             start_dt = session_start
-        start_ms = int(start_dt.timestamp() * 1000)
-        end_ms = int(end_dt.timestamp() * 1000)
-        retries = [0.5, 1.5, 3.0]
-        last_error: Exception | None = None
-
-        for attempt in range(len(retries) + 1):
-            try:
-                aggs = self._client.list_aggs(
-                    ticker=symbol,
-                    multiplier=multiplier,
-                    timespan=timespan,
-                    from_=start_ms,
-                    to=end_ms,
-                    limit=50000,
-                    adjusted=True,
-                )
-                bars = [_agg_to_intraday_bar(agg) for agg in aggs]
-                cleaned = [bar for bar in bars if bar is not None]
-                cleaned.sort(key=lambda bar: bar["t"])
-                return cleaned
-            except Exception as exc:  # pragma: no cover - retry behavior tested elsewhere
-                last_error = exc
-                if attempt < len(retries):
-                    time.sleep(retries[attempt])
-
-        if last_error:
-            raise last_error
-        return []
+        return self.fetch_aggregate_bars(symbol, start_dt, end_dt, timespan, multiplier)
 
     def fetch_aggregate_bars(
         self,
@@ -115,127 +183,120 @@ class MassiveProvider(PriceProvider):
     ) -> list[dict[str, float | int]]:
         start_ms = int(start_dt.timestamp() * 1000)
         end_ms = int(end_dt.timestamp() * 1000)
-        retries = [0.5, 1.5, 3.0]
-        last_error: Exception | None = None
-
-        for attempt in range(len(retries) + 1):
-            try:
-                aggs = self._client.list_aggs(
-                    ticker=symbol,
-                    multiplier=multiplier,
-                    timespan=timespan,
-                    from_=start_ms,
-                    to=end_ms,
-                    limit=50000,
-                    adjusted=True,
-                )
-                bars = [_agg_to_intraday_bar(agg) for agg in aggs]
-                cleaned = [bar for bar in bars if bar is not None]
-                cleaned.sort(key=lambda bar: bar["t"])
-                return cleaned
-            except Exception as exc:  # pragma: no cover - retry behavior tested elsewhere
-                last_error = exc
-                if attempt < len(retries):
-                    time.sleep(retries[attempt])
-
-        if last_error:
-            raise last_error
-        return []
-
-
-def _agg_to_bar(agg: Any) -> DailyPriceBar | None:
-    timestamp = _get_agg_value(agg, "timestamp", "t")
-    if timestamp is None:
-        return None
-
-    open_price = _get_agg_value(agg, "open", "o")
-    high = _get_agg_value(agg, "high", "h")
-    low = _get_agg_value(agg, "low", "l")
-    close = _get_agg_value(agg, "close", "c")
-    if open_price is None or high is None or low is None or close is None:
-        return None
-
-    volume = _get_agg_value(agg, "volume", "v")
-    volume_value = int(volume) if volume is not None else None
-
-    bar_date = datetime.fromtimestamp(int(timestamp) / 1000, tz=timezone.utc).date()
-    return DailyPriceBar(
-        date=bar_date,
-        open=float(open_price),
-        high=float(high),
-        low=float(low),
-        close=float(close),
-        volume=volume_value,
-    )
-
-
-def _agg_to_intraday_bar(agg: Any) -> dict[str, float | int] | None:
-    timestamp = _get_agg_value(agg, "timestamp", "t")
-    if timestamp is None:
-        return None
-
-    open_price = _get_agg_value(agg, "open", "o")
-    high = _get_agg_value(agg, "high", "h")
-    low = _get_agg_value(agg, "low", "l")
-    close = _get_agg_value(agg, "close", "c")
-    if open_price is None or high is None or low is None or close is None:
-        return None
-
-    volume = _get_agg_value(agg, "volume", "v")
-    volume_value = float(volume) if volume is not None else 0.0
-
-    return {
-        "t": int(timestamp),
-        "o": float(open_price),
-        "h": float(high),
-        "l": float(low),
-        "c": float(close),
-        "v": volume_value,
-    }
-
-
-def _get_agg_value(agg: Any, *names: str) -> Any | None:
-    for name in names:
-        if hasattr(agg, name):
-            value = getattr(agg, name)
-        elif isinstance(agg, dict) and name in agg:
-            value = agg[name]
-        else:
-            continue
-        if value is not None:
-            return value
-    return None
-
-
-def _get_session_start(value: datetime) -> datetime:
-    eastern = ZoneInfo("America/New_York")
-    local = value.astimezone(eastern)
-    session_date = _resolve_session_date(local)
-    return datetime.combine(session_date, time_of_day(9, 30), tzinfo=eastern)
-
-
-def _get_session_end(value: datetime) -> datetime:
-    eastern = ZoneInfo("America/New_York")
-    local = value.astimezone(eastern)
-    session_date = _resolve_session_date(local)
-    session_start = datetime.combine(session_date, time_of_day(9, 30), tzinfo=eastern)
-    session_close = datetime.combine(session_date, time_of_day(16, 0), tzinfo=eastern)
-
-    if session_start <= local <= session_close:
-        return local
-    return session_close
-
-
-def _resolve_session_date(local: datetime) -> date:
-    session_date = local.date()
-    if local.weekday() >= 5:
-        session_date = _previous_weekday(session_date - timedelta(days=1))
-    elif local.time() < time_of_day(9, 30):
-        session_date = _previous_weekday(session_date - timedelta(days=1))
-    return session_date
+        if self._cache is None:
+            return self._fetch_aggregate_bars(symbol, start_ms, end_ms, timespan, multiplier)
+        ttl = ttl_for_range(eastern_date(end_dt))
+        key_start, key_end = bucket_range_ms(start_ms, end_ms, ttl)
+        return self._cache.get_or_fetch(
+            "aggs",
+            aggs_params(symbol, multiplier, timespan, key_start, key_end),
+            lambda: self._fetch_aggregate_bars(symbol, start_ms, end_ms, timespan, multiplier),
+            ttl,
+        )
+
+    def iter_aggregate_bars(
+        self,
+        symbol: str,
+        start_dt: datetime,
+        end_dt: datetime,
+        timespan: str,
+        multiplier: int = 1,
+    ) -> Iterator[dict[str, float | int]]:
+        """Streaming counterpart of `fetch_aggregate_bars`, in timestamp order."""
+        if self._cache is not None:
+            yield from self.fetch_aggregate_bars(symbol, start_dt, end_dt, timespan, multiplier)
+            return
+        start_ms = int(start_dt.timestamp() * 1000)
+        end_ms = int(end_dt.timestamp() * 1000)
+        for agg in self._iter_aggs(symbol, multiplier, timespan, start_ms, end_ms):
+            bar = agg_to_intraday_bar(agg)
+            if bar is not None:
+                yield bar
 
+    def fetch_aggregate_series(
+        self,
+        symbol: str,
+        start_dt: datetime,
+        end_dt: datetime,
+        timespan: str,
+        multiplier: int = 1,
+    ) -> BarSeries:
+        """Columnar variant of `fetch_aggregate_bars`."""
+        if self._cache is not None:
+            return BarSeries.from_agg_dicts(
+                self.fetch_aggregate_bars(symbol, start_dt, end_dt, timespan, multiplier)
+            )
+        start_ms = int(start_dt.timestamp() * 1000)
+        end_ms = int(end_dt.timestamp() * 1000)
+        return aggs_to_series(self._iter_aggs(symbol, multiplier, timespan, start_ms, end_ms))
 
-def _previous_weekday(value: date) -> date:
-    while value.weekday() >= 5:
-        value -= timedelta(days=1)
-    return value
+    def _fetch_aggregate_bars(
+        self,
+        symbol: str,
+        start_ms: int,
+        end_ms: int,
+        timespan: str,
+        multiplier: int,
+    ) -> list[dict[str, float | int]]:
+        bars = [
+            bar
+            for bar in map(
+                agg_to_intraday_bar, self._iter_aggs(symbol, multiplier, timespan, start_ms, end_ms)
+            )
+            if bar is not None
+        ]
+        bars.sort(key=lambda bar: bar["t"])
+        return bars
+
+    def _iter_aggs(
+        self,
+        symbol: str,
+        multiplier: int,
+        timespan: str,
+        from_: str | int,
+        to: str | int,
+    ) -> Iterator[Any]:
+        # Pages are requested one at a time with `raw=True` so the client never
+        # follows `next_url` on its own: each page takes its own limiter token.
+        # The next page, like a retry after a transient error, is requested from
+        # just past the last timestamp already yielded, so only one page of
+        # results is held at a time.
+        last_ts: int | None = None
+        has_more = False
+
+        def open_page() -> Iterator[Any]:
+            nonlocal has_more
+            self._throttle("aggs")
+            response = self._client.list_aggs(
+                ticker=symbol,
+                multiplier=multiplier,
+                timespan=timespan,
+                from_=from_ if last_ts is None else last_ts + 1,
+                to=to,
+                limit=50000,
+                adjusted=True,
+                sort="asc",
+                raw=True,
+            )
+            payload = json.loads(response.data)
+            has_more = bool(payload.get("next_url"))
+            return iter(payload.get("results") or [])
+
+        while True:
+            page_start = last_ts
+            for agg in self._retry.iterate(open_page):
+                timestamp = get_agg_value(agg, "timestamp", "t")
+                if timestamp is not None:
+                    last_ts = int(timestamp)
+                yield agg
+            if not has_more or last_ts == page_start:
+                return
+
+
+def _set_connection_pool_size(client: Any, pool_size: int) -> None:
+    # RESTClient does not expose the urllib3 per-host pool size, which defaults to 1
+    # and makes concurrent callers open and discard a connection per request.
+    pool_manager = getattr(client, "client", None)
+    pool_kw = getattr(pool_manager, "connection_pool_kw", None)
+    if isinstance(pool_kw, dict):
+        pool_kw["maxsize"] = pool_size
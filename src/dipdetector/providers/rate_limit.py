@@ -0,0 +1,165 @@
+"""Token-bucket rate limiting shared by every Massive API caller."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+from dipdetector import config
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None  # type: ignore[assignment]
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+PRIORITIES = (INTERACTIVE, BACKGROUND)
+
+_GLOBAL_BUCKET = "*"
+
+
+@dataclass(frozen=True)
+class BucketLimit:
+    rate_per_sec: float
+    burst: float
+
+
+class RateLimiter:
+    """Global plus per-endpoint token buckets with priority reservation.
+
+    Every request takes one token from the global bucket and, when the
+    endpoint has its own budget, one from that bucket too. Background requests
+    may not drain a bucket below `background_reserve` of its burst, so
+    interactive requests always find headroom during a long backfill.
+
+    With `state_path` set, bucket levels live in that JSON file under an
+    exclusive `flock`, so the ingest CLI and API processes on one host share a
+    single budget. Otherwise state is per process. The file is coordination
+    state only, so it is not fsynced; a crash at worst resets the buckets.
+    """
+
+    def __init__(
+        self,
+        rate_per_min: float,
+        burst: float | None = None,
+        endpoint_limits: dict[str, float] | None = None,
+        background_reserve: float = 0.2,
+        state_path: str | Path | None = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        if rate_per_min <= 0:
+            raise ValueError("rate_per_min must be positive")
+        if not 0.0 <= background_reserve < 1.0:
+            raise ValueError("background_reserve must be in [0, 1)")
+        if state_path is not None and fcntl is None:
+            raise ValueError("Cross-process rate limiting requires fcntl (POSIX)")
+
+        self._limits = {_GLOBAL_BUCKET: _bucket_limit(rate_per_min, burst)}
+        for endpoint, endpoint_rate in (endpoint_limits or {}).items():
+            self._limits[endpoint] = _bucket_limit(endpoint_rate, None)
+        self._reserve = background_reserve
+        self._state_path = Path(state_path) if state_path is not None else None
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state: dict[str, list[float]] = {}
+
+    def try_acquire(self, endpoint: str, priority: str = INTERACTIVE) -> float:
+        """Take a token if one is available; otherwise return seconds to wait."""
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority!r}")
+        names = [_GLOBAL_BUCKET] + ([endpoint] if endpoint in self._limits else [])
+
+        with self._lock, self._locked_state() as state:
+            now = self._clock()
+            levels: dict[str, float] = {}
+            wait = 0.0
+            for name in names:
+                limit = self._limits[name]
+                tokens, updated = state.get(name, [limit.burst, now])
+                tokens = min(limit.burst, tokens + max(0.0, now - updated) * limit.rate_per_sec)
+                levels[name] = tokens
+                floor = 0.0
+                if priority == BACKGROUND:
+                    floor = min(limit.burst * self._reserve, limit.burst - 1.0)
+                wait = max(wait, (floor + 1.0 - tokens) / limit.rate_per_sec)
+
+            taken = 1.0 if wait <= 0 else 0.0
+            for name, tokens in levels.items():
+                state[name] = [tokens - taken, now]
+        return max(wait, 0.0)
+
+    def acquire(self, endpoint: str, priority: str = INTERACTIVE) -> None:
+        while True:
+            wait = self.try_acquire(endpoint, priority)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self, endpoint: str, priority: str = INTERACTIVE) -> None:
+        while True:
+            if self._state_path is None:
+                wait = self.try_acquire(endpoint, priority)
+            else:
+                # The shared file takes a blocking flock; keep it off the event loop.
+                wait = await asyncio.to_thread(self.try_acquire, endpoint, priority)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    @contextmanager
+    def _locked_state(self) -> Iterator[dict[str, list[float]]]:
+        if self._state_path is None:
+            yield self._state
+            return
+
+        self._state_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self._state_path, "a+", encoding="utf-8") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                handle.seek(0)
+                try:
+                    state = json.loads(handle.read() or "{}")
+                except ValueError:
+                    state = {}
+                yield state
+                handle.seek(0)
+                handle.truncate()
+                json.dump(state, handle)
+                handle.flush()
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def _bucket_limit(rate_per_min: float, burst: float | None) -> BucketLimit:
+    if rate_per_min <= 0:
+        raise ValueError("rate limits must be positive")
+    return BucketLimit(rate_per_sec=rate_per_min / 60.0, burst=max(1.0, burst or rate_per_min / 6.0))
+
+
+_LIMITER: RateLimiter | None = None
+_LIMITER_LOCK = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter | None:
+    """Return the process-wide limiter, or None when MASSIVE_RATE_LIMIT_PER_MIN is unset."""
+    global _LIMITER
+    rate = config.get_massive_rate_limit_per_min()
+    if rate <= 0:
+        return None
+    with _LIMITER_LOCK:
+        if _LIMITER is None:
+            _LIMITER = RateLimiter(
+                rate,
+                burst=config.get_massive_rate_limit_burst(),
+                endpoint_limits=config.get_massive_rate_limit_endpoints(),
+                background_reserve=config.get_massive_rate_limit_reserve(),
+                state_path=config.get_massive_rate_limit_state_file(),
+            )
+        return _LIMITER
@@ -0,0 +1,312 @@
+"""Retry policy with jittered backoff, deadlines and a circuit breaker."""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+from collections.abc import Awaitable, Callable, Iterable, Iterator
+from dataclasses import asdict, dataclass
+from typing import TypeVar
+
+import httpx
+from massive.exceptions import AuthError, BadResponse
+
+from dipdetector import config
+from dipdetector.providers.cache import CacheMiss
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS = frozenset({408, 413, 429, 499, 500, 502, 503, 504})
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling upstream while the circuit breaker is open."""
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Classify an error as transient (worth retrying) or permanent."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in RETRYABLE_STATUS
+    # The massive client already retries 429/5xx internally, so a BadResponse
+    # that reaches us is a non-retryable 4xx.
+    if isinstance(exc, (AuthError, BadResponse, CacheMiss, CircuitOpenError)):
+        return False
+    if isinstance(exc, (ValueError, TypeError, KeyError)):
+        return False
+    return True
+
+
+@dataclass
+class RetryStats:
+    calls: int = 0
+    attempts: int = 0
+    retries: int = 0
+    successes: int = 0
+    failures: int = 0
+    non_retryable: int = 0
+    deadline_exceeded: int = 0
+    circuit_rejections: int = 0
+    circuit_opened: int = 0
+
+
+class CircuitBreaker:
+    """Opens after consecutive retryable failures; lets one probe through after `reset_timeout`."""
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if failure_threshold <= 0:
+            raise ValueError("failure_threshold must be a positive integer")
+        self._threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self._clock() - self._opened_at >= self._reset_timeout:
+                return "half_open"
+            return "open"
+
+    def allow(self) -> bool:
+        return self.admit() is not None
+
+    def admit(self) -> str | None:
+        """Return "closed" or "probe" if a call may go ahead, None if it must fail fast.
+
+        The caller that gets "probe" must end it with `record_success`,
+        `record_failure` or, if it gives up without an outcome, `release_probe`.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self._clock() - self._opened_at < self._reset_timeout or self._probing:
+                return None
+            self._probing = True
+            return "probe"
+
+    def release_probe(self) -> None:
+        """Abandon an unfinished probe (e.g. a cancelled call) so the next call can probe."""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> bool:
+        """Record a retryable failure; return True if this opened the circuit."""
+        with self._lock:
+            self._failures += 1
+            was_open = self._opened_at is not None
+            if self._probing or self._failures >= self._threshold:
+                self._opened_at = self._clock()
+                self._probing = False
+                return not was_open
+            return False
+
+
+_STATS: dict[str, RetryStats] = {}
+_BREAKERS: dict[str, CircuitBreaker] = {}
+_STATS_LOCK = threading.Lock()
+
+
+def _register(name: str, breaker: CircuitBreaker | None) -> RetryStats:
+    with _STATS_LOCK:
+        if breaker is not None:
+            _BREAKERS[name] = breaker
+        return _STATS.setdefault(name, RetryStats())
+
+
+def get_retry_metrics() -> dict[str, dict[str, int | str]]:
+    """Snapshot of counters and circuit state for every named policy in this process."""
+    with _STATS_LOCK:
+        snapshot: dict[str, dict[str, int | str]] = {}
+        for name, stats in _STATS.items():
+            breaker = _BREAKERS.get(name)
+            snapshot[name] = {
+                **asdict(stats),
+                "circuit_state": breaker.state if breaker is not None else "disabled",
+            }
+        return snapshot
+
+
+class RetryPolicy:
+    """Runs a call with exponential backoff and full jitter.
+
+    Non-retryable errors propagate immediately. Retries stop at `max_attempts`
+    or when the next backoff would cross `deadline` seconds from the first
+    attempt. A shared `CircuitBreaker` makes calls fail fast with
+    `CircuitOpenError` while upstream is down. Counters are kept per `name`
+    and exposed by `get_retry_metrics`.
+    """
+
+    def __init__(
+        self,
+        name: str = "massive",
+        max_attempts: int = 4,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+        deadline: float | None = 30.0,
+        breaker: CircuitBreaker | None = None,
+        classify: Callable[[BaseException], bool] = is_retryable,
+        clock: Callable[[], float] = time.monotonic,
+        rng: Callable[[], float] = random.random,
+    ):
+        if max_attempts <= 0:
+            raise ValueError("max_attempts must be a positive integer")
+        self.name = name
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.breaker = breaker
+        self._classify = classify
+        self._clock = clock
+        self._rng = rng
+        self._stats = _register(name, breaker)
+
+    def backoff(self, attempt: int) -> float:
+        return self._rng() * min(self.max_delay, self.base_delay * (2**attempt))
+
+    def call(self, fn: Callable[[], T]) -> T:
+        started, probe = self._begin()
+        try:
+            for attempt in range(self.max_attempts):
+                self._count("attempts")
+                try:
+                    result = fn()
+                except Exception as exc:
+                    delay = self._on_error(exc, attempt, started)
+                    time.sleep(delay)
+                    continue
+                self._on_success()
+                return result
+            raise AssertionError("unreachable")  # pragma: no cover
+        finally:
+            self._end(probe)
+
+    async def call_async(self, fn: Callable[[], Awaitable[T]]) -> T:
+        started, probe = self._begin()
+        try:
+            for attempt in range(self.max_attempts):
+                self._count("attempts")
+                try:
+                    result = await fn()
+                except Exception as exc:
+                    delay = self._on_error(exc, attempt, started)
+                    await asyncio.sleep(delay)
+                    continue
+                self._on_success()
+                return result
+            raise AssertionError("unreachable")  # pragma: no cover
+        finally:
+            # Runs on cancellation too, so a cancelled probe cannot wedge the breaker.
+            self._end(probe)
+
+    def iterate(self, open_stream: Callable[[], Iterable[T]]) -> Iterator[T]:
+        """Yield from a paged stream, reopening it after transient errors.
+
+        `open_stream` is called again on each retry and must resume after the
+        last item already yielded. Progress resets the backoff and deadline, so
+        a long healthy stream is not cut short by one late failure.
+        """
+        started, probe = self._begin()
+        attempt = 0
+        try:
+            while True:
+                self._count("attempts")
+                progressed = False
+                try:
+                    for item in open_stream():
+                        progressed = True
+                        yield item
+                except Exception as exc:
+                    if progressed:
+                        attempt, started = 0, self._clock()
+                    delay = self._on_error(exc, attempt, started)
+                    time.sleep(delay)
+                    attempt += 1
+                    continue
+                self._on_success()
+                return
+        finally:
+            # Also runs when the consumer closes the generator early.
+            self._end(probe)
+
+    def _count(self, *fields: str) -> None:
+        # Policies run on many threads; `+=` on a shared counter is not atomic.
+        with _STATS_LOCK:
+            for field in fields:
+                setattr(self._stats, field, getattr(self._stats, field) + 1)
+
+    def _begin(self) -> tuple[float, bool]:
+        self._count("calls")
+        admitted = "closed" if self.breaker is None else self.breaker.admit()
+        if admitted is None:
+            self._count("circuit_rejections")
+            raise CircuitOpenError(f"{self.name}: circuit open, upstream marked unavailable")
+        return self._clock(), admitted == "probe"
+
+    def _end(self, probe: bool) -> None:
+        # A probe that ended in success or failure has already been cleared.
+        if probe and self.breaker is not None:
+            self.breaker.release_probe()
+
+    def _on_success(self) -> None:
+        self._count("successes")
+        if self.breaker is not None:
+            self.breaker.record_success()
+
+    def _on_error(self, exc: Exception, attempt: int, started: float) -> float:
+        """Return the delay before the next attempt, or re-raise `exc`."""
+        if not self._classify(exc):
+            self._count("non_retryable", "failures")
+            # A permanent error still proves upstream is answering.
+            if self.breaker is not None:
+                self.breaker.record_success()
+            raise exc
+
+        if self.breaker is not None and self.breaker.record_failure():
+            self._count("circuit_opened")
+        if attempt + 1 >= self.max_attempts:
+            self._count("failures")
+            raise exc
+        if self.breaker is not None and self.breaker.state == "open":
+            self._count("failures")
+            raise exc
+
+        delay = self.backoff(attempt)
+        if self.deadline is not None and self._clock() - started + delay > self.deadline:
+            self._count("deadline_exceeded", "failures")
+            raise exc
+        self._count("retries")
+        return delay
+
+
+def build_retry_policy(name: str, deadline: float | None = None) -> RetryPolicy:
+    """Policy configured from MASSIVE_RETRY_* / MASSIVE_CIRCUIT_* settings."""
+    if deadline is None:
+        deadline = config.get_massive_retry_deadline_sec()
+    return RetryPolicy(
+        name=name,
+        max_attempts=config.get_massive_retry_max_attempts(),
+        deadline=deadline,
+        breaker=CircuitBreaker(
+            failure_threshold=config.get_massive_circuit_failures(),
+            reset_timeout=config.get_massive_circuit_reset_sec(),
+        ),
+    )
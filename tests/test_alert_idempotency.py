@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import date, timedelta
 
-from sqlalchemy import func, select
+from sqlalchemy import event, func, select
 
 from dipdetector.analyze import run as analyze_run
 from dipdetector.db import models
@@ -52,3 +52,65 @@ def test_alert_idempotency(tmp_path, monkeypatch):
 
     assert signals_count == 3
     assert alerts_count == 3
+
+
+def test_rerun_updates_rows_in_place_with_batched_statements(tmp_path, monkeypatch):
+    monkeypatch.setenv("DIP_1D_THRESHOLD", "-5.0")
+    monkeypatch.setenv("DIP_NDAY_WINDOW", "2")
+    monkeypatch.setenv("DIP_52W_WINDOW", "3")
+
+    db_session.configure_engine(f"sqlite+pysqlite:///{tmp_path / 'test.db'}")
+    engine = db_session.get_engine()
+    models.Base.metadata.create_all(engine)
+
+    asof_date = date(2024, 1, 3)
+    with db_session.get_session() as session:
+        for symbol in ("AAPL", "MSFT", "NVDA"):
+            ticker = models.Ticker(symbol=symbol)
+            session.add(ticker)
+            session.flush()
+            for offset, close in enumerate([100.0, 100.0, 90.0]):
+                session.add(
+                    models.DailyPrice(
+                        ticker_id=ticker.id,
+                        date=asof_date - timedelta(days=2 - offset),
+                        open=close,
+                        high=close,
+                        low=close,
+                        close=close,
+                        volume=100,
+                        source="massive",
+                    )
+                )
+
+    analyze_run.analyze(asof_date, session_factory=db_session.get_session)
+
+    with db_session.get_session() as session:
+        last = session.execute(
+            select(models.DailyPrice).where(models.DailyPrice.date == asof_date)
+        ).scalars()
+        for price in last:
+            price.close = 80.0
+
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if "signals" in statement or "alerts" in statement:
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        analyze_run.analyze(asof_date, session_factory=db_session.get_session)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert len(statements) == 2
+    with db_session.get_session() as session:
+        alerts = session.execute(select(models.Alert)).scalars().all()
+        signals_count = session.execute(select(func.count(models.Signal.id))).scalar_one()
+
+    assert signals_count == 9
+    assert len(alerts) == 9
+    drop_alerts = [alert for alert in alerts if alert.rule == "drop_1d"]
+    assert {float(alert.magnitude) for alert in drop_alerts} == {-20.0}
+    assert {alert.details_json["asof_close"] for alert in drop_alerts} == {80.0}
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+from sqlalchemy import event
+
+from dipdetector.analyze import run as analyze_run
+from dipdetector.db import models
+from dipdetector.db import session as db_session
+
+
+def _add_prices(session, ticker_id: int, closes: list[float], end: date) -> None:
+    for offset, close in enumerate(reversed(closes)):
+        session.add(
+            models.DailyPrice(
+                ticker_id=ticker_id,
+                date=end - timedelta(days=offset),
+                open=close,
+                high=close,
+                low=close,
+                close=close,
+                volume=100,
+                source="massive",
+            )
+        )
+
+
+def test_trailing_window_per_ticker_from_one_query(tmp_path):
+    db_session.configure_engine(f"sqlite+pysqlite:///{tmp_path / 'test.db'}")
+    engine = db_session.get_engine()
+    models.Base.metadata.create_all(engine)
+    asof = date(2024, 1, 10)
+
+    with db_session.get_session() as session:
+        tickers = [models.Ticker(symbol=symbol) for symbol in ("AAPL", "MSFT", "OLD", "NONE")]
+        tickers[2].active = False
+        session.add_all(tickers)
+        session.flush()
+        _add_prices(session, tickers[0].id, [1.0, 2.0, 3.0, 4.0, 5.0], asof + timedelta(days=1))
+        _add_prices(session, tickers[1].id, [7.0, 8.0], asof)
+        _add_prices(session, tickers[2].id, [9.0, 9.0], asof)
+        ids = [ticker.id for ticker in tickers]
+
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if "daily_prices" in statement:
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        with db_session.get_session() as session:
+            loaded = {
+                ticker_id: prices.price_points()
+                for ticker_id, prices in analyze_run._iter_trailing_prices(
+                    session, "massive", asof, limit=3, batch_size=2
+                )
+            }
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert len(statements) == 1
+    assert loaded == {
+        ids[0]: [
+            (date(2024, 1, 8), 2.0),
+            (date(2024, 1, 9), 3.0),
+            (date(2024, 1, 10), 4.0),
+        ],
+        ids[1]: [(date(2024, 1, 9), 7.0), (date(2024, 1, 10), 8.0)],
+    }
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import random
+from datetime import date, timedelta
+
+from sqlalchemy import select
+
+from dipdetector.analyze import run as analyze_run
+from dipdetector.analyze.history import rolling_max_indices
+from dipdetector.db import models
+from dipdetector.db import session as db_session
+
+
+def test_rolling_max_indices_match_brute_force():
+    rng = random.Random(3)
+    values = [float(rng.randint(0, 5)) for _ in range(200)]
+
+    for window in (1, 2, 7, 30):
+        expected = []
+        for index in range(len(values)):
+            if index + 1 < window:
+                expected.append(None)
+                continue
+            frame = range(index - window + 1, index + 1)
+            peak = max(values[position] for position in frame)
+            expected.append(max(position for position in frame if values[position] == peak))
+        assert rolling_max_indices(values, window) == expected
+
+
+def _snapshot() -> list[tuple]:
+    with db_session.get_session() as session:
+        signals = session.execute(
+            select(
+                models.Signal.ticker_id, models.Signal.date, models.Signal.rule, models.Signal.value
+            ).order_by(models.Signal.ticker_id, models.Signal.date, models.Signal.rule)
+        ).all()
+        alerts = session.execute(
+            select(
+                models.Alert.ticker_id,
+                models.Alert.date,
+                models.Alert.rule,
+                models.Alert.magnitude,
+                models.Alert.threshold,
+                models.Alert.details_json,
+            ).order_by(models.Alert.ticker_id, models.Alert.date, models.Alert.rule)
+        ).all()
+        session.query(models.Signal).delete()
+        session.query(models.Alert).delete()
+    return [tuple(row) for row in signals + alerts]
+
+
+def test_range_matches_single_date_runs(tmp_path, monkeypatch):
+    monkeypatch.setenv("DIP_1D_THRESHOLD", "-2.0")
+    monkeypatch.setenv("DIP_NDAY_WINDOW", "3")
+    monkeypatch.setenv("DIP_NDAY_THRESHOLD", "-4.0")
+    monkeypatch.setenv("DIP_52W_WINDOW", "8")
+    monkeypatch.setenv("DIP_52W_THRESHOLD", "-8.0")
+    db_session.configure_engine(f"sqlite+pysqlite:///{tmp_path / 'test.db'}")
+    models.Base.metadata.create_all(db_session.get_engine())
+
+    rng = random.Random(5)
+    first_day = date(2024, 1, 1)
+    with db_session.get_session() as session:
+        for index, symbol in enumerate(("AAPL", "MSFT", "LATE")):
+            ticker = models.Ticker(symbol=symbol)
+            session.add(ticker)
+            session.flush()
+            for offset in range(index * 12, 40):
+                day = first_day + timedelta(days=offset)
+                if day.weekday() >= 5:
+                    continue
+                close = round(rng.uniform(80, 120), 2)
+                session.add(
+                    models.DailyPrice(
+                        ticker_id=ticker.id,
+                        date=day,
+                        open=close,
+                        high=close,
+                        low=close,
+                        close=close,
+                        volume=100,
+                        source="massive",
+                    )
+                )
+
+    start, end = date(2024, 1, 10), date(2024, 2, 5)
+    day = start
+    while day <= end:
+        analyze_run.analyze(day, session_factory=db_session.get_session)
+        day += timedelta(days=1)
+    per_date = _snapshot()
+
+    analyze_run.analyze_range(start, end, session_factory=db_session.get_session)
+
+    assert _snapshot() == per_date
+    assert {row[1] for row in per_date if len(row) == 4} >= {start, date(2024, 2, 5)}
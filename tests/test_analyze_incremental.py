@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+from sqlalchemy import func, select
+
+from dipdetector.analyze import run as analyze_run
+from dipdetector.db import models
+from dipdetector.db import session as db_session
+from dipdetector.ingest.ingest_prices import resolve_tickers, upsert_daily_prices
+from dipdetector.market.bars import BarSeries
+from dipdetector.providers.base import DailyPriceBar
+
+FIRST_DAY = date(2024, 1, 1)
+
+
+def _bars(closes: list[float]) -> list[DailyPriceBar]:
+    return [
+        DailyPriceBar(FIRST_DAY + timedelta(days=offset), close, close, close, close, 100)
+        for offset, close in enumerate(closes)
+    ]
+
+
+def _rows() -> list[tuple]:
+    with db_session.get_session() as session:
+        signal, alert = models.Signal, models.Alert
+        signals = session.execute(
+            select(signal.ticker_id, signal.date, signal.rule, signal.value).order_by(
+                signal.ticker_id, signal.date, signal.rule
+            )
+        ).all()
+        alerts = session.execute(
+            select(alert.ticker_id, alert.date, alert.rule, alert.details_json).order_by(
+                alert.ticker_id, alert.date, alert.rule
+            )
+        ).all()
+    return [tuple(row) for row in signals + alerts]
+
+
+def _pending() -> int:
+    with db_session.get_session() as session:
+        return session.execute(select(func.count()).select_from(models.PriceChange)).scalar_one()
+
+
+def test_affected_dates_cover_downstream_windows():
+    series = BarSeries.from_daily_bars(_bars([1.0] * 10))
+
+    affected = analyze_run._affected_dates(series, {FIRST_DAY + timedelta(days=2)}, span=3)
+
+    assert sorted(affected) == [FIRST_DAY + timedelta(days=offset) for offset in range(2, 6)]
+
+
+def test_incremental_matches_full_recompute(tmp_path, monkeypatch):
+    monkeypatch.setenv("DIP_1D_THRESHOLD", "-2.0")
+    monkeypatch.setenv("DIP_NDAY_WINDOW", "3")
+    monkeypatch.setenv("DIP_52W_WINDOW", "5")
+    db_session.configure_engine(f"sqlite+pysqlite:///{tmp_path / 'test.db'}")
+    models.Base.metadata.create_all(db_session.get_engine())
+
+    closes = {
+        "AAPL": [100.0, 99.0, 97.0, 98.0, 95.0, 96.0, 94.0, 99.0, 101.0, 100.0, 90.0, 91.0],
+        "MSFT": [50.0, 51.0, 49.0, 48.0, 52.0, 47.0, 46.0, 45.0, 49.0, 50.0, 51.0, 48.0],
+    }
+    asof = FIRST_DAY + timedelta(days=11)
+    with db_session.get_session() as session:
+        ticker_ids = resolve_tickers(session, list(closes))
+        for symbol, values in closes.items():
+            upsert_daily_prices(session, ticker_ids[symbol], "massive", _bars(values))
+    assert _pending() == 24
+
+    analyze_run.analyze_incremental(asof, session_factory=db_session.get_session)
+    assert _pending() == 0
+
+    # A late correction to one AAPL bar; re-sending unchanged MSFT bars logs nothing.
+    closes["AAPL"][4] = 110.0
+    with db_session.get_session() as session:
+        upsert_daily_prices(session, ticker_ids["AAPL"], "massive", _bars(closes["AAPL"]))
+        upsert_daily_prices(session, ticker_ids["MSFT"], "massive", _bars(closes["MSFT"]))
+    assert _pending() == 1
+
+    analyze_run.analyze_incremental(asof, session_factory=db_session.get_session)
+    incremental = _rows()
+    assert _pending() == 0
+
+    with db_session.get_session() as session:
+        session.query(models.Signal).delete()
+        session.query(models.Alert).delete()
+    analyze_run.analyze_range(FIRST_DAY, asof, session_factory=db_session.get_session)
+
+    assert incremental == _rows()
+    correction = FIRST_DAY + timedelta(days=4)
+    assert any(row[1] == correction and row[2] == "drop_1d" for row in incremental)
+
+
+def test_incremental_loads_each_ticker_from_its_own_change(tmp_path, monkeypatch):
+    monkeypatch.setenv("DIP_NDAY_WINDOW", "3")
+    monkeypatch.setenv("DIP_52W_WINDOW", "5")
+    db_session.configure_engine(f"sqlite+pysqlite:///{tmp_path / 'test.db'}")
+    models.Base.metadata.create_all(db_session.get_engine())
+
+    asof = FIRST_DAY + timedelta(days=11)
+    with db_session.get_session() as session:
+        ticker_ids = resolve_tickers(session, ["AAPL", "MSFT", "NVDA"])
+        for ticker_id in ticker_ids.values():
+            upsert_daily_prices(session, ticker_id, "massive", _bars([100.0] * 12))
+    analyze_run.analyze_incremental(asof, session_factory=db_session.get_session)
+
+    # An old AAPL correction must not widen the scan for the tickers that only got a new bar.
+    with db_session.get_session() as session:
+        upsert_daily_prices(session, ticker_ids["AAPL"], "massive", _bars([100.0, 90.0]))
+        for symbol in ("MSFT", "NVDA"):
+            bars = _bars([100.0] * 11 + [95.0])
+            upsert_daily_prices(session, ticker_ids[symbol], "massive", bars)
+
+    starts: dict[int, date] = {}
+    original = analyze_run._iter_trailing_prices
+
+    def recording_iter(session, source, asof_date, limit, **kwargs):
+        for ticker_id in kwargs["ticker_ids"]:
+            starts[ticker_id] = kwargs["start_date"]
+        return original(session, source, asof_date, limit, **kwargs)
+
+    monkeypatch.setattr(analyze_run, "_iter_trailing_prices", recording_iter)
+    analyze_run.analyze_incremental(asof, session_factory=db_session.get_session)
+
+    assert starts == {
+        ticker_ids["AAPL"]: FIRST_DAY + timedelta(days=1),
+        ticker_ids["MSFT"]: asof,
+        ticker_ids["NVDA"]: asof,
+    }
+    assert _pending() == 0
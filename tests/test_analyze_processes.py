@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import random
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from dipdetector.analyze import run as analyze_run
+from dipdetector.db import models
+from dipdetector.db import session as db_session
+
+ASOF = date(2024, 3, 1)
+
+
+def _snapshot() -> list[tuple]:
+    with db_session.get_session() as session:
+        signals = session.execute(
+            select(models.Signal.ticker_id, models.Signal.rule, models.Signal.value).order_by(
+                models.Signal.ticker_id, models.Signal.rule
+            )
+        ).all()
+        alerts = session.execute(
+            select(models.Alert.ticker_id, models.Alert.rule, models.Alert.details_json).order_by(
+                models.Alert.ticker_id, models.Alert.rule
+            )
+        ).all()
+        session.query(models.Signal).delete()
+        session.query(models.Alert).delete()
+    return [tuple(row) for row in signals + alerts]
+
+
+@pytest.mark.parametrize("engine", ["loop", "vectorized"])
+def test_process_shards_match_single_process(tmp_path, monkeypatch, engine):
+    monkeypatch.setenv("DIP_NDAY_WINDOW", "5")
+    monkeypatch.setenv("DIP_52W_WINDOW", "10")
+    db_session.configure_engine(f"sqlite+pysqlite:///{tmp_path / 'test.db'}")
+    models.Base.metadata.create_all(db_session.get_engine())
+
+    rng = random.Random(17)
+    with db_session.get_session() as session:
+        for index in range(7):
+            ticker = models.Ticker(symbol=f"T{index}")
+            session.add(ticker)
+            session.flush()
+            for offset in range(12):
+                close = round(rng.uniform(50, 150), 2)
+                session.add(
+                    models.DailyPrice(
+                        ticker_id=ticker.id,
+                        date=ASOF - timedelta(days=offset),
+                        open=close,
+                        high=close,
+                        low=close,
+                        close=close,
+                        volume=100,
+                        source="massive",
+                    )
+                )
+
+    analyze_run.analyze(ASOF, session_factory=db_session.get_session, engine=engine)
+    single = _snapshot()
+    analyze_run.analyze(ASOF, session_factory=db_session.get_session, engine=engine, processes=3)
+
+    assert _snapshot() == single
+    assert len({row[0] for row in single}) == 7
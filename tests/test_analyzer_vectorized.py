@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import random
+from datetime import date, timedelta
+
+from sqlalchemy import select
+
+from dipdetector.analyze import rules, vectorized
+from dipdetector.analyze import run as analyze_run
+from dipdetector.db import models
+from dipdetector.db import session as db_session
+from dipdetector.market.bars import BarSeries
+from dipdetector.providers.base import DailyPriceBar
+
+ASOF = date(2024, 3, 1)
+
+
+def _series(closes: list[float], end: date = ASOF, gap_every: int = 0) -> BarSeries:
+    bars = []
+    day = end
+    for index, close in enumerate(reversed(closes)):
+        bars.append(DailyPriceBar(day, close, close, close, close, volume=None))
+        day -= timedelta(days=2 if gap_every and index % gap_every == 0 else 1)
+    return BarSeries.from_daily_bars(bars)
+
+
+def _reference(prices: BarSeries, windows: tuple[int, ...]) -> vectorized.RuleResults:
+    results: vectorized.RuleResults = {}
+    value_1d = rules.compute_1d_drop(prices, ASOF)
+    if value_1d is not None:
+        results["drop_1d"] = (value_1d, rules.get_prev_close_details(prices, ASOF))
+    for window in windows:
+        drawdown = rules.compute_drawdown(prices, ASOF, window)
+        if drawdown is not None:
+            results[f"drawdown_{window}d"] = drawdown
+    return results
+
+
+def test_matches_per_ticker_rules():
+    rng = random.Random(7)
+    universe = {
+        "flat": _series([10.0] * 30),
+        "ties": _series([5.0, 9.0, 7.0, 9.0, 8.0, 6.0]),
+        "short": _series([1.0]),
+        "zero_prev": _series([0.0, 3.0]),
+        "zero_max": _series([0.0] * 6),
+        "stale": _series([4.0, 3.0, 2.0], end=ASOF - timedelta(days=1)),
+        "future": _series([4.0, 3.0, 2.0, 1.0], end=ASOF + timedelta(days=1)),
+    }
+    for index in range(20):
+        closes = [round(rng.uniform(1, 200), 2) for _ in range(rng.randint(2, 40))]
+        universe[f"random{index}"] = _series(closes, gap_every=rng.randint(0, 4))
+
+    windows = (5, 20)
+    expected = {key: _reference(prices, windows) for key, prices in universe.items()}
+
+    assert vectorized.evaluate_universe(universe, ASOF, windows) == expected
+    assert expected["ties"]["drawdown_5d"][1]["rolling_max_date"] == "2024-02-28"
+    assert expected["short"] == {}
+
+
+def _snapshot() -> list[tuple]:
+    with db_session.get_session() as session:
+        signals = session.execute(
+            select(models.Signal.ticker_id, models.Signal.rule, models.Signal.value).order_by(
+                models.Signal.ticker_id, models.Signal.rule
+            )
+        ).all()
+        alerts = session.execute(
+            select(
+                models.Alert.ticker_id,
+                models.Alert.rule,
+                models.Alert.magnitude,
+                models.Alert.threshold,
+                models.Alert.details_json,
+            ).order_by(models.Alert.ticker_id, models.Alert.rule)
+        ).all()
+        session.query(models.Signal).delete()
+        session.query(models.Alert).delete()
+    return [tuple(row) for row in signals + alerts]
+
+
+def test_engines_write_identical_rows(tmp_path, monkeypatch):
+    monkeypatch.setenv("DIP_1D_THRESHOLD", "-1.0")
+    monkeypatch.setenv("DIP_NDAY_WINDOW", "5")
+    monkeypatch.setenv("DIP_NDAY_THRESHOLD", "-5.0")
+    monkeypatch.setenv("DIP_52W_WINDOW", "15")
+    monkeypatch.setenv("DIP_52W_THRESHOLD", "-5.0")
+    db_session.configure_engine(f"sqlite+pysqlite:///{tmp_path / 'test.db'}")
+    models.Base.metadata.create_all(db_session.get_engine())
+
+    rng = random.Random(11)
+    with db_session.get_session() as session:
+        for index in range(8):
+            ticker = models.Ticker(symbol=f"T{index}")
+            session.add(ticker)
+            session.flush()
+            for offset in range(rng.randint(1, 25)):
+                close = round(rng.uniform(50, 150), 2)
+                session.add(
+                    models.DailyPrice(
+                        ticker_id=ticker.id,
+                        date=ASOF - timedelta(days=offset),
+                        open=close,
+                        high=close,
+                        low=close,
+                        close=close,
+                        volume=100,
+                        source="massive",
+                    )
+                )
+
+    analyze_run.analyze(ASOF, session_factory=db_session.get_session)
+    from_loop = _snapshot()
+    analyze_run.analyze(ASOF, session_factory=db_session.get_session, engine="vectorized")
+
+    assert _snapshot() == from_loop
+    assert any(row[1] == "drawdown_15d" for row in from_loop)
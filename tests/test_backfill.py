@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+from sqlalchemy import func, select
+
+from dipdetector.db import models
+from dipdetector.db import session as db_session
+from dipdetector.ingest import backfill
+from dipdetector.providers.base import DailyPriceBar
+
+
+class HistoryProvider:
+    def __init__(self):
+        self.calls: list[str] = []
+
+    def fetch_daily_prices(self, symbol, start, end):
+        self.calls.append(symbol)
+        days = (end - start).days + 1
+        return [
+            DailyPriceBar(
+                date=start + timedelta(days=offset),
+                open=1.0,
+                high=1.0,
+                low=1.0,
+                close=1.0,
+                volume=None if offset == 0 else 10,
+            )
+            for offset in range(days)
+        ]
+
+
+def test_backfill_loads_in_chunks_and_resumes(tmp_path):
+    db_url = f"sqlite+pysqlite:///{tmp_path / 'test.db'}"
+    db_session.configure_engine(db_url)
+    models.Base.metadata.create_all(db_session.get_engine())
+
+    provider = HistoryProvider()
+    backfill.backfill_prices(
+        days=40,
+        provider=provider,
+        session_factory=db_session.get_session,
+        tickers=["AAPL", "MSFT"],
+        chunk_size=7,
+    )
+    backfill.backfill_prices(
+        days=40,
+        provider=provider,
+        session_factory=db_session.get_session,
+        tickers=["AAPL", "MSFT", "NVDA"],
+        chunk_size=7,
+    )
+
+    assert provider.calls == ["AAPL", "MSFT", "NVDA"]
+    with db_session.get_session() as session:
+        count = session.execute(select(func.count(models.DailyPrice.id))).scalar_one()
+    assert count == 3 * 41
+
+
+def test_resume_skips_tickers_whose_history_starts_late(tmp_path):
+    db_session.configure_engine(f"sqlite+pysqlite:///{tmp_path / 'test.db'}")
+    models.Base.metadata.create_all(db_session.get_engine())
+
+    class RecentListingProvider(HistoryProvider):
+        def fetch_daily_prices(self, symbol, start, end):
+            # Listed ten days ago: nothing older exists upstream.
+            return super().fetch_daily_prices(symbol, end - timedelta(days=10), end)
+
+    provider = RecentListingProvider()
+    for _ in range(2):
+        backfill.backfill_prices(
+            days=40, provider=provider, session_factory=db_session.get_session, tickers=["IPO"]
+        )
+    # A wider backfill is not covered by the recorded one.
+    backfill.backfill_prices(
+        days=80, provider=provider, session_factory=db_session.get_session, tickers=["IPO"]
+    )
+
+    assert provider.calls == ["IPO", "IPO"]
+    with db_session.get_session() as session:
+        state = session.execute(select(models.BackfillState)).scalar_one()
+    assert state.backfilled_from == date.today() - timedelta(days=80)
+
+
+def test_bars_to_csv_renders_missing_volume_as_null():
+    bars = [
+        DailyPriceBar(date=date(2024, 1, 2), open=1.5, high=2.0, low=1.0, close=1.75, volume=None),
+        DailyPriceBar(date=date(2024, 1, 3), open=1.0, high=1.0, low=1.0, close=1.0, volume=7),
+    ]
+
+    payload = backfill.bars_to_csv(3, "massive", bars).read()
+
+    assert payload == (
+        "3,2024-01-02,1.5,2.0,1.0,1.75,,massive\n"
+        "3,2024-01-03,1.0,1.0,1.0,1.0,7,massive\n"
+    )
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import csv
+import io
+import random
+import statistics
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from dipdetector.analyze import backtest, registry, rules
+from dipdetector.db import models
+from dipdetector.db import session as db_session
+from dipdetector.market.bars import BarSeries
+from dipdetector.providers.base import DailyPriceBar
+
+FIRST_DAY = date(2024, 1, 1)
+
+
+def _series(closes: list[float], rng: random.Random) -> BarSeries:
+    bars = []
+    day = FIRST_DAY
+    for close in closes:
+        bars.append(DailyPriceBar(day, close, close, close, close, volume=None))
+        day += timedelta(days=rng.choice([1, 1, 1, 3]))
+    return BarSeries.from_daily_bars(bars)
+
+
+def test_rolling_max_matches_brute_force():
+    rng = np.random.default_rng(1)
+    closes = rng.integers(1, 9, size=(3, 40)).astype(float)
+
+    for window in (1, 2, 5, 13, 40, 41):
+        result = backtest.rolling_max(closes, window)
+        for row in range(3):
+            for column in range(40):
+                if column + 1 < window:
+                    assert np.isnan(result[row, column])
+                else:
+                    frame = closes[row, column - window + 1 : column + 1]
+                    assert result[row, column] == frame.max()
+
+
+def test_run_backtest_matches_rules_replay():
+    rng = random.Random(21)
+    prices = {
+        f"T{index}": _series(
+            [round(rng.uniform(80, 120), 2) for _ in range(rng.randint(1, 60))], rng
+        )
+        for index in range(12)
+    }
+    start, end = FIRST_DAY + timedelta(days=10), FIRST_DAY + timedelta(days=50)
+    grid = [
+        registry.RuleSpec("drop_1d", registry.DROP_1D, (-2.0, -5.0)),
+        registry.RuleSpec("drawdown_7d", registry.DRAWDOWN, (-5.0, -10.0, -15.0), 7),
+    ]
+    horizons = (1, 5)
+
+    rows = backtest.run_backtest(prices, start, end, grid, horizons)
+
+    replayed = {}
+    for rule in grid:
+        for threshold in rule.thresholds:
+            alerts = []
+            for symbol, series in prices.items():
+                points = series.price_points()
+                for index, (day, close) in enumerate(points):
+                    if not start <= day <= end:
+                        continue
+                    if rule.kind == registry.DROP_1D:
+                        value = rules.compute_1d_drop(points, day)
+                    else:
+                        result = rules.compute_drawdown(points, day, rule.window)
+                        value = None if result is None else result[0]
+                    if value is not None and value <= threshold:
+                        ahead = {
+                            horizon: (points[index + horizon][1] / close - 1.0) * 100.0
+                            for horizon in horizons
+                            if index + horizon < len(points)
+                        }
+                        alerts.append((symbol, ahead))
+            replayed[(rule.name, threshold)] = alerts
+
+    assert [row.rule for row in rows[:1]] == ["baseline"]
+    assert len(rows) == 6
+    for row in rows[1:]:
+        alerts = replayed[(row.rule, row.threshold)]
+        assert row.alerts == len(alerts)
+        assert row.tickers == len({symbol for symbol, _ in alerts})
+        for horizon in horizons:
+            returns = [ahead[horizon] for _, ahead in alerts if horizon in ahead]
+            stats = row.returns[horizon]
+            assert stats.count == len(returns)
+            if returns:
+                assert stats.mean == pytest.approx(statistics.fmean(returns))
+                assert stats.median == pytest.approx(statistics.median(returns))
+                assert stats.hit_rate == pytest.approx(
+                    100.0 * sum(value > 0 for value in returns) / len(returns)
+                )
+    assert any(row.alerts for row in rows[1:])
+
+
+def test_rules_without_thresholds_are_skipped():
+    rng = random.Random(3)
+    prices = {"T": _series([100.0, 90.0, 95.0, 80.0], rng)}
+    grid = [registry.RuleSpec("drawdown_3d", registry.DRAWDOWN, (), 3)]
+
+    rows = backtest.run_backtest(prices, FIRST_DAY, FIRST_DAY + timedelta(days=30), grid, (1,))
+
+    assert [row.rule for row in rows] == ["baseline"]
+    assert backtest.default_grid([], [5, 20], []) == []
+    assert [rule.name for rule in backtest.default_grid([-3.0], None, [])] == ["drop_1d"]
+
+
+def test_backtest_loads_universe_and_writes_csv(tmp_path, monkeypatch):
+    monkeypatch.setenv("DIP_NDAY_WINDOW", "3")
+    monkeypatch.setenv("DIP_52W_WINDOW", "5")
+    db_session.configure_engine(f"sqlite+pysqlite:///{tmp_path / 'test.db'}")
+    models.Base.metadata.create_all(db_session.get_engine())
+    closes = [100.0, 90.0, 95.0, 80.0, 85.0, 88.0, 92.0, 70.0, 75.0, 90.0]
+    with db_session.get_session() as session:
+        ticker = models.Ticker(symbol="AAA")
+        session.add(ticker)
+        session.flush()
+        for offset, close in enumerate(closes):
+            session.add(
+                models.DailyPrice(
+                    ticker_id=ticker.id,
+                    date=FIRST_DAY + timedelta(days=offset),
+                    open=close,
+                    high=close,
+                    low=close,
+                    close=close,
+                    volume=100,
+                    source="massive",
+                )
+            )
+
+    horizons = (2,)
+    start = FIRST_DAY + timedelta(days=3)
+    rows = backtest.backtest(
+        start,
+        FIRST_DAY + timedelta(days=7),
+        backtest.default_grid([-10.0], drawdown_thresholds=[-10.0]),
+        session_factory=db_session.get_session,
+        horizons=horizons,
+    )
+
+    by_rule = {row.rule: row for row in rows}
+    assert set(by_rule) == {"baseline", "drop_1d", "drawdown_3d", "drawdown_5d"}
+    assert by_rule["baseline"].alerts == 5
+    # Drops of 15.8% on day 3 and 23.9% on day 7; the first can look back before `start`.
+    assert by_rule["drop_1d"].alerts == 2
+    assert by_rule["drop_1d"].returns[2].count == 2
+
+    out = io.StringIO()
+    backtest.write_csv(rows, horizons, out)
+    lines = list(csv.reader(io.StringIO(out.getvalue())))
+    assert lines[0] == [
+        "rule",
+        "threshold",
+        "alerts",
+        "tickers",
+        "fwd_2d_count",
+        "fwd_2d_mean",
+        "fwd_2d_median",
+        "fwd_2d_hit_rate",
+    ]
+    assert len(lines) == 5
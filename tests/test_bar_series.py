@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from datetime import date
+
+import numpy as np
+from sqlalchemy import select
+
+from dipdetector.analyze import rules
+from dipdetector.db import models
+from dipdetector.db import session as db_session
+from dipdetector.ingest import ingest_prices
+from dipdetector.market.bars import MS_PER_DAY, BarSeries, BarSeriesBuilder
+from dipdetector.providers.base import DailyPriceBar
+
+
+def _bars() -> list[DailyPriceBar]:
+    return [
+        DailyPriceBar(date=date(2024, 1, 3), open=11.0, high=12.0, low=10.5, close=11.5, volume=None),
+        DailyPriceBar(date=date(2024, 1, 2), open=10.0, high=11.0, low=9.5, close=10.5, volume=100),
+    ]
+
+
+def test_daily_bars_round_trip_in_date_order():
+    series = BarSeries.from_daily_bars(_bars())
+
+    assert len(series) == 2
+    assert series.nbytes == 2 * 6 * 8
+    assert series.last_date == date(2024, 1, 3)
+    assert series.to_daily_bars() == sorted(_bars(), key=lambda bar: bar.date)
+    assert series.price_points() == [(date(2024, 1, 2), 10.5), (date(2024, 1, 3), 11.5)]
+    assert np.isnan(series.volume[-1])
+
+
+def test_agg_dicts_round_trip_and_concat():
+    first = BarSeries.from_agg_dicts([{"t": 2000, "o": 2, "h": 2, "l": 2, "c": 2, "v": 5}])
+    second = BarSeries.from_agg_dicts([{"t": 1000, "o": 1, "h": 1, "l": 1, "c": 1}])
+
+    merged = BarSeries.concat([first, BarSeries.empty(), second])
+
+    assert merged.to_agg_dicts() == [
+        {"t": 1000, "o": 1.0, "h": 1.0, "l": 1.0, "c": 1.0, "v": 0.0},
+        {"t": 2000, "o": 2.0, "h": 2.0, "l": 2.0, "c": 2.0, "v": 5.0},
+    ]
+    assert merged[1:].to_agg_dicts()[0]["t"] == 2000
+
+
+def test_builder_and_columns_agree():
+    builder = BarSeriesBuilder()
+    builder.append(MS_PER_DAY, 1, 2, 0.5, 1.5, 10)
+    from_builder = builder.build()
+    from_columns = BarSeries.from_columns([MS_PER_DAY], [1], [2], [0.5], [1.5], [10])
+
+    assert list(from_builder.rows()) == list(from_columns.rows())
+    assert rules.compute_1d_drop(from_builder, date(1970, 1, 2)) is None
+
+
+def test_upsert_daily_prices_accepts_bar_series(tmp_path):
+    db_session.configure_engine(f"sqlite+pysqlite:///{tmp_path / 'test.db'}")
+    models.Base.metadata.create_all(db_session.get_engine())
+
+    with db_session.get_session() as session:
+        ticker_ids = ingest_prices.resolve_tickers(session, ["AAPL"])
+        counts = ingest_prices.upsert_daily_prices(
+            session, ticker_ids["AAPL"], "massive", BarSeries.from_daily_bars(_bars())
+        )
+        rows = session.execute(
+            select(models.DailyPrice.date, models.DailyPrice.volume).order_by(models.DailyPrice.date)
+        ).all()
+
+    assert counts == (2, 0, 0)
+    assert rows == [(date(2024, 1, 2), 100), (date(2024, 1, 3), None)]
@@ -4,22 +4,69 @@ from fastapi.testclient import TestClient
 
 from dipdetector.api.main import app
 from dipdetector.api.routes import chart as chart_routes
+from dipdetector.market.bars import BarSeries
 
 
 class FakeProvider:
-    def fetch_intraday_bars(self, symbol, lookback_minutes, timespan, multiplier):
+    async def iter_intraday_series(self, symbol, lookback_minutes, timespan, multiplier):
         assert symbol == "AAPL"
         assert lookback_minutes == 60
         assert timespan == "minute"
         assert multiplier == 1
-        return [
-            {"t": 1, "o": 10.0, "h": 12.0, "l": 9.0, "c": 11.0, "v": 100.0},
-            {"t": 2, "o": 11.0, "h": 13.0, "l": 10.0, "c": 12.0, "v": 200.0},
-        ]
+        yield BarSeries.from_agg_dicts(
+            [{"t": 1, "o": 10.0, "h": 12.0, "l": 9.0, "c": 11.0, "v": 100.0}]
+        )
+        yield BarSeries.from_agg_dicts(
+            [{"t": 2, "o": 11.0, "h": 13.0, "l": 10.0, "c": 12.0, "v": 200.0}]
+        )
+
+
+class ManyBarsProvider:
+    def __init__(self, count: int, page_size: int = 1000):
+        self.count = count
+        self.page_size = page_size
+
+    async def iter_aggregate_series(self, symbol, start_dt, end_dt, timespan, multiplier):
+        for start in range(0, self.count, self.page_size):
+            t = list(range(start, min(start + self.page_size, self.count)))
+            ones = [1.0] * len(t)
+            yield BarSeries.from_columns(t, ones, ones, ones, ones, ones)
+
+
+class ClosableProvider(ManyBarsProvider):
+    closed = False
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+
+class FailingProvider:
+    async def iter_intraday_series(self, symbol, lookback_minutes, timespan, multiplier):
+        raise RuntimeError("upstream down")
+        yield  # pragma: no cover
+
+
+def test_chart_provider_is_closed_with_the_app(monkeypatch):
+    created: list[ClosableProvider] = []
+
+    def build(*args, **kwargs):
+        created.append(ClosableProvider(0))
+        return created[-1]
+
+    monkeypatch.setattr(chart_routes, "AsyncMassiveProvider", build)
+    monkeypatch.setattr(chart_routes.config, "get_massive_api_key", lambda: "test-key")
+
+    for _ in range(2):
+        with TestClient(app) as client:
+            assert client.get("/chart/daily/AAPL").status_code == 200
+            assert client.get("/chart/daily/MSFT").status_code == 200
+
+    assert len(created) == 2
+    assert all(provider.closed for provider in created)
 
 
 def test_chart_intraday_endpoint(monkeypatch):
-    monkeypatch.setattr(chart_routes, "_get_provider", lambda: FakeProvider())
+    monkeypatch.setattr(chart_routes, "_get_provider", lambda request: FakeProvider())
     monkeypatch.setattr(chart_routes.config, "get_live_chart_timespan", lambda: "minute")
     monkeypatch.setattr(chart_routes.config, "get_live_chart_multiplier", lambda: 1)
     monkeypatch.setattr(chart_routes.config, "get_live_chart_lookback_minutes", lambda: 390)
@@ -34,6 +81,35 @@ def test_chart_intraday_endpoint(monkeypatch):
     assert payload["bars"][0]["t"] == 1
 
 
+def test_chart_daily_endpoint_streams_pages(monkeypatch):
+    monkeypatch.setattr(chart_routes, "_get_provider", lambda request: ManyBarsProvider(2500))
+
+    client = TestClient(app)
+    response = client.get("/chart/daily/msft", params={"timespan": "minute"})
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["symbol"] == "MSFT"
+    assert payload["timespan"] == "minute"
+    assert [bar["t"] for bar in payload["bars"]] == list(range(2500))
+
+
+def test_chart_endpoint_returns_empty_bars(monkeypatch):
+    monkeypatch.setattr(chart_routes, "_get_provider", lambda request: ManyBarsProvider(0))
+
+    client = TestClient(app)
+    response = client.get("/chart/daily/AAPL")
+    assert response.status_code == 200
+    assert response.json() == {"symbol": "AAPL", "timespan": "day", "bars": []}
+
+
+def test_chart_intraday_upstream_failure_is_502(monkeypatch):
+    monkeypatch.setattr(chart_routes, "_get_provider", lambda request: FailingProvider())
+
+    client = TestClient(app)
+    response = client.get("/chart/intraday/AAPL", params={"lookback_minutes": 60})
+    assert response.status_code == 502
+
+
 class FakeFanout:
     async def register_client(self, symbol, ws):
         await ws.send_json(
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import threading
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from dipdetector.db import models
+from dipdetector.db import session as db_session
+from dipdetector.ingest import ingest_prices
+from dipdetector.providers.base import DailyPriceBar
+
+
+class RecordingProvider:
+    def __init__(self):
+        self.threads: set[str] = set()
+        self.symbols: list[str] = []
+        self._lock = threading.Lock()
+
+    def fetch_daily_prices(self, symbol, start, end):
+        with self._lock:
+            self.threads.add(threading.current_thread().name)
+            self.symbols.append(symbol)
+        close = float(len(symbol))
+        return [
+            DailyPriceBar(
+                date=end - timedelta(days=offset),
+                open=close,
+                high=close,
+                low=close,
+                close=close,
+                volume=100,
+            )
+            for offset in range(3)
+        ]
+
+
+def test_ingest_with_workers_writes_every_ticker(tmp_path):
+    db_url = f"sqlite+pysqlite:///{tmp_path / 'test.db'}"
+    db_session.configure_engine(db_url)
+    models.Base.metadata.create_all(db_session.get_engine())
+
+    symbols = ["AAPL", "MSFT", "NVDA", "V", "KO", "AAPL"]
+    provider = RecordingProvider()
+
+    ingest_prices.ingest_prices(
+        days=30,
+        provider=provider,
+        session_factory=db_session.get_session,
+        tickers=symbols,
+        workers=4,
+    )
+
+    assert sorted(provider.symbols) == sorted(set(symbols))
+    assert all(name.startswith("ingest") for name in provider.threads)
+
+    with db_session.get_session() as session:
+        tickers = session.execute(select(models.Ticker)).scalars().all()
+        rows = session.execute(select(models.DailyPrice)).scalars().all()
+
+    assert sorted(ticker.symbol for ticker in tickers) == sorted(set(symbols))
+    assert len(rows) == 3 * len(set(symbols))
+    assert {row.date for row in rows} == {date.today() - timedelta(days=n) for n in range(3)}
+
+
+def test_ingest_rejects_non_positive_workers():
+    with pytest.raises(ValueError):
+        ingest_prices.ingest_prices(days=30, provider=RecordingProvider(), workers=0)
+
+
+class StreamingProvider:
+    def __init__(self):
+        self.pulled = 0
+
+    def fetch_daily_prices(self, symbol, start, end):
+        raise AssertionError("streaming providers should not be buffered")
+
+    def iter_daily_prices(self, symbol, start, end):
+        current = start
+        while current <= end:
+            self.pulled += 1
+            yield DailyPriceBar(
+                date=current, open=1.0, high=1.0, low=1.0, close=1.0, volume=10
+            )
+            current += timedelta(days=1)
+
+
+def test_ingest_streams_bars_in_chunks(tmp_path, monkeypatch):
+    db_url = f"sqlite+pysqlite:///{tmp_path / 'test.db'}"
+    db_session.configure_engine(db_url)
+    models.Base.metadata.create_all(db_session.get_engine())
+    monkeypatch.setenv("INGEST_CHUNK_SIZE", "4")
+
+    upserted: list[int] = []
+    original = ingest_prices.upsert_daily_prices
+
+    def recording_upsert(session, ticker_id, source, bars, windows=None):
+        upserted.append(len(bars))
+        return original(session, ticker_id, source, bars, windows)
+
+    monkeypatch.setattr(ingest_prices, "upsert_daily_prices", recording_upsert)
+    provider = StreamingProvider()
+
+    ingest_prices.ingest_prices(
+        days=9, provider=provider, session_factory=db_session.get_session, tickers=["AAPL"]
+    )
+
+    assert upserted == [4, 4, 2]
+    with db_session.get_session() as session:
+        rows = session.execute(select(models.DailyPrice)).scalars().all()
+        state = session.execute(select(models.IngestState)).scalar_one()
+    assert len(rows) == provider.pulled == 10
+    assert state.last_bar_date == date.today()
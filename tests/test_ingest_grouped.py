@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from dipdetector.db import models
+from dipdetector.db import session as db_session
+from dipdetector.ingest import ingest_prices
+from dipdetector.providers.base import DailyPriceBar
+
+
+def _bar(day: date, close: float) -> DailyPriceBar:
+    return DailyPriceBar(date=day, open=close, high=close, low=close, close=close, volume=10)
+
+
+class GroupedProvider:
+    def __init__(self):
+        self.days: list[date] = []
+
+    def fetch_daily_prices(self, symbol, start, end):
+        raise AssertionError("grouped ingest must not fetch per symbol")
+
+    def fetch_grouped_daily(self, day):
+        self.days.append(day)
+        return {"AAPL": _bar(day, 100.0), "MSFT": _bar(day, 200.0), "ZZZZ": _bar(day, 1.0)}
+
+
+def test_grouped_ingest_filters_to_universe(tmp_path):
+    db_url = f"sqlite+pysqlite:///{tmp_path / 'test.db'}"
+    db_session.configure_engine(db_url)
+    models.Base.metadata.create_all(db_session.get_engine())
+
+    provider = GroupedProvider()
+    ingest_prices.ingest_prices(
+        days=10,
+        provider=provider,
+        session_factory=db_session.get_session,
+        tickers=["AAPL", "MSFT"],
+        grouped=True,
+    )
+
+    today = date.today()
+    expected_days = [
+        today - timedelta(days=offset)
+        for offset in range(10, -1, -1)
+        if (today - timedelta(days=offset)).weekday() < 5
+    ]
+    assert provider.days == expected_days
+
+    with db_session.get_session() as session:
+        rows = session.execute(
+            select(models.Ticker.symbol, models.DailyPrice.date).join(models.DailyPrice)
+        ).all()
+
+    assert {symbol for symbol, _ in rows} == {"AAPL", "MSFT"}
+    assert len(rows) == 2 * len(expected_days)
+
+
+def test_grouped_ingest_requires_grouped_provider():
+    class PerSymbolProvider:
+        def fetch_daily_prices(self, symbol, start, end):
+            return []
+
+    with pytest.raises(ValueError):
+        ingest_prices.ingest_prices(
+            days=5,
+            provider=PerSymbolProvider(),
+            tickers=["AAPL"],
+            grouped=True,
+        )
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, select
+
+from dipdetector.db import models
+from dipdetector.db import session as db_session
+from dipdetector.ingest import sharded
+from dipdetector.ingest.ingest_prices import resolve_tickers
+from dipdetector.providers.base import DailyPriceBar
+
+
+class CountingProvider:
+    def __init__(self):
+        self.symbols: list[str] = []
+
+    def fetch_daily_prices(self, symbol, start, end):
+        self.symbols.append(symbol)
+        return [DailyPriceBar(date=end, open=1.0, high=1.0, low=1.0, close=1.0, volume=10)]
+
+
+def _configure(tmp_path):
+    db_session.configure_engine(f"sqlite+pysqlite:///{tmp_path / 'test.db'}")
+    models.Base.metadata.create_all(db_session.get_engine())
+
+
+def _seed(symbols: list[str], run_id: str = "run-1") -> dict[str, int]:
+    with db_session.get_session() as session:
+        ticker_ids = resolve_tickers(session, symbols)
+        sharded.seed_leases(session, run_id, "massive", list(ticker_ids.values()))
+    return ticker_ids
+
+
+def test_claims_do_not_overlap_and_expired_leases_are_reclaimed(tmp_path):
+    _configure(tmp_path)
+    ticker_ids = _seed(["AAPL", "MSFT", "NVDA"])
+    now = datetime(2024, 1, 2, 12, 0, tzinfo=timezone.utc)
+
+    with db_session.get_session() as session:
+        first = sharded.claim_leases(session, "run-1", "massive", "a", 2, 60, now=now)
+        second = sharded.claim_leases(session, "run-1", "massive", "b", 2, 60, now=now)
+        nothing = sharded.claim_leases(session, "run-1", "massive", "c", 2, 60, now=now)
+
+    assert len(first) == 2
+    assert len(second) == 1
+    assert set(first).isdisjoint(second)
+    assert nothing == []
+
+    later = now + timedelta(seconds=61)
+    with db_session.get_session() as session:
+        reclaimed = sharded.claim_leases(session, "run-1", "massive", "c", 10, 60, now=later)
+    assert sorted(reclaimed) == sorted(ticker_ids.values())
+
+    # The original owners lost their leases and must not write.
+    with db_session.get_session() as session:
+        assert not sharded.complete_lease(session, "run-1", "massive", first[0], "a")
+        assert sharded.complete_lease(session, "run-1", "massive", first[0], "c")
+
+
+def test_workers_split_run_and_pick_up_abandoned_tickers(tmp_path):
+    _configure(tmp_path)
+    symbols = ["AAPL", "MSFT", "NVDA", "KO", "V"]
+    ticker_ids = _seed(symbols)
+
+    # A crashed worker left two tickers leased with an expired lease.
+    with db_session.get_session() as session:
+        sharded.claim_leases(
+            session,
+            "run-1",
+            "massive",
+            "crashed",
+            2,
+            60,
+            now=datetime.now(timezone.utc) - timedelta(hours=1),
+        )
+
+    first, second = CountingProvider(), CountingProvider()
+    written = [
+        sharded.run_worker(
+            days=5,
+            run_id="run-1",
+            provider=provider,
+            session_factory=db_session.get_session,
+            tickers=symbols,
+            batch_size=2,
+            lease_seconds=60,
+            worker_id=name,
+        )
+        for name, provider in (("first", first), ("second", second))
+    ]
+
+    assert written == [5, 0]
+    assert sorted(first.symbols) == sorted(symbols)
+    assert second.symbols == []
+
+    with db_session.get_session() as session:
+        statuses = session.execute(
+            select(models.IngestLease.status, func.count()).group_by(models.IngestLease.status)
+        ).all()
+        prices = session.execute(select(func.count()).select_from(models.DailyPrice)).scalar_one()
+        states = session.execute(select(models.IngestState)).scalars().all()
+
+    assert dict(statuses) == {"done": len(ticker_ids)}
+    assert prices == len(symbols)
+    assert {state.run_id for state in states} == {"run-1"}
+
+
+def test_failing_ticker_is_retried_then_marked_failed(tmp_path):
+    _configure(tmp_path)
+    symbols = ["AAPL", "MSFT", "NVDA"]
+    _seed(symbols)
+
+    class OneBadTickerProvider(CountingProvider):
+        def fetch_daily_prices(self, symbol, start, end):
+            if symbol == "AAPL":
+                self.symbols.append(symbol)
+                raise RuntimeError("bad symbol")
+            return super().fetch_daily_prices(symbol, start, end)
+
+    provider = OneBadTickerProvider()
+    written = sharded.run_worker(
+        days=5,
+        run_id="run-1",
+        provider=provider,
+        session_factory=db_session.get_session,
+        tickers=symbols,
+        batch_size=1,
+        lease_seconds=60,
+        worker_id="worker",
+        max_attempts=3,
+    )
+
+    assert written == 2
+    assert provider.symbols.count("AAPL") == 3
+    with db_session.get_session() as session:
+        leases = {
+            lease.ticker_id: lease
+            for lease in session.execute(select(models.IngestLease)).scalars()
+        }
+        ticker_ids = resolve_tickers(session, symbols)
+    assert leases[ticker_ids["AAPL"]].status == "failed"
+    assert leases[ticker_ids["AAPL"]].attempts == 3
+    assert {leases[ticker_ids[symbol]].status for symbol in ("MSFT", "NVDA")} == {"done"}
+
+
+def test_worker_releases_leases_on_unexpected_error(tmp_path, monkeypatch):
+    _configure(tmp_path)
+    symbols = ["AAPL", "MSFT"]
+    _seed(symbols)
+
+    def broken_plan(*args, **kwargs):
+        raise RuntimeError("database went away")
+
+    monkeypatch.setattr(sharded, "plan_ingest", broken_plan)
+
+    with pytest.raises(RuntimeError):
+        sharded.run_worker(
+            days=5,
+            run_id="run-1",
+            provider=CountingProvider(),
+            session_factory=db_session.get_session,
+            tickers=symbols,
+            worker_id="doomed",
+        )
+
+    with db_session.get_session() as session:
+        leases = session.execute(select(models.IngestLease)).scalars().all()
+    assert {(lease.status, lease.owner) for lease in leases} == {("pending", None)}
+
+
+def test_leases_are_renewed_while_a_ticker_is_slow(tmp_path):
+    _configure(tmp_path)
+    symbols = ["AAPL", "MSFT"]
+    ticker_ids = _seed(symbols)
+    expiries: list[datetime] = []
+
+    class SlowProvider(CountingProvider):
+        def fetch_daily_prices(self, symbol, start, end):
+            if symbol == "AAPL":
+                with db_session.get_session() as session:
+                    expiries.append(_expiry(session, ticker_ids["MSFT"]))
+                time.sleep(0.5)
+                with db_session.get_session() as session:
+                    expiries.append(_expiry(session, ticker_ids["MSFT"]))
+            return super().fetch_daily_prices(symbol, start, end)
+
+    sharded.run_worker(
+        days=5,
+        run_id="run-1",
+        provider=SlowProvider(),
+        session_factory=db_session.get_session,
+        tickers=symbols,
+        batch_size=2,
+        lease_seconds=0.3,
+        worker_id="slow",
+    )
+
+    assert expiries[1] > expiries[0]
+
+
+def _expiry(session, ticker_id: int) -> datetime:
+    return session.execute(
+        select(models.IngestLease.lease_expires_at).where(
+            models.IngestLease.ticker_id == ticker_id
+        )
+    ).scalar_one()
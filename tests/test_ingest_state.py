@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from dipdetector.db import models
+from dipdetector.db import session as db_session
+from dipdetector.ingest import ingest_prices
+from dipdetector.providers.base import DailyPriceBar
+
+
+class FlakyProvider:
+    def __init__(self, fail_on: set[str] | None = None):
+        self.fail_on = fail_on or set()
+        self.calls: list[tuple[str, date]] = []
+
+    def fetch_daily_prices(self, symbol, start, end):
+        self.calls.append((symbol, start))
+        if symbol in self.fail_on:
+            raise RuntimeError(f"{symbol} failed")
+        return [DailyPriceBar(date=end, open=1.0, high=1.0, low=1.0, close=1.0, volume=1)]
+
+
+@pytest.fixture()
+def engine_url(tmp_path):
+    db_url = f"sqlite+pysqlite:///{tmp_path / 'test.db'}"
+    db_session.configure_engine(db_url)
+    models.Base.metadata.create_all(db_session.get_engine())
+    return db_url
+
+
+def test_resume_skips_tickers_completed_by_run(engine_url):
+    failing = FlakyProvider(fail_on={"MSFT"})
+    with pytest.raises(RuntimeError):
+        ingest_prices.ingest_prices(
+            days=10,
+            provider=failing,
+            session_factory=db_session.get_session,
+            tickers=["AAPL", "MSFT", "NVDA"],
+            run_id="run-1",
+        )
+
+    resumed = FlakyProvider()
+    ingest_prices.ingest_prices(
+        days=10,
+        provider=resumed,
+        session_factory=db_session.get_session,
+        tickers=["AAPL", "MSFT", "NVDA"],
+        run_id="run-1",
+    )
+
+    assert [symbol for symbol, _ in resumed.calls] == ["MSFT", "NVDA"]
+    with db_session.get_session() as session:
+        states = session.execute(select(models.IngestState)).scalars().all()
+    assert len(states) == 3
+    assert {state.run_id for state in states} == {"run-1"}
+    assert all(state.last_bar_date == date.today() for state in states)
+
+
+def test_watermark_drives_start_date_and_final_runs_are_skipped(engine_url, monkeypatch):
+    monkeypatch.setenv("INGEST_OVERLAP_DAYS", "2")
+    today = date.today()
+    with db_session.get_session() as session:
+        fresh = models.Ticker(symbol="FRESH")
+        stale = models.Ticker(symbol="STALE")
+        session.add_all([fresh, stale])
+        session.flush()
+        session.add_all(
+            [
+                models.IngestState(
+                    ticker_id=fresh.id,
+                    source="massive",
+                    run_id="old",
+                    last_bar_date=today,
+                    fetched_through=today,
+                    last_success_at=datetime.now(timezone.utc) + timedelta(days=1),
+                ),
+                models.IngestState(
+                    ticker_id=stale.id,
+                    source="massive",
+                    run_id="old",
+                    last_bar_date=today - timedelta(days=7),
+                    fetched_through=today - timedelta(days=7),
+                    last_success_at=datetime.now(timezone.utc) - timedelta(days=7),
+                ),
+            ]
+        )
+
+    provider = FlakyProvider()
+    ingest_prices.ingest_prices(
+        days=30,
+        provider=provider,
+        session_factory=db_session.get_session,
+        tickers=["FRESH", "STALE"],
+    )
+    assert provider.calls == [("STALE", today - timedelta(days=9))]
+
+    forced = FlakyProvider()
+    ingest_prices.ingest_prices(
+        days=30,
+        provider=forced,
+        session_factory=db_session.get_session,
+        tickers=["FRESH", "STALE"],
+        force=True,
+    )
+    assert [symbol for symbol, _ in forced.calls] == ["FRESH", "STALE"]
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import date
 
-from sqlalchemy import select
+from sqlalchemy import event, select
 
 from dipdetector.db import models
 from dipdetector.db import session as db_session
@@ -69,3 +69,122 @@ def test_ingest_upsert_updates_existing_row(tmp_path):
         assert float(row.low) == 5.0
         assert float(row.close) == 15.0
         assert row.volume == 999
+
+
+def test_upsert_daily_prices_counts_inserts_and_updates(tmp_path):
+    db_url = f"sqlite+pysqlite:///{tmp_path / 'test.db'}"
+    db_session.configure_engine(db_url)
+    models.Base.metadata.create_all(db_session.get_engine())
+
+    def bar(day: int, close: float) -> DailyPriceBar:
+        return DailyPriceBar(
+            date=date(2024, 1, day), open=close, high=close, low=close, close=close, volume=1
+        )
+
+    with db_session.get_session() as session:
+        ticker = ingest_prices.ensure_ticker(session, "AAPL")
+        first = ingest_prices.upsert_daily_prices(
+            session, ticker.id, "massive", [bar(2, 10.0), bar(3, 11.0)]
+        )
+        second = ingest_prices.upsert_daily_prices(
+            session, ticker.id, "massive", [bar(3, 12.0), bar(4, 13.0), bar(5, 14.0)]
+        )
+
+    assert first == (2, 0, 0)
+    assert second == (2, 1, 0)
+
+    with db_session.get_session() as session:
+        closes = session.execute(
+            select(models.DailyPrice.date, models.DailyPrice.close).order_by(models.DailyPrice.date)
+        ).all()
+
+    assert [(row.date.day, float(row.close)) for row in closes] == [
+        (2, 10.0),
+        (3, 12.0),
+        (4, 13.0),
+        (5, 14.0),
+    ]
+
+
+def test_upsert_daily_prices_skips_unchanged_rows(tmp_path):
+    db_url = f"sqlite+pysqlite:///{tmp_path / 'test.db'}"
+    db_session.configure_engine(db_url)
+    models.Base.metadata.create_all(db_session.get_engine())
+
+    def bar(day: int, close: float, volume: int | None = 1) -> DailyPriceBar:
+        return DailyPriceBar(
+            date=date(2024, 1, day), open=close, high=close, low=close, close=close, volume=volume
+        )
+
+    with db_session.get_session() as session:
+        ticker = ingest_prices.ensure_ticker(session, "AAPL")
+        ingest_prices.upsert_daily_prices(
+            session, ticker.id, "massive", [bar(2, 10.0), bar(3, 11.0), bar(4, 12.0, None)]
+        )
+
+    with db_session.get_session() as session:
+        counts = ingest_prices.upsert_daily_prices(
+            session,
+            ticker.id,
+            "massive",
+            [bar(2, 10.0), bar(3, 11.5), bar(4, 12.0, None), bar(5, 13.0)],
+        )
+
+    assert counts == (1, 1, 2)
+    assert counts.unchanged == 2
+
+    with db_session.get_session() as session:
+        closes = session.execute(
+            select(models.DailyPrice.date, models.DailyPrice.close).order_by(models.DailyPrice.date)
+        ).all()
+
+    assert [(row.date.day, float(row.close)) for row in closes] == [
+        (2, 10.0),
+        (3, 11.5),
+        (4, 12.0),
+        (5, 13.0),
+    ]
+
+
+def test_plan_ingest_uses_constant_number_of_queries(tmp_path):
+    db_url = f"sqlite+pysqlite:///{tmp_path / 'test.db'}"
+    db_session.configure_engine(db_url)
+    engine = db_session.get_engine()
+    models.Base.metadata.create_all(engine)
+
+    end_date = date(2024, 3, 1)
+    with db_session.get_session() as session:
+        existing = models.Ticker(symbol="AAPL")
+        session.add(existing)
+        session.flush()
+        session.add(
+            models.DailyPrice(
+                ticker_id=existing.id,
+                date=date(2024, 2, 20),
+                open=1.0,
+                high=1.0,
+                low=1.0,
+                close=1.0,
+                volume=1,
+                source="massive",
+            )
+        )
+
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    symbols = ["AAPL"] + [f"T{index}" for index in range(50)]
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        with db_session.get_session() as session:
+            plans = ingest_prices.plan_ingest(session, symbols, "massive", end_date, days=30)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert len(statements) == 5
+    assert [plan.symbol for plan in plans] == symbols
+    assert len({plan.ticker_id for plan in plans}) == len(symbols)
+    assert plans[0].start_date == date(2024, 2, 15)
+    assert all(plan.start_date == date(2024, 1, 31) for plan in plans[1:])
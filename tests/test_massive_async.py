@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from datetime import date, datetime, timezone
+
+import httpx
+import pytest
+from sqlalchemy import select
+
+from dipdetector.db import models
+from dipdetector.db import session as db_session
+from dipdetector.ingest import ingest_prices
+from dipdetector.providers import massive_async
+from dipdetector.providers.cache import ResponseCache
+from dipdetector.providers.massive_async import AsyncMassiveProvider
+
+
+def _ts(value: str) -> int:
+    return int(datetime.fromisoformat(value).replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def _agg(day: str, close: float) -> dict[str, float | int]:
+    return {"t": _ts(f"{day}T00:00:00"), "o": close, "h": close, "l": close, "c": close, "v": 10}
+
+
+async def _no_sleep(_delay):
+    return None
+
+
+def test_async_provider_paginates_and_retries(monkeypatch):
+    monkeypatch.setattr(massive_async.asyncio, "sleep", _no_sleep)
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if len(requests) == 1:
+            return httpx.Response(503)
+        if "cursor" not in request.url.params:
+            return httpx.Response(
+                200,
+                json={
+                    "results": [_agg("2024-01-03", 11.0)],
+                    "next_url": "https://example.test/v2/aggs/next?cursor=abc",
+                },
+            )
+        return httpx.Response(200, json={"results": [_agg("2024-01-02", 10.0)]})
+
+    async def run():
+        async with AsyncMassiveProvider(
+            "test-key",
+            "https://example.test",
+            transport=httpx.MockTransport(handler),
+        ) as provider:
+            return await provider.fetch_daily_prices("AAPL", date(2024, 1, 2), date(2024, 1, 3))
+
+    bars = asyncio.run(run())
+
+    assert [bar.date for bar in bars] == [date(2024, 1, 2), date(2024, 1, 3)]
+    assert len(requests) == 3
+    assert requests[0].url.path == "/v2/aggs/ticker/AAPL/range/1/day/2024-01-02/2024-01-03"
+    assert requests[0].headers["Authorization"] == "Bearer test-key"
+
+
+def test_async_provider_does_not_retry_client_errors(monkeypatch):
+    monkeypatch.setattr(massive_async.asyncio, "sleep", _no_sleep)
+    calls = {"count": 0}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls["count"] += 1
+        return httpx.Response(404, json={"status": "NOT_FOUND"})
+
+    async def run():
+        async with AsyncMassiveProvider(
+            "test-key", transport=httpx.MockTransport(handler)
+        ) as provider:
+            await provider.fetch_daily_prices("NOPE", date(2024, 1, 2), date(2024, 1, 3))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(run())
+    assert calls["count"] == 1
+
+
+class ThreadRecordingCache(ResponseCache):
+    def __init__(self, directory):
+        super().__init__(directory)
+        self.threads: list[int] = []
+
+    def lookup(self, endpoint, params):
+        self.threads.append(threading.get_ident())
+        return super().lookup(endpoint, params)
+
+    def store(self, endpoint, params, payload, ttl):
+        self.threads.append(threading.get_ident())
+        super().store(endpoint, params, payload, ttl)
+
+
+def test_async_provider_serves_cache_off_the_event_loop(tmp_path):
+    calls = {"count": 0}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls["count"] += 1
+        return httpx.Response(200, json={"results": [_agg("2024-01-02", 10.0)]})
+
+    cache = ThreadRecordingCache(tmp_path / "cache")
+
+    async def run():
+        async with AsyncMassiveProvider(
+            "test-key", transport=httpx.MockTransport(handler), cache=cache
+        ) as provider:
+            first = await provider.fetch_daily_prices("AAPL", date(2024, 1, 2), date(2024, 1, 3))
+            second = await provider.fetch_daily_prices("AAPL", date(2024, 1, 2), date(2024, 1, 3))
+            return first, second, threading.get_ident()
+
+    first, second, loop_thread = asyncio.run(run())
+
+    assert first == second
+    assert calls["count"] == 1
+    assert len(cache.threads) == 3
+    assert loop_thread not in cache.threads
+
+
+class AsyncFakeProvider:
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def fetch_daily_prices(self, symbol, start, end):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return [
+            ingest_prices.DailyPriceBar(
+                date=end, open=1.0, high=1.0, low=1.0, close=1.0, volume=1
+            )
+        ]
+
+
+def test_ingest_with_async_provider(tmp_path):
+    db_url = f"sqlite+pysqlite:///{tmp_path / 'test.db'}"
+    db_session.configure_engine(db_url)
+    models.Base.metadata.create_all(db_session.get_engine())
+
+    provider = AsyncFakeProvider()
+    ingest_prices.ingest_prices(
+        days=5,
+        provider=provider,
+        session_factory=db_session.get_session,
+        tickers=["AAPL", "MSFT", "NVDA"],
+    )
+
+    assert provider.max_in_flight == 3
+    with db_session.get_session() as session:
+        symbols = session.execute(
+            select(models.Ticker.symbol).join(models.DailyPrice)
+        ).scalars().all()
+    assert sorted(symbols) == ["AAPL", "MSFT", "NVDA"]
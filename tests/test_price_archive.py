@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from dipdetector.analyze import run as analyze_run
+from dipdetector.db import models
+from dipdetector.db import session as db_session
+from dipdetector.ingest.ingest_prices import resolve_tickers, upsert_daily_prices
+from dipdetector.providers.base import DailyPriceBar
+
+archive = pytest.importorskip("dipdetector.market.archive")
+pytest.importorskip("pyarrow")
+
+
+def _bar(day: date, close: float) -> DailyPriceBar:
+    return DailyPriceBar(date=day, open=close, high=close, low=close, close=close, volume=100)
+
+
+def _seed(bars_by_symbol: dict[str, list[DailyPriceBar]]) -> None:
+    with db_session.get_session() as session:
+        ticker_ids = resolve_tickers(session, list(bars_by_symbol))
+        for symbol, bars in bars_by_symbol.items():
+            upsert_daily_prices(session, ticker_ids[symbol], "massive", bars)
+
+
+@pytest.fixture
+def database(tmp_path):
+    db_session.configure_engine(f"sqlite+pysqlite:///{tmp_path / 'test.db'}")
+    models.Base.metadata.create_all(db_session.get_engine())
+
+
+def test_sync_writes_year_files_and_reads_back(tmp_path, database):
+    root = tmp_path / "archive"
+    _seed(
+        {
+            "AAPL": [_bar(date(2023, 12, 29), 100.0), _bar(date(2024, 1, 2), 101.0)],
+            "MSFT": [_bar(date(2024, 1, 2), 50.0)],
+        }
+    )
+
+    assert archive.sync_archive(root, "massive") == 3
+    assert sorted(path.name for path in (root / "massive" / "AAPL").glob("*.arrow")) == [
+        "2023.arrow",
+        "2024.arrow",
+    ]
+
+    universe = archive.load_universe(root, "massive")
+    assert set(universe) == {"AAPL", "MSFT"}
+    assert universe["AAPL"].price_points() == [
+        (date(2023, 12, 29), 100.0),
+        (date(2024, 1, 2), 101.0),
+    ]
+    window = archive.read_ticker(root, "massive", "AAPL", start=date(2024, 1, 1))
+    assert window.price_points() == [(date(2024, 1, 2), 101.0)]
+
+
+def test_incremental_sync_only_rewrites_recent_years(tmp_path, database):
+    root = tmp_path / "archive"
+    _seed({"AAPL": [_bar(date(2023, 6, 1), 90.0), _bar(date(2024, 1, 10), 100.0)]})
+    archive.sync_archive(root, "massive", overlap_days=5)
+    old_year = root / "massive" / "AAPL" / "2023.arrow"
+    old_mtime = old_year.stat().st_mtime_ns
+
+    # A corrected overlap day and a new bar.
+    _seed({"AAPL": [_bar(date(2024, 1, 10), 99.0), _bar(date(2024, 1, 11), 98.0)]})
+
+    assert archive.sync_archive(root, "massive", overlap_days=5) == 2
+    assert old_year.stat().st_mtime_ns == old_mtime
+    assert archive.archived_through(root, "massive", "AAPL") == date(2024, 1, 11)
+    assert archive.read_ticker(root, "massive", "AAPL").price_points() == [
+        (date(2023, 6, 1), 90.0),
+        (date(2024, 1, 10), 99.0),
+        (date(2024, 1, 11), 98.0),
+    ]
+
+
+def test_sync_rewrites_from_older_changes_and_backfilled_history(tmp_path, database):
+    root = tmp_path / "archive"
+    _seed({"AAPL": [_bar(date(2022, 6, 1), 80.0), _bar(date(2024, 1, 10), 100.0)]})
+    archive.sync_archive(root, "massive", overlap_days=5)
+    ticker_dir = root / "massive" / "AAPL"
+    old_year = ticker_dir / "2022.arrow"
+    old_mtime = old_year.stat().st_mtime_ns
+
+    # Nothing changed since the last sync, so older years are left alone.
+    archive.sync_archive(root, "massive", overlap_days=5)
+    assert old_year.stat().st_mtime_ns == old_mtime
+
+    # A split re-adjustment far behind the overlap, plus history older than the archive.
+    _seed({"AAPL": [_bar(date(2020, 3, 2), 60.0), _bar(date(2022, 6, 1), 40.0)]})
+    archive.sync_archive(root, "massive", overlap_days=5)
+
+    assert archive.read_ticker(root, "massive", "AAPL").price_points() == [
+        (date(2020, 3, 2), 60.0),
+        (date(2022, 6, 1), 40.0),
+        (date(2024, 1, 10), 100.0),
+    ]
+
+
+def test_backfill_syncs_archive(tmp_path, database, monkeypatch):
+    from dipdetector.ingest import backfill
+
+    class Provider:
+        def fetch_daily_prices(self, symbol, start, end):
+            return [_bar(end - timedelta(days=1), 10.0), _bar(end, 11.0)]
+
+    root = tmp_path / "archive"
+    monkeypatch.setenv("PRICE_ARCHIVE_DIR", str(root))
+    backfill.backfill_prices(
+        days=5, provider=Provider(), session_factory=db_session.get_session, tickers=["AAPL"]
+    )
+
+    assert archive.archived_through(root, "massive", "AAPL") == date.today()
+
+
+def test_analyze_from_archive_matches_database(tmp_path, database, monkeypatch):
+    monkeypatch.setenv("DIP_NDAY_WINDOW", "5")
+    monkeypatch.setenv("DIP_52W_WINDOW", "10")
+    start = date(2024, 1, 1)
+    closes = [100.0, 102.0, 101.0, 99.0, 98.0, 97.0, 96.0, 95.0, 90.0, 80.0]
+    _seed({"AAPL": [_bar(start + timedelta(days=i), close) for i, close in enumerate(closes)]})
+    asof = start + timedelta(days=len(closes) - 1)
+
+    def snapshot() -> list[tuple]:
+        with db_session.get_session() as session:
+            signals = session.execute(
+                select(models.Signal.rule, models.Signal.value).order_by(models.Signal.rule)
+            ).all()
+            alerts = session.execute(
+                select(models.Alert.rule, models.Alert.details_json).order_by(models.Alert.rule)
+            ).all()
+        return [tuple(row) for row in signals + alerts]
+
+    analyze_run.analyze(asof, session_factory=db_session.get_session)
+    from_database = snapshot()
+
+    root = tmp_path / "archive"
+    archive.sync_archive(root, "massive")
+    with db_session.get_session() as session:
+        session.query(models.Signal).delete()
+        session.query(models.Alert).delete()
+    analyze_run.analyze(asof, session_factory=db_session.get_session, archive_dir=str(root))
+
+    assert snapshot() == from_database
+    assert from_database
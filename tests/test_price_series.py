@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from dipdetector.analyze import rules
+from dipdetector.analyze.current_dips import compute_best_recent_drawdown
+from dipdetector.analyze.price_series import PriceSeries
+
+START = date(2024, 1, 1)
+
+
+def _points(closes: list[float]) -> list[tuple[date, float]]:
+    return [(START + timedelta(days=offset), close) for offset, close in enumerate(closes)]
+
+
+def test_sorts_once_and_looks_up_by_date():
+    points = _points([3.0, 1.0, 2.0])
+    series = PriceSeries(reversed(points))
+
+    assert series.points() == points
+    assert series.index_of(START + timedelta(days=1)) == 1
+    assert series.index_of(START + timedelta(days=5)) is None
+    assert series.asof_index(START + timedelta(days=5)) == 2
+    assert series.asof_index(START - timedelta(days=1)) is None
+    assert PriceSeries.coerce(series) is series
+
+
+def test_rejects_duplicate_and_unsorted_dates():
+    with pytest.raises(ValueError):
+        PriceSeries([(START, 1.0), (START, 2.0)])
+    with pytest.raises(ValueError):
+        PriceSeries(reversed(_points([1.0, 2.0])), presorted=True)
+
+
+def test_rolling_max_matches_scan_with_latest_tie():
+    rng = random.Random(17)
+    closes = [float(rng.randint(1, 5)) for _ in range(70)]
+    series = PriceSeries(_points(closes))
+
+    for end in range(len(closes)):
+        for window in range(1, 40):
+            expected = None
+            if window <= end + 1:
+                framed = closes[end - window + 1 : end + 1]
+                expected = end - framed[::-1].index(max(framed))
+            assert series.rolling_max_index(end, window) == expected
+
+
+def test_rules_accept_price_series():
+    rng = random.Random(23)
+    points = _points([round(rng.uniform(50, 150), 2) for _ in range(30)])
+    series = PriceSeries(points)
+    asof = START + timedelta(days=29)
+
+    assert rules.compute_1d_drop(series, asof) == rules.compute_1d_drop(points, asof)
+    assert rules.get_prev_close_details(series, asof) == rules.get_prev_close_details(points, asof)
+    for window in (1, 5, 20, 30, 31):
+        assert rules.compute_drawdown(series, asof, window) == rules.compute_drawdown(
+            points, asof, window
+        )
+    assert compute_best_recent_drawdown(series, asof, [1, 5, 20]) == (
+        compute_best_recent_drawdown(points, asof, [1, 5, 20])
+    )
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import json
+from dataclasses import asdict, dataclass
 from datetime import date, datetime, timezone
 
-from dipdetector.providers import massive_provider
+from dipdetector.providers import massive_provider, retry
 from dipdetector.providers.massive_provider import MassiveProvider
 
 
@@ -21,6 +22,16 @@ def _ts(value: str) -> int:
     return int(datetime.fromisoformat(value).replace(tzinfo=timezone.utc).timestamp() * 1000)
 
 
+class FakePage:
+    """Stands in for the raw HTTP response `list_aggs(raw=True)` returns."""
+
+    def __init__(self, *aggs: FakeAgg, next_url: str | None = None):
+        payload: dict[str, object] = {"results": [asdict(agg) for agg in aggs]}
+        if next_url:
+            payload["next_url"] = next_url
+        self.data = json.dumps(payload).encode("utf-8")
+
+
 def test_massive_provider_maps_daily_bars(monkeypatch):
     start = date(2024, 1, 2)
     end = date(2024, 1, 3)
@@ -33,10 +44,10 @@ def test_massive_provider_maps_daily_bars(monkeypatch):
 
         def list_aggs(self, **kwargs):
             captured.update(kwargs)
-            return [
+            return FakePage(
                 FakeAgg(_ts("2024-01-02T00:00:00"), 10.0, 12.0, 9.0, 11.0, 100),
                 FakeAgg(_ts("2024-01-03T00:00:00"), 11.0, 13.0, 10.0, 12.0, 200),
-            ]
+            )
 
     monkeypatch.setattr(massive_provider, "RESTClient", FakeClient)
 
@@ -70,13 +81,99 @@ def test_massive_provider_retries(monkeypatch):
             calls["count"] += 1
             if calls["count"] == 1:
                 raise RuntimeError("temporary failure")
-            return [FakeAgg(_ts("2024-01-02T00:00:00"), 10.0, 12.0, 9.0, 11.0, 100)]
+            return FakePage(FakeAgg(_ts("2024-01-02T00:00:00"), 10.0, 12.0, 9.0, 11.0, 100))
 
     monkeypatch.setattr(massive_provider, "RESTClient", FakeClient)
-    monkeypatch.setattr(massive_provider.time, "sleep", lambda _: None)
+    monkeypatch.setattr(retry.time, "sleep", lambda _: None)
 
     provider = MassiveProvider("test-key")
     bars = provider.fetch_daily_prices("AAPL", start, end)
 
     assert calls["count"] == 2
     assert len(bars) == 1
+
+
+def test_massive_provider_maps_grouped_daily(monkeypatch):
+    day = date(2024, 1, 2)
+    captured: dict[str, object] = {}
+
+    class FakeClient:
+        def __init__(self, api_key: str):
+            pass
+
+        def get_grouped_daily_aggs(self, date_str, adjusted):
+            captured["date"] = date_str
+            captured["adjusted"] = adjusted
+            return [
+                {"T": "AAPL", "o": 10.0, "h": 12.0, "l": 9.0, "c": 11.0, "v": 100,
+                 "t": _ts("2024-01-02T21:00:00")},
+                {"T": "MSFT", "o": 20.0, "h": 22.0, "l": 19.0, "c": None, "v": 5},
+            ]
+
+    monkeypatch.setattr(massive_provider, "RESTClient", FakeClient)
+
+    bars = MassiveProvider("test-key").fetch_grouped_daily(day)
+
+    assert captured == {"date": "2024-01-02", "adjusted": True}
+    assert list(bars) == ["AAPL"]
+    assert bars["AAPL"].date == day
+    assert bars["AAPL"].close == 11.0
+
+
+def test_massive_provider_stream_resumes_after_last_bar(monkeypatch):
+    calls: list[object] = []
+
+    class FakeClient:
+        def __init__(self, api_key: str):
+            pass
+
+        def list_aggs(self, **kwargs):
+            calls.append(kwargs["from_"])
+            assert kwargs["sort"] == "asc"
+            assert kwargs["raw"] is True
+            if len(calls) == 1:
+                return FakePage(
+                    FakeAgg(_ts("2024-01-02T00:00:00"), 10.0, 12.0, 9.0, 11.0, 100),
+                    next_url="/v2/aggs/next",
+                )
+            if len(calls) == 2:
+                raise RuntimeError("connection reset")
+            return FakePage(FakeAgg(_ts("2024-01-03T00:00:00"), 11.0, 13.0, 10.0, 12.0, 200))
+
+    monkeypatch.setattr(massive_provider, "RESTClient", FakeClient)
+    monkeypatch.setattr(retry.time, "sleep", lambda _: None)
+
+    provider = MassiveProvider("test-key")
+    bars = provider.iter_daily_prices("AAPL", date(2024, 1, 2), date(2024, 1, 3))
+
+    assert calls == []
+    assert [bar.date for bar in bars] == [date(2024, 1, 2), date(2024, 1, 3)]
+    resume_from = _ts("2024-01-02T00:00:00") + 1
+    assert calls == ["2024-01-02", resume_from, resume_from]
+
+
+def test_massive_provider_throttles_every_page(monkeypatch):
+    days = [f"2024-01-0{day}T00:00:00" for day in (2, 3, 4)]
+    tokens: list[str] = []
+
+    class FakeClient:
+        def __init__(self, api_key: str):
+            self.pages = [
+                FakePage(FakeAgg(_ts(day), 10.0, 12.0, 9.0, 11.0, 100), next_url="/v2/aggs/next")
+                for day in days[:-1]
+            ] + [FakePage(FakeAgg(_ts(days[-1]), 10.0, 12.0, 9.0, 11.0, 100))]
+
+        def list_aggs(self, **kwargs):
+            return self.pages.pop(0)
+
+    class CountingLimiter:
+        def acquire(self, endpoint: str, priority: str) -> None:
+            tokens.append(endpoint)
+
+    monkeypatch.setattr(massive_provider, "RESTClient", FakeClient)
+
+    provider = MassiveProvider("test-key", limiter=CountingLimiter())
+    bars = provider.fetch_daily_prices("AAPL", date(2024, 1, 2), date(2024, 1, 4))
+
+    assert [bar.date for bar in bars] == [date(2024, 1, 2), date(2024, 1, 3), date(2024, 1, 4)]
+    assert tokens == ["aggs", "aggs", "aggs"]
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import asyncio
+import fcntl
+
+import pytest
+
+from dipdetector.providers.rate_limit import BACKGROUND, INTERACTIVE, RateLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_bucket_refills_at_configured_rate():
+    clock = FakeClock()
+    limiter = RateLimiter(rate_per_min=60, burst=2, background_reserve=0.0, clock=clock)
+
+    assert limiter.try_acquire("aggs") == 0
+    assert limiter.try_acquire("aggs") == 0
+    assert limiter.try_acquire("aggs") == pytest.approx(1.0)
+
+    clock.now += 1.0
+    assert limiter.try_acquire("aggs") == 0
+
+
+def test_background_leaves_headroom_for_interactive():
+    clock = FakeClock()
+    limiter = RateLimiter(rate_per_min=60, burst=10, background_reserve=0.5, clock=clock)
+
+    granted = 0
+    while limiter.try_acquire("aggs", BACKGROUND) == 0:
+        granted += 1
+    assert granted == 5
+
+    for _ in range(5):
+        assert limiter.try_acquire("aggs", INTERACTIVE) == 0
+    assert limiter.try_acquire("aggs", INTERACTIVE) > 0
+
+
+def test_endpoint_budget_applies_on_top_of_global():
+    clock = FakeClock()
+    limiter = RateLimiter(
+        rate_per_min=600,
+        burst=100,
+        endpoint_limits={"news": 6},
+        background_reserve=0.0,
+        clock=clock,
+    )
+
+    assert limiter.try_acquire("news") == 0
+    assert limiter.try_acquire("news") == pytest.approx(10.0)
+    assert limiter.try_acquire("aggs") == 0
+
+
+def test_state_file_shares_budget_across_limiters(tmp_path):
+    clock = FakeClock()
+    state_path = tmp_path / "limiter.json"
+    first = RateLimiter(60, burst=1, background_reserve=0.0, state_path=state_path, clock=clock)
+    second = RateLimiter(60, burst=1, background_reserve=0.0, state_path=state_path, clock=clock)
+
+    assert first.try_acquire("aggs") == 0
+    assert second.try_acquire("aggs") == pytest.approx(1.0)
+
+
+def test_async_acquire_does_not_block_loop_on_held_state_file(tmp_path):
+    state_path = tmp_path / "limiter.json"
+    limiter = RateLimiter(60, burst=5, background_reserve=0.0, state_path=state_path)
+
+    async def run() -> int:
+        with open(state_path, "a+", encoding="utf-8") as holder:
+            fcntl.flock(holder, fcntl.LOCK_EX)
+            acquire = asyncio.create_task(limiter.acquire_async("aggs"))
+            ticks = 0
+            for _ in range(10):
+                await asyncio.sleep(0.01)
+                ticks += 1
+            assert not acquire.done()
+            fcntl.flock(holder, fcntl.LOCK_UN)
+        await asyncio.wait_for(acquire, timeout=5)
+        return ticks
+
+    assert asyncio.run(run()) == 10
+
+
+def test_unknown_priority_rejected():
+    limiter = RateLimiter(60)
+    with pytest.raises(ValueError):
+        limiter.try_acquire("aggs", "urgent")
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import json
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from dipdetector.providers import cache as cache_module
+from dipdetector.providers import massive_provider
+from dipdetector.providers.cache import CacheMiss, ResponseCache
+from dipdetector.providers.massive_provider import MassiveProvider
+
+
+@dataclass
+class FakeAgg:
+    t: int
+    o: float
+    h: float
+    l: float
+    c: float
+    v: int
+
+
+def _ts(value: str) -> int:
+    return int(datetime.fromisoformat(value).replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+class FakePage:
+    """Stands in for the raw HTTP response `list_aggs(raw=True)` returns."""
+
+    def __init__(self, *aggs: FakeAgg, next_url: str | None = None):
+        payload: dict[str, object] = {"results": [asdict(agg) for agg in aggs]}
+        if next_url:
+            payload["next_url"] = next_url
+        self.data = json.dumps(payload).encode("utf-8")
+
+
+def test_readwrite_expires_entries_and_replay_serves_them(tmp_path, monkeypatch):
+    clock = {"now": 1000.0}
+    monkeypatch.setattr(cache_module.time, "time", lambda: clock["now"])
+    calls = {"count": 0}
+
+    def fetch():
+        calls["count"] += 1
+        return {"value": calls["count"]}
+
+    cache = ResponseCache(tmp_path, "readwrite")
+    assert cache.get_or_fetch("news", {"ticker": "AAPL"}, fetch, ttl=60) == {"value": 1}
+    assert cache.get_or_fetch("news", {"ticker": "AAPL"}, fetch, ttl=60) == {"value": 1}
+    assert cache.get_or_fetch("aggs", {"ticker": "AAPL"}, fetch, ttl=None) == {"value": 2}
+
+    clock["now"] += 3600
+    assert cache.get_or_fetch("news", {"ticker": "AAPL"}, fetch, ttl=60) == {"value": 3}
+    assert cache.get_or_fetch("aggs", {"ticker": "AAPL"}, fetch, ttl=None) == {"value": 2}
+
+    clock["now"] += 3600
+    replay = ResponseCache(tmp_path, "replay")
+    assert replay.get_or_fetch("news", {"ticker": "AAPL"}, fetch, ttl=60) == {"value": 3}
+    with pytest.raises(CacheMiss):
+        replay.get_or_fetch("news", {"ticker": "MSFT"}, fetch, ttl=60)
+    assert calls["count"] == 3
+
+
+def test_record_mode_always_refetches(tmp_path):
+    cache = ResponseCache(tmp_path, "record")
+    cache.get_or_fetch("news", {"ticker": "AAPL"}, lambda: [1], ttl=None)
+    assert cache.get_or_fetch("news", {"ticker": "AAPL"}, lambda: [2], ttl=None) == [2]
+    assert ResponseCache(tmp_path, "replay").lookup("news", {"ticker": "AAPL"}) == (True, [2])
+
+
+def test_provider_serves_closed_ranges_from_disk(tmp_path, monkeypatch):
+    calls = {"count": 0}
+
+    class FakeClient:
+        def __init__(self, api_key: str):
+            pass
+
+        def list_aggs(self, **kwargs):
+            calls["count"] += 1
+            return FakePage(FakeAgg(_ts("2024-01-02T00:00:00"), 10.0, 12.0, 9.0, 11.0, 100))
+
+    monkeypatch.setattr(massive_provider, "RESTClient", FakeClient)
+    cache = ResponseCache(tmp_path, "readwrite")
+
+    first = MassiveProvider("test-key", cache=cache).fetch_daily_prices(
+        "AAPL", date(2024, 1, 2), date(2024, 1, 3)
+    )
+    second = MassiveProvider("test-key", cache=cache).fetch_daily_prices(
+        "AAPL", date(2024, 1, 2), date(2024, 1, 3)
+    )
+
+    assert calls["count"] == 1
+    assert first == second
+    assert second[0].date == date(2024, 1, 2)
+    assert second[0].close == 11.0
+
+
+def test_ttl_for_range(monkeypatch):
+    monkeypatch.setenv("MASSIVE_CACHE_TTL_SEC", "30")
+    assert cache_module.ttl_for_range(date(2000, 1, 1)) is None
+    assert cache_module.ttl_for_range(date.today()) == 30.0
+
+
+def test_repeated_intraday_requests_reuse_one_entry(tmp_path, monkeypatch):
+    calls = {"count": 0}
+    clock = {"now": datetime(2024, 1, 2, 15, 0, 0, tzinfo=timezone.utc)}
+
+    class FakeClient:
+        def __init__(self, api_key: str):
+            pass
+
+        def list_aggs(self, **kwargs):
+            calls["count"] += 1
+            return FakePage(FakeAgg(_ts("2024-01-02T14:45:00"), 10.0, 12.0, 9.0, 11.0, 100))
+
+    class FakeDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return clock["now"]
+
+    monkeypatch.setattr(massive_provider, "RESTClient", FakeClient)
+    monkeypatch.setattr(massive_provider, "datetime", FakeDatetime)
+    monkeypatch.setattr(massive_provider, "ttl_for_range", lambda end: 60.0)
+    provider = MassiveProvider("test-key", cache=ResponseCache(tmp_path, "readwrite"))
+
+    for offset in (0.0, 1.5, 20.0, 59.9):
+        clock["now"] = datetime(2024, 1, 2, 15, 0, 0, tzinfo=timezone.utc) + timedelta(
+            seconds=offset
+        )
+        assert len(provider.fetch_intraday_bars("AAPL", 30)) == 1
+
+    assert calls["count"] == 1
+    assert len(list(tmp_path.glob("*/*.json"))) == 1
+
+
+def test_store_prunes_expired_entries(tmp_path, monkeypatch):
+    clock = {"now": 1000.0}
+    monkeypatch.setattr(cache_module.time, "time", lambda: clock["now"])
+    cache = ResponseCache(tmp_path, "readwrite", prune_interval=60.0)
+
+    cache.store("aggs", {"end": 1}, [1], ttl=30)
+    cache.store("aggs", {"end": 2}, [2], ttl=None)
+    clock["now"] += 120
+    cache.store("aggs", {"end": 3}, [3], ttl=30)
+
+    assert cache.lookup("aggs", {"end": 2}) == (True, [2])
+    assert cache.lookup("aggs", {"end": 3}) == (True, [3])
+    assert len(list(tmp_path.glob("*/*.json"))) == 2
+    assert ResponseCache(tmp_path, "replay").lookup("aggs", {"end": 2}) == (True, [2])
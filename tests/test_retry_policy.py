@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from dipdetector.api.main import app
+from dipdetector.providers import retry
+from dipdetector.providers.retry import CircuitBreaker, CircuitOpenError, RetryPolicy, is_retryable
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _status_error(status: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("GET", "https://example.test/v2/aggs")
+    response = httpx.Response(status, request=request)
+    return httpx.HTTPStatusError("boom", request=request, response=response)
+
+
+def test_is_retryable_classifies_errors():
+    assert is_retryable(RuntimeError("temporary"))
+    assert is_retryable(httpx.ConnectError("down"))
+    assert is_retryable(_status_error(503))
+    assert is_retryable(_status_error(429))
+    assert not is_retryable(_status_error(404))
+    assert not is_retryable(ValueError("bad input"))
+    assert not is_retryable(CircuitOpenError("open"))
+
+
+def test_retry_policy_backs_off_with_jitter(monkeypatch):
+    sleeps: list[float] = []
+    monkeypatch.setattr(retry.time, "sleep", sleeps.append)
+    calls = {"count": 0}
+
+    def flaky() -> str:
+        calls["count"] += 1
+        if calls["count"] < 4:
+            raise RuntimeError("temporary")
+        return "ok"
+
+    policy = RetryPolicy(name="test-jitter", max_attempts=4, base_delay=1.0, rng=lambda: 0.5)
+
+    assert policy.call(flaky) == "ok"
+    assert sleeps == [0.5, 1.0, 2.0]
+
+
+def test_retry_policy_does_not_retry_permanent_errors(monkeypatch):
+    monkeypatch.setattr(retry.time, "sleep", lambda _: pytest.fail("should not sleep"))
+    calls = {"count": 0}
+
+    def not_found() -> None:
+        calls["count"] += 1
+        raise _status_error(404)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        RetryPolicy(name="test-permanent").call(not_found)
+    assert calls["count"] == 1
+
+
+def test_retry_policy_stops_at_deadline(monkeypatch):
+    clock = FakeClock()
+
+    def sleep(delay: float) -> None:
+        clock.now += delay
+
+    monkeypatch.setattr(retry.time, "sleep", sleep)
+    calls = {"count": 0}
+
+    def down() -> None:
+        calls["count"] += 1
+        clock.now += 1.0
+        raise RuntimeError("upstream down")
+
+    policy = RetryPolicy(
+        name="test-deadline",
+        max_attempts=10,
+        base_delay=1.0,
+        deadline=3.0,
+        clock=clock,
+        rng=lambda: 1.0,
+    )
+    with pytest.raises(RuntimeError):
+        policy.call(down)
+
+    # 1s call + 1s backoff + 1s call, then a 2s backoff would cross the deadline.
+    assert calls["count"] == 2
+    assert retry.get_retry_metrics()["test-deadline"]["deadline_exceeded"] == 1
+
+
+def test_circuit_breaker_fails_fast_then_probes():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30.0, clock=clock)
+    policy = RetryPolicy(name="test-breaker", max_attempts=1, breaker=breaker, clock=clock)
+    calls = {"count": 0}
+
+    def down() -> None:
+        calls["count"] += 1
+        raise RuntimeError("upstream down")
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            policy.call(down)
+    assert breaker.state == "open"
+
+    with pytest.raises(CircuitOpenError):
+        policy.call(down)
+    assert calls["count"] == 2
+
+    clock.now += 30.0
+    assert breaker.state == "half_open"
+    assert policy.call(lambda: "recovered") == "recovered"
+    assert breaker.state == "closed"
+
+    metrics = retry.get_retry_metrics()["test-breaker"]
+    assert metrics["circuit_rejections"] == 1
+    assert metrics["circuit_opened"] == 1
+    assert metrics["circuit_state"] == "closed"
+
+
+def test_cancelled_probe_does_not_wedge_breaker():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30.0, clock=clock)
+    policy = RetryPolicy(name="test-cancelled-probe", max_attempts=1, breaker=breaker, clock=clock)
+
+    def down() -> None:
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError):
+        policy.call(down)
+    clock.now += 30.0
+
+    async def hang() -> None:
+        await asyncio.Event().wait()
+
+    async def cancel_probe() -> None:
+        probe = asyncio.create_task(policy.call_async(hang))
+        await asyncio.sleep(0)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+    asyncio.run(cancel_probe())
+
+    def stream():
+        yield 1
+        yield 2
+
+    # A consumer that stops after the first item also ends its probe.
+    items = policy.iterate(stream)
+    assert next(items) == 1
+    items.close()
+    assert breaker.state == "half_open"
+    assert policy.call(lambda: "recovered") == "recovered"
+    assert breaker.state == "closed"
+
+
+def test_retry_policy_async(monkeypatch):
+    sleeps: list[float] = []
+
+    async def fake_sleep(delay: float) -> None:
+        sleeps.append(delay)
+
+    monkeypatch.setattr(retry.asyncio, "sleep", fake_sleep)
+    calls = {"count": 0}
+
+    async def flaky() -> str:
+        calls["count"] += 1
+        if calls["count"] == 1:
+            raise httpx.ReadTimeout("slow")
+        return "ok"
+
+    policy = RetryPolicy(name="test-async", base_delay=0.5, rng=lambda: 1.0)
+
+    assert asyncio.run(policy.call_async(flaky)) == "ok"
+    assert sleeps == [0.5]
+
+
+def test_provider_health_reports_retry_metrics():
+    RetryPolicy(name="test-health", breaker=CircuitBreaker()).call(lambda: None)
+
+    client = TestClient(app)
+    response = client.get("/health/provider")
+
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["retry"]["test-health"]["successes"] == 1
+    assert payload["retry"]["test-health"]["circuit_state"] == "closed"
@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import random
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, select
+
+from dipdetector.analyze import registry, rolling_stats
+from dipdetector.analyze import run as analyze_run
+from dipdetector.api.deps import get_db_session
+from dipdetector.api.main import app
+from dipdetector.db import models
+from dipdetector.db import session as db_session
+from dipdetector.ingest import ingest_prices
+from dipdetector.ingest.ingest_prices import resolve_tickers, upsert_daily_prices
+from dipdetector.providers.base import DailyPriceBar
+
+FIRST_DAY = date(2024, 1, 1)
+
+
+def _bars(closes: list[float], start: int = 0) -> list[DailyPriceBar]:
+    return [
+        DailyPriceBar(FIRST_DAY + timedelta(days=start + offset), close, close, close, close, 100)
+        for offset, close in enumerate(closes)
+    ]
+
+
+def _stats_rows() -> list[tuple]:
+    with db_session.get_session() as session:
+        stat = models.RollingStat
+        return [
+            tuple(row)
+            for row in session.execute(
+                select(
+                    stat.ticker_id,
+                    stat.date,
+                    stat.close,
+                    stat.prev_date,
+                    stat.prev_close,
+                    stat.change_1d,
+                    stat.maxima,
+                ).order_by(stat.ticker_id, stat.date)
+            )
+        ]
+
+
+def _results() -> list[tuple]:
+    with db_session.get_session() as session:
+        signal, alert = models.Signal, models.Alert
+        signals = session.execute(
+            select(signal.ticker_id, signal.rule, signal.value).order_by(
+                signal.ticker_id, signal.rule
+            )
+        ).all()
+        alerts = session.execute(
+            select(alert.ticker_id, alert.rule, alert.threshold, alert.details_json).order_by(
+                alert.ticker_id, alert.rule
+            )
+        ).all()
+        session.execute(delete(signal))
+        session.execute(delete(alert))
+    return [tuple(row) for row in signals + alerts]
+
+
+def _setup(tmp_path, monkeypatch) -> dict[str, int]:
+    monkeypatch.setenv("DIP_1D_THRESHOLD", "-2.0")
+    monkeypatch.setenv("DIP_NDAY_WINDOW", "3")
+    monkeypatch.setenv("DIP_NDAY_THRESHOLD", "-3.0")
+    monkeypatch.setenv("DIP_52W_WINDOW", "8")
+    db_session.configure_engine(f"sqlite+pysqlite:///{tmp_path / 'test.db'}")
+    models.Base.metadata.create_all(db_session.get_engine())
+    with db_session.get_session() as session:
+        return resolve_tickers(session, ["AAA", "BBB", "CCC"])
+
+
+def test_incremental_refresh_matches_rebuild(tmp_path, monkeypatch):
+    ticker_ids = _setup(tmp_path, monkeypatch)
+    rng = random.Random(5)
+    closes = {symbol: [float(rng.randint(90, 110)) for _ in range(30)] for symbol in ticker_ids}
+
+    with db_session.get_session() as session:
+        for symbol, values in closes.items():
+            upsert_daily_prices(session, ticker_ids[symbol], "massive", _bars(values[:20]))
+    with db_session.get_session() as session:
+        for symbol, values in closes.items():
+            # New bars plus an overlap with one corrected close.
+            values[17] += 7.0
+            upsert_daily_prices(session, ticker_ids[symbol], "massive", _bars(values[15:], 15))
+    incremental = _stats_rows()
+
+    assert len(incremental) == 90
+    assert set(incremental[-1][6]) == {"2", "3", "5", "7", "8", "10", "14"}
+
+    with db_session.get_session() as session:
+        session.execute(delete(models.RollingStat))
+    rolling_stats.rebuild_rolling_stats(db_session.get_session, "massive")
+
+    assert _stats_rows() == incremental
+
+
+def test_ingest_resolves_windows_once_per_run(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch)
+    loads: list[int] = []
+    load_registry = registry.load_registry
+
+    def counting_load():
+        loads.append(1)
+        return load_registry()
+
+    class Provider:
+        def fetch_daily_prices(self, symbol, start, end):
+            return _bars([100.0, 95.0, 97.0], (end - FIRST_DAY).days - 2)
+
+    monkeypatch.setattr(registry, "load_registry", counting_load)
+    ingest_prices.ingest_prices(
+        days=5,
+        provider=Provider(),
+        session_factory=db_session.get_session,
+        tickers=["AAA", "BBB", "CCC"],
+    )
+
+    assert len(loads) == 1
+    assert len(_stats_rows()) == 9
+
+
+def test_analyze_reads_rolling_stats(tmp_path, monkeypatch):
+    ticker_ids = _setup(tmp_path, monkeypatch)
+    rng = random.Random(9)
+    with db_session.get_session() as session:
+        for ticker_id in ticker_ids.values():
+            closes = [float(rng.randint(90, 110)) for _ in range(rng.randint(1, 12))]
+            upsert_daily_prices(session, ticker_id, "massive", _bars(closes, 12 - len(closes)))
+    asof = FIRST_DAY + timedelta(days=11)
+
+    loaded: list[dict[int, str]] = []
+    load_universe = analyze_run.load_universe
+
+    def recording_load(session_factory, source, symbols, *args, **kwargs):
+        loaded.append(dict(symbols))
+        return load_universe(session_factory, source, symbols, *args, **kwargs)
+
+    monkeypatch.setattr(analyze_run, "load_universe", recording_load)
+    analyze_run.analyze(asof, session_factory=db_session.get_session)
+    from_stats = _results()
+
+    assert loaded == []
+    assert any(rule == "drawdown_8d" for _, rule, *_ in from_stats)
+
+    with db_session.get_session() as session:
+        session.execute(delete(models.RollingStat))
+    analyze_run.analyze(asof, session_factory=db_session.get_session)
+
+    assert _results() == from_stats
+    assert len(loaded) == 1
+
+
+def test_explicit_engine_bypasses_rolling_stats(tmp_path, monkeypatch):
+    ticker_ids = _setup(tmp_path, monkeypatch)
+    with db_session.get_session() as session:
+        for ticker_id in ticker_ids.values():
+            upsert_daily_prices(session, ticker_id, "massive", _bars([100.0, 90.0, 95.0], 0))
+    asof = FIRST_DAY + timedelta(days=2)
+
+    calls: list[str] = []
+    read_rolling_stats = analyze_run._read_rolling_stats
+
+    def recording_read(*args, **kwargs):
+        calls.append("rolling_stats")
+        return read_rolling_stats(*args, **kwargs)
+
+    monkeypatch.setattr(analyze_run, "_read_rolling_stats", recording_read)
+    analyze_run.analyze(asof, session_factory=db_session.get_session)
+    from_stats = _results()
+    analyze_run.analyze(asof, session_factory=db_session.get_session, engine="vectorized")
+
+    assert calls == ["rolling_stats"]
+    assert _results() == from_stats
+
+
+def test_current_dips_reads_rolling_stats(tmp_path, monkeypatch):
+    ticker_ids = _setup(tmp_path, monkeypatch)
+    rng = random.Random(13)
+    with db_session.get_session() as session:
+        for ticker_id in ticker_ids.values():
+            closes = [float(rng.randint(80, 120)) for _ in range(16)]
+            upsert_daily_prices(session, ticker_id, "massive", _bars(closes))
+
+    def override_session():
+        with db_session.get_session() as session:
+            yield session
+
+    app.dependency_overrides[get_db_session] = override_session
+    try:
+        client = TestClient(app)
+        params = {"windows": "1,3,5,14", "min_dip": "100"}
+        from_stats = client.get("/dips/current", params=params).json()
+        with db_session.get_session() as session:
+            session.execute(delete(models.RollingStat))
+        from_prices = client.get("/dips/current", params=params).json()
+    finally:
+        app.dependency_overrides.clear()
+
+    assert len(from_stats["items"]) == 3
+    assert from_stats == from_prices
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import json
+import random
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from dipdetector.analyze import registry, rules
+from dipdetector.analyze import run as analyze_run
+from dipdetector.db import models
+from dipdetector.db import session as db_session
+from dipdetector.market.bars import BarSeries
+from dipdetector.providers.base import DailyPriceBar
+
+ASOF = date(2024, 3, 1)
+
+
+def _series(closes: list[float], end: date = ASOF) -> BarSeries:
+    bars = [
+        DailyPriceBar(end - timedelta(days=offset), close, close, close, close, volume=None)
+        for offset, close in enumerate(reversed(closes))
+    ]
+    return BarSeries.from_daily_bars(bars)
+
+
+def test_fused_pass_matches_rules():
+    rng = random.Random(3)
+    cases = [
+        _series([5.0, 9.0, 7.0, 9.0, 8.0, 6.0]),
+        _series([0.0, 3.0]),
+        _series([1.0]),
+        _series([4.0, 3.0, 2.0], end=ASOF - timedelta(days=1)),
+        _series([4.0, 3.0, 2.0, 1.0], end=ASOF + timedelta(days=2)),
+    ]
+    cases += [
+        _series([float(rng.randint(1, 6)) for _ in range(rng.randint(2, 40))]) for _ in range(30)
+    ]
+    windows = (1, 5, 20)
+
+    for prices in cases:
+        expected = {}
+        value_1d = rules.compute_1d_drop(prices, ASOF)
+        if value_1d is not None:
+            expected["drop_1d"] = (value_1d, rules.get_prev_close_details(prices, ASOF))
+        for window in windows:
+            drawdown = rules.compute_drawdown(prices, ASOF, window)
+            if drawdown is not None:
+                expected[f"drawdown_{window}d"] = drawdown
+        assert registry.evaluate_fused(prices, ASOF, windows) == expected
+
+
+def test_default_registry_follows_dip_settings(monkeypatch):
+    monkeypatch.setenv("DIP_NDAY_WINDOW", "20")
+    monkeypatch.setenv("DIP_52W_WINDOW", "20")
+    monkeypatch.setenv("DIP_52W_THRESHOLD", "-25")
+
+    rule_registry = registry.load_registry()
+
+    assert [rule.name for rule in rule_registry.rules] == ["drop_1d", "drawdown_20d"]
+    assert rule_registry.rules[1].thresholds == (-25.0,)
+    assert rule_registry.windows == (20,)
+    assert rule_registry.lookback == 21
+
+
+def test_build_registry_parses_severities():
+    rule_registry = registry.build_registry(
+        [
+            {"kind": "drop_1d", "threshold": -3},
+            {"kind": "drawdown", "window": 20, "thresholds": [-15, -8]},
+            {"kind": "drawdown", "window": 5, "threshold": -4, "name": "slide_5d"},
+        ]
+    )
+
+    drawdown = rule_registry.rules[1]
+    assert drawdown.thresholds == (-8.0, -15.0)
+    assert drawdown.crossed(-7.0) is None
+    assert drawdown.crossed(-8.0) == (-8.0, 1)
+    assert drawdown.crossed(-20.0) == (-15.0, 2)
+    assert rule_registry.rules[2].metric == "drawdown_5d"
+    assert rule_registry.windows == (5, 20)
+
+
+@pytest.mark.parametrize(
+    "entries",
+    [
+        [],
+        [{"kind": "spike"}],
+        [{"kind": "drawdown", "threshold": -5}],
+        [{"kind": "drawdown", "window": 0, "threshold": -5}],
+        [{"kind": "drop_1d", "window": 5, "threshold": -5}],
+        [{"kind": "drop_1d", "threshold": -5, "thresholds": [-5]}],
+        [{"kind": "drop_1d", "thresholds": []}],
+        [{"kind": "drop_1d", "threshold": "steep"}],
+        [{"kind": "drop_1d", "threshold": -5, "name": "x" * 33}],
+        [{"kind": "drop_1d", "threshold": -5}, {"kind": "drop_1d", "threshold": -9}],
+    ],
+)
+def test_build_registry_rejects_invalid_rules(entries):
+    with pytest.raises(ValueError):
+        registry.build_registry(entries)
+
+
+def test_dip_rules_settings_are_exclusive(tmp_path, monkeypatch):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps([{"kind": "drop_1d", "threshold": -2}]))
+    monkeypatch.setenv("DIP_RULES_FILE", str(path))
+
+    assert [rule.thresholds for rule in registry.load_registry().rules] == [(-2.0,)]
+
+    monkeypatch.setenv("DIP_RULES", "[]")
+    with pytest.raises(ValueError):
+        registry.load_registry()
+
+
+def test_analyze_applies_configured_rules(tmp_path, monkeypatch):
+    monkeypatch.setenv(
+        "DIP_RULES",
+        json.dumps(
+            [
+                {"kind": "drop_1d", "threshold": -50},
+                {"kind": "drawdown", "window": 5, "thresholds": [-5, -20]},
+                {"kind": "drawdown", "window": 5, "threshold": -10, "name": "slide_5d"},
+            ]
+        ),
+    )
+    db_session.configure_engine(f"sqlite+pysqlite:///{tmp_path / 'test.db'}")
+    models.Base.metadata.create_all(db_session.get_engine())
+    with db_session.get_session() as session:
+        ticker = models.Ticker(symbol="AAA")
+        session.add(ticker)
+        session.flush()
+        for offset, close in enumerate([75.0, 90.0, 100.0, 95.0, 98.0]):
+            session.add(
+                models.DailyPrice(
+                    ticker_id=ticker.id,
+                    date=ASOF - timedelta(days=offset),
+                    open=close,
+                    high=close,
+                    low=close,
+                    close=close,
+                    volume=100,
+                    source="massive",
+                )
+            )
+
+    analyze_run.analyze(ASOF, session_factory=db_session.get_session)
+
+    with db_session.get_session() as session:
+        signals = {
+            rule: float(value)
+            for rule, value in session.execute(select(models.Signal.rule, models.Signal.value))
+        }
+        alerts = {alert.rule: alert for alert in session.execute(select(models.Alert)).scalars()}
+
+    assert signals == {
+        "drop_1d": pytest.approx((75 - 90) / 90 * 100, abs=1e-4),
+        "drawdown_5d": -25.0,
+        "slide_5d": -25.0,
+    }
+    assert set(alerts) == {"drawdown_5d", "slide_5d"}
+    assert float(alerts["drawdown_5d"].threshold) == -20.0
+    assert alerts["drawdown_5d"].details_json["severity"] == 2
+    assert float(alerts["slide_5d"].threshold) == -10.0
+    assert "severity" not in alerts["slide_5d"].details_json